@@ -21,17 +21,26 @@ typedef struct tagDiffKinds {
     int DiffUpdate;
     int DiffUpdateReplace;
 } DiffKinds;
+
+#include <pthread.h>
+#include <stdint.h>
+
+static unsigned long long currentThreadID() {
+    return (unsigned long long)(uintptr_t)pthread_self();
+}
 */
 import "C"
 
 import (
     "encoding/json"
     "fmt"
+    "time"
     "unsafe"
 
     "github.com/blang/semver"
 
     "github.com/cfeenstra67/pylumi/go/pylumi"
+    "github.com/pulumi/pulumi/sdk/v3/go/common/diag"
     "github.com/pulumi/pulumi/sdk/v3/go/common/resource"
     "github.com/pulumi/pulumi/sdk/v3/go/common/resource/plugin"
     "github.com/pulumi/pulumi/sdk/v3/go/common/util/cmdutil"
@@ -39,7 +48,13 @@ import (
 )
 
 //export ContextSetup
-func ContextSetup(name *C.char, cwd *C.char) (statusCode int, errString *C.char) {
+func ContextSetup(
+    name *C.char,
+    cwd *C.char,
+    diagnosticsCapacity int,
+    diagnosticsDropPolicy *C.char,
+    diagnosticsDebug bool,
+) (statusCode int, errString *C.char) {
     defer func() {
         if err := recover(); err != nil {
             statusCode = -1
@@ -47,7 +62,18 @@ func ContextSetup(name *C.char, cwd *C.char) (statusCode int, errString *C.char)
         }
     }()
 
-    sink := cmdutil.Diag()
+    var sink diag.Sink = cmdutil.Diag()
+    if diagnosticsCapacity > 0 {
+        buffered, err := pylumi.NewBufferedSink(
+            diagnosticsCapacity,
+            pylumi.DropPolicy(C.GoString(diagnosticsDropPolicy)),
+            diagnosticsDebug,
+        )
+        if err != nil {
+            return -1, C.CString(fmt.Sprintf("error creating diagnostics sink: %v", err))
+        }
+        sink = buffered
+    }
 
     goName := C.GoString(name)
 
@@ -60,7 +86,7 @@ func ContextSetup(name *C.char, cwd *C.char) (statusCode int, errString *C.char)
 
 
 //export ContextTeardown
-func ContextTeardown(name *C.char) (statusCode int, errString *C.char) {
+func ContextTeardown(name *C.char, gracePeriod float64) (statusCode int, result *C.char, errString *C.char) {
     defer func() {
         if err := recover(); err != nil {
             statusCode = -1
@@ -68,11 +94,55 @@ func ContextTeardown(name *C.char) (statusCode int, errString *C.char) {
         }
     }()
 
+    grace := time.Duration(-1)
+    if gracePeriod >= 0 {
+        grace = time.Duration(gracePeriod * float64(time.Second))
+    }
+
     goName := C.GoString(name)
-    if err := pylumi.CloseContext(goName); err != nil {
-        return -1, C.CString(fmt.Sprintf("error closing context: %v", err))
+    reports, err := pylumi.CloseContext(goName, grace)
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error closing context: %v", err))
     }
-    return 0, nil
+
+    reportsEncoded, err := json.Marshal(reports)
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error encoding shutdown reports: %v", err))
+    }
+    return 0, C.CString(string(reportsEncoded)), nil
+}
+
+type DrainDiagnosticsResponse struct {
+    Events []pylumi.DiagnosticEvent
+    Dropped uint64
+}
+
+//export ContextDrainDiagnostics
+func ContextDrainDiagnostics(name *C.char, maxEvents int) (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in ContextDrainDiagnostics: %v", err))
+        }
+    }()
+
+    ctx, err := pylumi.GetContext(C.GoString(name))
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error getting context: %v", err))
+    }
+
+    buffered, ok := ctx.Sink.(*pylumi.BufferedSink)
+    if !ok {
+        return -1, nil, C.CString("diagnostics are not buffered for this context")
+    }
+
+    events, dropped := buffered.Drain(maxEvents)
+    resultEncoded, err := json.Marshal(DrainDiagnosticsResponse{Events: events, Dropped: dropped})
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error marshalling diagnostics: %v", err))
+    }
+
+    return 0, C.CString(string(resultEncoded)), nil
 }
 
 //export ContextListPlugins
@@ -102,6 +172,33 @@ func ContextListPlugins(name *C.char) (statusCode int, resultList **C.char, resu
     return 0, (**C.char)(cArray), len(plugins), nil
 }
 
+//export ContextListInstalledPlugins
+func ContextListInstalledPlugins(name *C.char) (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in ContextListInstalledPlugins: %v", err))
+        }
+    }()
+
+    ctx, err := pylumi.GetContext(C.GoString(name))
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error getting context: %v", err))
+    }
+
+    plugins, err := ctx.ListInstalledPlugins()
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error listing installed plugins: %v", err))
+    }
+
+    pluginsEncoded, err := json.Marshal(plugins)
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error marshalling plugins: %v", err))
+    }
+
+    return 0, C.CString(string(pluginsEncoded)), nil
+}
+
 //export ContextInstallPlugin
 func ContextInstallPlugin(name *C.char, kind *C.char, pluginName *C.char, version *C.char, reinstall bool, exact bool) (statusCode int, errString *C.char) {
     defer func() {
@@ -121,14 +218,64 @@ func ContextInstallPlugin(name *C.char, kind *C.char, pluginName *C.char, versio
         return -1, C.CString(fmt.Sprintf("error getting context: %v", err))
     }
 
-    sink := cmdutil.Diag()
-    if err = ctx.InstallPlugin(goKind, goPluginName, goVersion, reinstall, exact, sink); err != nil {
+    if err = ctx.InstallPlugin(goKind, goPluginName, goVersion, reinstall, exact, ctx.Sink); err != nil {
         return -1, C.CString(fmt.Sprintf("error installing plugin: %v", err))
     }
 
     return 0, nil
 }
 
+//export ContextInstallPlugins
+func ContextInstallPlugins(
+    name *C.char,
+    specs *C.char,
+    mirrorDir *C.char,
+    cacheDir *C.char,
+    concurrency int,
+    reinstall bool,
+    exact bool,
+    progress bool,
+) (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in ContextInstallPlugins: %v", err))
+        }
+    }()
+
+    ctx, err := pylumi.GetContext(C.GoString(name))
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error getting context: %v", err))
+    }
+
+    var specsObj []pylumi.PluginSpec
+    if err := json.Unmarshal([]byte(C.GoString(specs)), &specsObj); err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error unmarshalling plugin specs: %v", err))
+    }
+
+    opts := pylumi.PluginInstallOptions{
+        Reinstall: reinstall,
+        Exact: exact,
+        Concurrency: concurrency,
+        Progress: progress,
+    }
+    if mirrorDir != nil {
+        opts.MirrorDir = C.GoString(mirrorDir)
+    }
+    if cacheDir != nil {
+        opts.CacheDir = C.GoString(cacheDir)
+    }
+
+    results := ctx.InstallPlugins(specsObj, opts, ctx.Sink)
+
+    resultsEncoded, err := json.Marshal(results)
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error marshalling results: %v", err))
+    }
+
+    return 0, C.CString(string(resultsEncoded)), nil
+}
+
 //export ProviderTeardown
 func ProviderTeardown(ctx *C.char, provider *C.char) (statusCode int, errString *C.char) {
     defer func() {
@@ -448,9 +595,18 @@ func ProviderDiff(
     return 0, C.CString(string(resultEncoded)), nil
 }
 
+// encodeProperties wraps encoded properties for embedding in a response. If raw is
+// set they are embedded as a JSON string, so the caller can defer decoding them.
+func encodeProperties(data []byte, raw bool) interface{} {
+    if raw {
+        return string(data)
+    }
+    return json.RawMessage(data)
+}
+
 type ProviderCreateResponse struct {
     ID resource.ID
-    Properties json.RawMessage
+    Properties interface{}
     Status resource.Status
 }
 
@@ -462,6 +618,7 @@ func ProviderCreate(
     news *C.char,
     timeout float64,
     preview bool,
+    rawProperties bool,
 ) (statusCode int, result *C.char, errString *C.char) {
     defer func() {
         if err := recover(); err != nil {
@@ -494,7 +651,7 @@ func ProviderCreate(
 
     resp := ProviderCreateResponse{
         ID: id,
-        Properties: json.RawMessage(propsJson),
+        Properties: encodeProperties(propsJson, rawProperties),
         Status: status,
     }
 
@@ -509,8 +666,8 @@ func ProviderCreate(
 
 type ProviderReadResponse struct {
     ID resource.ID
-    Inputs json.RawMessage
-    Outputs json.RawMessage
+    Inputs interface{}
+    Outputs interface{}
     Status resource.Status
 }
 
@@ -522,6 +679,7 @@ func ProviderRead(
     id *C.char,
     inputs *C.char,
     state *C.char,
+    rawProperties bool,
 ) (statusCode int, resultString *C.char, errString *C.char) {
     defer func() {
         if err := recover(); err != nil {
@@ -565,8 +723,8 @@ func ProviderRead(
 
     resp := ProviderReadResponse{
         ID: idValue,
-        Inputs: json.RawMessage(inputsEncoded),
-        Outputs: json.RawMessage(outputsEncoded),
+        Inputs: encodeProperties(inputsEncoded, rawProperties),
+        Outputs: encodeProperties(outputsEncoded, rawProperties),
         Status: status,
     }
 
@@ -590,6 +748,7 @@ func ProviderUpdate(
     ignoreChanges **C.char,
     nIgnoreChanges int,
     preview bool,
+    rawProperties bool,
 ) (statusCode int, result *C.char, errString *C.char) {
     defer func() {
         if err := recover(); err != nil {
@@ -639,7 +798,7 @@ func ProviderUpdate(
 
     resp := ProviderCreateResponse{
         ID: idValue,
-        Properties: json.RawMessage(propsEncoded),
+        Properties: encodeProperties(propsEncoded, rawProperties),
         Status: status,
     }
 
@@ -761,6 +920,66 @@ func ProviderInvoke(
     return 0, C.CString(string(resultOut)), C.CString(string(failuresOut)), nil
 }
 
+//export ProviderInvokeStream
+func ProviderInvokeStream(
+    ctx *C.char,
+    provider *C.char,
+    member *C.char,
+    args *C.char,
+    path *C.char,
+    spillThreshold int,
+    spillDir *C.char,
+) (statusCode int, elements *C.char, spillPath *C.char, rest *C.char, failuresResult *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in ProviderInvokeStream: %v", err))
+        }
+    }()
+
+    providerObj, err := pylumi.Provider(C.GoString(ctx), tokens.Package(C.GoString(provider)), nil)
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error getting provider: %v", err))
+    }
+
+    argsMap, err := pylumi.JSONToPropertyMap([]byte(C.GoString(args)))
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error unmarshalling args: %v", err))
+    }
+
+    resultObj, failures, err := (*providerObj).Invoke(tokens.ModuleMember(C.GoString(member)), argsMap)
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error invoking function: %v", err))
+    }
+
+    failuresOut, err := json.Marshal(failures)
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error marshalling failures: %v", err))
+    }
+
+    resultMap := pylumi.PropertyMapToObject(resultObj)
+    resultObj = nil
+    items, err := pylumi.PopArray(resultMap, C.GoString(path))
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error getting elements: %v", err))
+    }
+
+    restOut, err := json.Marshal(resultMap)
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error marshalling result: %v", err))
+    }
+
+    streamed, err := pylumi.EncodeElements(items, spillThreshold, C.GoString(spillDir))
+    if err != nil {
+        return -1, nil, nil, nil, nil, C.CString(fmt.Sprintf("error encoding elements: %v", err))
+    }
+
+    if streamed.SpillPath != "" {
+        return 0, nil, C.CString(streamed.SpillPath), C.CString(string(restOut)), C.CString(string(failuresOut)), nil
+    }
+    return 0, C.CString(string(streamed.Inline)), nil, C.CString(string(restOut)), C.CString(string(failuresOut)), nil
+}
+
 //export ProviderSignalCancellation
 func ProviderSignalCancellation(
     ctx *C.char,
@@ -785,6 +1004,113 @@ func ProviderSignalCancellation(
     return 0, nil
 }
 
+//export ProviderGetPluginPid
+func ProviderGetPluginPid(ctx *C.char, provider *C.char) (statusCode int, pid int, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in ProviderGetPluginPid: %v", err))
+        }
+    }()
+
+    providerObj, err := pylumi.Provider(C.GoString(ctx), tokens.Package(C.GoString(provider)), nil)
+    if err != nil {
+        return -1, -1, C.CString(fmt.Sprintf("error getting provider: %v", err))
+    }
+
+    return 0, pylumi.PluginPid(*providerObj), nil
+}
+
+//export TracingEnable
+func TracingEnable(capacity int) (statusCode int, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in TracingEnable: %v", err))
+        }
+    }()
+
+    pylumi.EnableTracing(capacity)
+    return 0, nil
+}
+
+//export TracingDrainSpans
+func TracingDrainSpans() (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in TracingDrainSpans: %v", err))
+        }
+    }()
+
+    spansEncoded, err := json.Marshal(pylumi.DrainSpans())
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error marshalling spans: %v", err))
+    }
+
+    return 0, C.CString(string(spansEncoded)), nil
+}
+
+//export TracingBeginCall
+func TracingBeginCall(callID *C.char) (statusCode int, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in TracingBeginCall: %v", err))
+        }
+    }()
+
+    pylumi.BeginCall(C.GoString(callID))
+    return 0, nil
+}
+
+//export TracingEndCall
+func TracingEndCall() (statusCode int, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in TracingEndCall: %v", err))
+        }
+    }()
+
+    pylumi.EndCall()
+    return 0, nil
+}
+
+//export DiagnosticsGoroutineStacks
+func DiagnosticsGoroutineStacks() (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in DiagnosticsGoroutineStacks: %v", err))
+        }
+    }()
+
+    return 0, C.CString(pylumi.GoroutineStacks()), nil
+}
+
+//export FingerprintProperties
+func FingerprintProperties(values *C.char) (statusCode int, result *C.char, errString *C.char) {
+    defer func() {
+        if err := recover(); err != nil {
+            statusCode = -1
+            errString = C.CString(fmt.Sprintf("unhandled error in FingerprintProperties: %v", err))
+        }
+    }()
+
+    var goValues []map[string]interface{}
+    if err := json.Unmarshal([]byte(C.GoString(values)), &goValues); err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error unmarshalling properties: %v", err))
+    }
+
+    fingerprintsEncoded, err := json.Marshal(pylumi.FingerprintAll(goValues))
+    if err != nil {
+        return -1, nil, C.CString(fmt.Sprintf("error marshalling fingerprints: %v", err))
+    }
+
+    return 0, C.CString(string(fingerprintsEncoded)), nil
+}
+
 //export GetUnknowns
 func GetUnknowns() C.Unknowns {
     return C.Unknowns{
@@ -812,4 +1138,12 @@ func GetDiffKinds() C.DiffKinds {
     }
 }
 
+func init() {
+    // Exported functions run locked to the calling C thread, so the thread
+    // identifies the Python call a goroutine is serving.
+    pylumi.ThreadID = func() uint64 {
+        return uint64(C.currentThreadID())
+    }
+}
+
 func main() {}
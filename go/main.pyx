@@ -1,5 +1,10 @@
-import enum as _enum
 import json
+from time import time as _time
+
+from pylumi import assets
+from pylumi.assets import Archive, Asset
+from pylumi.constants import DiffKind, UnknownValue
+from pylumi.exc import PylumiError, PylumiGoError, ContextError, ProviderError
 
 from cpython.string cimport PyString_AsString
 from libc.stdlib cimport malloc, free
@@ -25,13 +30,21 @@ cdef extern:
         GoInt r0
         char* r1
 
-    ContextSetup_return ContextSetup(char* name, char* cwd) nogil
+    ContextSetup_return ContextSetup(char* name, char* cwd, GoInt diagnosticsCapacity, char* diagnosticsDropPolicy, GoUint8 diagnosticsDebug) nogil
+
+    struct ContextDrainDiagnostics_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    ContextDrainDiagnostics_return ContextDrainDiagnostics(char* name, GoInt maxEvents) nogil
 
     struct ContextTeardown_return:
         GoInt r0
         char* r1
+        char* r2
 
-    ContextTeardown_return ContextTeardown(char* name) nogil
+    ContextTeardown_return ContextTeardown(char* name, GoFloat64 gracePeriod) nogil
 
     struct ContextListPlugins_return:
         GoInt r0
@@ -41,12 +54,26 @@ cdef extern:
 
     ContextListPlugins_return ContextListPlugins(char* name) nogil
 
+    struct ContextListInstalledPlugins_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    ContextListInstalledPlugins_return ContextListInstalledPlugins(char* name) nogil
+
     struct ContextInstallPlugin_return:
         GoInt r0
         char* r1
 
     ContextInstallPlugin_return ContextInstallPlugin(char* name, char* kind, char* pluginName, char* version, GoUint8 reinstall, GoUint8 exact) nogil
 
+    struct ContextInstallPlugins_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    ContextInstallPlugins_return ContextInstallPlugins(char* name, char* specs, char* mirrorDir, char* cacheDir, GoInt concurrency, GoUint8 reinstall, GoUint8 exact, GoUint8 progress) nogil
+
     struct ProviderTeardown_return:
         GoInt r0
         char* r1
@@ -101,21 +128,21 @@ cdef extern:
         char* r1
         char* r2
 
-    ProviderCreate_return ProviderCreate(char* ctx, char* provider, char* urn, char* news, GoFloat64 timeout, GoUint8 preview) nogil
+    ProviderCreate_return ProviderCreate(char* ctx, char* provider, char* urn, char* news, GoFloat64 timeout, GoUint8 preview, GoUint8 rawProperties) nogil
 
     struct ProviderRead_return:
         GoInt r0
         char* r1
         char* r2
 
-    ProviderRead_return ProviderRead(char* ctx, char* provider, char* urn, char* id, char* inputs, char* state) nogil
+    ProviderRead_return ProviderRead(char* ctx, char* provider, char* urn, char* id, char* inputs, char* state, GoUint8 rawProperties) nogil
 
     struct ProviderUpdate_return:
         GoInt r0
         char* r1
         char* r2
 
-    ProviderUpdate_return ProviderUpdate(char* ctx, char* provider, char* urn, char* id, char* olds, char* news, GoFloat64 timeout, char** ignoreChanges, GoInt nIgnoreChanges, GoUint8 preview) nogil
+    ProviderUpdate_return ProviderUpdate(char* ctx, char* provider, char* urn, char* id, char* olds, char* news, GoFloat64 timeout, char** ignoreChanges, GoInt nIgnoreChanges, GoUint8 preview, GoUint8 rawProperties) nogil
 
     struct ProviderDelete_return:
         GoInt r0
@@ -138,6 +165,16 @@ cdef extern:
 
     ProviderInvoke_return ProviderInvoke(char* ctx, char* provider, char* member, char* args) nogil
 
+    struct ProviderInvokeStream_return:
+        GoInt r0
+        char* r1
+        char* r2
+        char* r3
+        char* r4
+        char* r5
+
+    ProviderInvokeStream_return ProviderInvokeStream(char* ctx, char* provider, char* member, char* args, char* path, GoInt spillThreshold, char* spillDir) nogil
+
     struct ProviderSignalCancellation_return:
         GoInt r0
         char* r1
@@ -167,6 +204,52 @@ cdef extern:
 
     DiffKinds GetDiffKinds() nogil
 
+    struct ProviderGetPluginPid_return:
+        GoInt r0
+        GoInt r1
+        char* r2
+
+    ProviderGetPluginPid_return ProviderGetPluginPid(char* ctx, char* provider) nogil
+
+    struct TracingEnable_return:
+        GoInt r0
+        char* r1
+
+    TracingEnable_return TracingEnable(GoInt capacity) nogil
+
+    struct TracingDrainSpans_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    TracingDrainSpans_return TracingDrainSpans() nogil
+
+    struct TracingBeginCall_return:
+        GoInt r0
+        char* r1
+
+    TracingBeginCall_return TracingBeginCall(char* callID) nogil
+
+    struct TracingEndCall_return:
+        GoInt r0
+        char* r1
+
+    TracingEndCall_return TracingEndCall() nogil
+
+    struct DiagnosticsGoroutineStacks_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    DiagnosticsGoroutineStacks_return DiagnosticsGoroutineStacks() nogil
+
+    struct FingerprintProperties_return:
+        GoInt r0
+        char* r1
+        char* r2
+
+    FingerprintProperties_return FingerprintProperties(char* values) nogil
+
 
 # Helper functions
 cdef bytes _bytes(s):
@@ -210,13 +293,20 @@ cdef char ** to_cstring_array(list_str):
     return ret
 
 
-def json_loads(input):
+def json_loads(input, pool=None):
     """
-    json.loads() with support for unknown values
+    json.loads() with support for unknown values. If `pool` is given, values are
+    shared through that `pylumi.interning.InternPool`.
     """
+    if pool is not None:
+        return pool.loads(input)
+
     def object_hook(x):
         if isinstance(x, dict) and UNKNOWN_KEY in x:
             return UnknownValue(x[UNKNOWN_KEY])
+        asset = assets.from_json(x)
+        if asset is not None:
+            return asset
         return x
 
     return json.loads(input, object_hook=object_hook)
@@ -224,11 +314,13 @@ def json_loads(input):
 
 def json_dumps(input):
     """
-    json.dumps() with support for unknown values
+    json.dumps() with support for unknown values, assets and archives
     """
     def default(x):
         if isinstance(x, UnknownValue):
             return {UNKNOWN_KEY: x.value}
+        if isinstance(x, (Asset, Archive)):
+            return x.to_json()
         raise TypeError
 
     return json.dumps(input, default=default)
@@ -256,19 +348,6 @@ UNKNOWN_OBJECT_VALUE = _str(UNKNOWNS_C.ObjectValue)
 
 UNKNOWN_NULL_VALUE = _str(UNKNOWNS_C.NullValue)
 
-class UnknownValue(_enum.Enum):
-    """
-    Enum of UNKNOWN_*_VALUE values
-    """
-    BOOL = UNKNOWN_BOOL_VALUE
-    NUMBER = UNKNOWN_NUMBER_VALUE
-    STRING = UNKNOWN_STRING_VALUE
-    ARRAY = UNKNOWN_ARRAY_VALUE
-    ASSET = UNKNOWN_ASSET_VALUE
-    ARCHIVE = UNKNOWN_ARCHIVE_VALUE
-    OBJECT = UNKNOWN_OBJECT_VALUE
-    NULL_ = UNKNOWN_NULL_VALUE
-
 cdef DiffKinds DIFF_KINDS_C = GetDiffKinds()
 
 DIFF_ADD = DIFF_KINDS_C.DiffAdd
@@ -283,39 +362,41 @@ DIFF_UPDATE = DIFF_KINDS_C.DiffUpdate
 
 DIFF_UPDATE_REPLACE = DIFF_KINDS_C.DiffUpdateReplace
 
-class DiffKind(_enum.Enum):
-    """
-    Enum of DIFF_* values
-    """
-    ADD = DIFF_ADD
-    ADD_REPLACE = DIFF_ADD_REPLACE
-    DELETE = DIFF_DELETE
-    DELETE_REPLACE = DIFF_DELETE_REPLACE
-    UPDATE = DIFF_UPDATE
-    UPDATE_REPLACE = DIFF_UPDATE_REPLACE
 
 # Context methods
 
-def context_setup(str ctxName, str cwd):
+def context_setup(str ctxName, str cwd, int diagnostics_capacity=0, str diagnostics_drop_policy='oldest', bint diagnostics_debug=False):
     cdef char* ctx_name_c = _cstr(ctxName)
     cdef char* cwd_c = _cstr(cwd)
+    cdef char* drop_policy_c = _cstr(diagnostics_drop_policy)
     with nogil:
-        res = ContextSetup(ctx_name_c, cwd_c)
+        res = ContextSetup(ctx_name_c, cwd_c, diagnostics_capacity, drop_policy_c, diagnostics_debug)
     free(ctx_name_c)
     free(cwd_c)
+    free(drop_policy_c)
     if res.r0 == 0:
         return None
     raise ContextError(res.r0, _str(res.r1))
 
 
-def context_teardown(str ctxName):
+def context_drain_diagnostics(str ctxName, int max_events=0):
     cdef char* ctx_name_c = _cstr(ctxName)
     with nogil:
-        res = ContextTeardown(ctx_name_c)
+        res = ContextDrainDiagnostics(ctx_name_c, max_events)
     free(ctx_name_c)
     if res.r0 == 0:
-        return None
-    raise ContextError(res.r0, _str(res.r1))
+        return json_loads(_bytes(res.r1))
+    raise ContextError(res.r0, _str(res.r2))
+
+
+def context_teardown(str ctxName, double grace_period=-1):
+    cdef char* ctx_name_c = _cstr(ctxName)
+    with nogil:
+        res = ContextTeardown(ctx_name_c, grace_period)
+    free(ctx_name_c)
+    if res.r0 == 0:
+        return json_loads(_bytes(res.r1))
+    raise ContextError(res.r0, _str(res.r2))
 
 
 def context_list_plugins(str ctxName):
@@ -328,6 +409,16 @@ def context_list_plugins(str ctxName):
     raise ContextError(res.r0, _str(res.r3))
 
 
+def context_list_installed_plugins(str ctxName):
+    cdef char* ctx_name_c = _cstr(ctxName)
+    with nogil:
+        res = ContextListInstalledPlugins(ctx_name_c)
+    free(ctx_name_c)
+    if res.r0 == 0:
+        return json_loads(_bytes(res.r1))
+    raise ContextError(res.r0, _str(res.r2))
+
+
 def context_install_plugin(str ctx, str plugin_kind, str plugin_name, str plugin_version, bint reinstall=False, bint exact=False):
     cdef char* ctx_c = _cstr(ctx)
     cdef char* plugin_kind_c = _cstr(plugin_kind)
@@ -344,7 +435,34 @@ def context_install_plugin(str ctx, str plugin_kind, str plugin_name, str plugin
     raise ContextError(res.r0, _str(res.r1))
 
 
+def context_install_plugins(str ctx, plugins, mirror_dir=None, cache_dir=None, int concurrency=4, bint reinstall=False, bint exact=False, bint progress=True):
+    cdef char* ctx_c = _cstr(ctx)
+    cdef char* specs_c = _cstr(json_dumps([
+        {'Kind': kind, 'Name': name, 'Version': version}
+        for kind, name, version in plugins
+    ]).encode())
+    cdef char* mirror_dir_c = _cstr(mirror_dir) if mirror_dir is not None else NULL
+    cdef char* cache_dir_c = _cstr(cache_dir) if cache_dir is not None else NULL
+    with nogil:
+        res = ContextInstallPlugins(ctx_c, specs_c, mirror_dir_c, cache_dir_c, concurrency, reinstall, exact, progress)
+    free(ctx_c)
+    free(specs_c)
+    free(mirror_dir_c)
+    free(cache_dir_c)
+    if res.r0 == 0:
+        return json_loads(_bytes(res.r1))
+    raise ContextError(res.r0, _str(res.r2))
+
+
 # Provider methods
+#
+# Every provider method that talks to a plugin accepts an optional `trace` object.
+# If given, `trace.record(phase, start, end, nbytes)` is called for each phase of
+# the call: "encode" (with the encoded request size), "call" and "decode" (with
+# the encoded response size). Times are seconds since the epoch. Recording the
+# "encode" phase may block, e.g. for admission control; the call phase starts
+# after it returns. It's recorded before the request is copied to C strings, so a
+# blocked call holds only its encoded request and an exception leaks nothing.
 
 def provider_teardown(str ctx, str provider):
     cdef char* ctx_c = _cstr(ctx)
@@ -358,21 +476,32 @@ def provider_teardown(str ctx, str provider):
     raise ProviderError(res.r0, _str(res.r1))
 
 
-def provider_get_schema(str ctxName, str name, int version=0):
+def provider_get_schema(str ctxName, str name, int version=0, trace=None):
     cdef char* ctx_c = _cstr(ctxName)
     cdef char* provider_c = _cstr(name)
+    cdef double call_start = _time()
     with nogil:
         res = ProviderGetSchema(ctx_c, provider_c, version)
+    cdef double call_end = _time()
     free(ctx_c)
     free(provider_c)
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
         return res.r1
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_check_config(str ctx, str provider, version, str urn, olds, news, bint allow_unknowns=False):
-    cdef char* olds_encoded = _cstr(json_dumps(olds).encode())
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_check_config(str ctx, str provider, version, str urn, olds, news, bint allow_unknowns=False, trace=None):
+    cdef double start = _time()
+    olds_json = json_dumps(olds).encode()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(olds_json) + len(news_json))
+        call_start = _time()
+    cdef char* olds_encoded = _cstr(olds_json)
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* version_c = _cstr(version) if version is not None else NULL
@@ -382,22 +511,36 @@ def provider_check_config(str ctx, str provider, version, str urn, olds, news, b
             ctx_c, provider_c, version_c,  urn_c,
             olds_encoded, news_encoded, allow_unknowns
         )
+    cdef double call_end = _time()
     free(ctx_c)
     free(provider_c)
     free(olds_encoded)
     free(news_encoded)
     free(urn_c)
     free(version_c)
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        props_decoded = json_loads(_bytes(res.r1))
-        failures_decoded = json_loads(_bytes(res.r2))
+        props_raw = _bytes(res.r1)
+        failures_raw = _bytes(res.r2)
+        props_decoded = json_loads(props_raw)
+        failures_decoded = json_loads(failures_raw)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(props_raw) + len(failures_raw))
         return props_decoded, failures_decoded
     raise ProviderError(res.r0, _str(res.r3))
 
 
-def provider_diff_config(str ctx, str provider, version, str urn, olds, news, bint allow_unknowns=False, ignore_changes=()):
-    cdef char* olds_encoded = _cstr(json_dumps(olds).encode())
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_diff_config(str ctx, str provider, version, str urn, olds, news, bint allow_unknowns=False, ignore_changes=(), trace=None):
+    cdef double start = _time()
+    olds_json = json_dumps(olds).encode()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(olds_json) + len(news_json))
+        call_start = _time()
+    cdef char* olds_encoded = _cstr(olds_json)
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* version_c = _cstr(version) if version is not None else NULL
@@ -410,6 +553,7 @@ def provider_diff_config(str ctx, str provider, version, str urn, olds, news, bi
             olds_encoded, news_encoded,
             allow_unknowns, ignore_changes_c, ignore_changes_len_c
         )
+    cdef double call_end = _time()
     free(ctx_c)
     free(provider_c)
     free(olds_encoded)
@@ -417,31 +561,52 @@ def provider_diff_config(str ctx, str provider, version, str urn, olds, news, bi
     free(urn_c)
     free(ignore_changes_c)
     free(version_c)
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        out_decoded = json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
         return out_decoded
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_configure(str ctx, str provider, version, inputs):
+def provider_configure(str ctx, str provider, version, inputs, trace=None):
+    cdef double start = _time()
+    inputs_json = json_dumps(inputs).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(inputs_json))
+        call_start = _time()
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* version_c = _cstr(version) if version is not None else NULL
-    cdef char* inputs_encoded = _cstr(json_dumps(inputs).encode())
+    cdef char* inputs_encoded = _cstr(inputs_json)
     with nogil:
         res = ProviderConfigure(ctx_c, provider_c, version_c, inputs_encoded)
+    cdef double call_end = _time()
     free(ctx_c)
     free(provider_c)
     free(inputs_encoded)
     free(version_c)
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
         return None
     raise ProviderError(res.r0, _str(res.r1))
 
 
-def provider_check(str ctx, str provider, str urn, olds, news, bint allow_unknowns=False):
-    cdef char* olds_encoded = _cstr(json_dumps(olds).encode())
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_check(str ctx, str provider, str urn, olds, news, bint allow_unknowns=False, pool=None, trace=None):
+    cdef double start = _time()
+    olds_json = json_dumps(olds).encode()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(olds_json) + len(news_json))
+        call_start = _time()
+    cdef char* olds_encoded = _cstr(olds_json)
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
@@ -450,6 +615,7 @@ def provider_check(str ctx, str provider, str urn, olds, news, bint allow_unknow
             ctx_c, provider_c, urn_c,
             olds_encoded, news_encoded, allow_unknowns
         )
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
@@ -457,16 +623,29 @@ def provider_check(str ctx, str provider, str urn, olds, news, bint allow_unknow
     free(news_encoded)
     free(urn_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        props = json_loads(_bytes(res.r1))
-        failures = json_loads(_bytes(res.r2))
+        props_raw = _bytes(res.r1)
+        failures_raw = _bytes(res.r2)
+        props = json_loads(props_raw, pool)
+        failures = json_loads(failures_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(props_raw) + len(failures_raw))
         return props, failures
     raise ProviderError(res.r0, _str(res.r3))
 
 
-def provider_diff(str ctx, str provider, str urn, str id, olds, news, bint allow_unknowns=False, ignore_changes=()):
-    cdef char* olds_encoded = _cstr(json_dumps(olds).encode())
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_diff(str ctx, str provider, str urn, str id, olds, news, bint allow_unknowns=False, ignore_changes=(), pool=None, trace=None):
+    cdef double start = _time()
+    olds_json = json_dumps(olds).encode()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(olds_json) + len(news_json))
+        call_start = _time()
+    cdef char* olds_encoded = _cstr(olds_json)
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
@@ -479,6 +658,7 @@ def provider_diff(str ctx, str provider, str urn, str id, olds, news, bint allow
             olds_encoded, news_encoded,
             allow_unknowns, ignore_changes_c, ignore_changes_len_c
         )
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
@@ -488,37 +668,61 @@ def provider_diff(str ctx, str provider, str urn, str id, olds, news, bint allow
     free(id_c)
     free(ignore_changes_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        out_decoded = json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
         return out_decoded
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_create(str ctx, str provider, str urn, news, int timeout=60, bint preview=False):
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_create(str ctx, str provider, str urn, news, int timeout=60, bint preview=False, bint raw_properties=False, pool=None, trace=None):
+    cdef double start = _time()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(news_json))
+        call_start = _time()
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
     with nogil:
         res = ProviderCreate(
             ctx_c, provider_c, urn_c,
-            news_encoded, timeout, preview
+            news_encoded, timeout, preview, raw_properties
         )
+    cdef double call_end = _time()
 
     free(news_encoded)
     free(ctx_c)
     free(provider_c)
     free(urn_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        out_decoded = json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
         return out_decoded
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_read(str ctx, str provider, str urn, str id, inputs, state):
-    cdef char* input_encoded = _cstr(json_dumps(inputs).encode())
-    cdef char* state_encoded = _cstr(json_dumps(state).encode())
+def provider_read(str ctx, str provider, str urn, str id, inputs, state, bint raw_properties=False, pool=None, trace=None):
+    cdef double start = _time()
+    inputs_json = json_dumps(inputs).encode()
+    state_json = json_dumps(state).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(inputs_json) + len(state_json))
+        call_start = _time()
+    cdef char* input_encoded = _cstr(inputs_json)
+    cdef char* state_encoded = _cstr(state_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
@@ -527,8 +731,9 @@ def provider_read(str ctx, str provider, str urn, str id, inputs, state):
     with nogil:
         res = ProviderRead(
             ctx_c, provider_c, urn_c, id_c,
-            input_encoded, state_encoded
+            input_encoded, state_encoded, raw_properties
         )
+    cdef double call_end = _time()
 
     free(input_encoded)
     free(state_encoded)
@@ -537,15 +742,27 @@ def provider_read(str ctx, str provider, str urn, str id, inputs, state):
     free(urn_c)
     free(id_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        out_decoded = json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
         return out_decoded
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_update(str ctx, str provider, str urn, str id, olds, news, int timeout=60, ignore_changes=(), bint preview=False):
-    cdef char* olds_encoded = _cstr(json_dumps(olds).encode())
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_update(str ctx, str provider, str urn, str id, olds, news, int timeout=60, ignore_changes=(), bint preview=False, bint raw_properties=False, pool=None, trace=None):
+    cdef double start = _time()
+    olds_json = json_dumps(olds).encode()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(olds_json) + len(news_json))
+        call_start = _time()
+    cdef char* olds_encoded = _cstr(olds_json)
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
@@ -557,8 +774,9 @@ def provider_update(str ctx, str provider, str urn, str id, olds, news, int time
         res = ProviderUpdate(
             ctx_c, provider_c, urn_c, id_c,
             olds_encoded, news_encoded,
-            timeout, ignore_changes_c, ignore_changes_len_c, preview
+            timeout, ignore_changes_c, ignore_changes_len_c, preview, raw_properties
         )
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
@@ -568,14 +786,25 @@ def provider_update(str ctx, str provider, str urn, str id, olds, news, int time
     free(id_c)
     free(ignore_changes_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        out_decoded = json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
         return out_decoded
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_delete(str ctx, str provider, str urn, str id, news, int timeout=60):
-    cdef char* news_encoded = _cstr(json_dumps(news).encode())
+def provider_delete(str ctx, str provider, str urn, str id, news, int timeout=60, trace=None):
+    cdef double start = _time()
+    news_json = json_dumps(news).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(news_json))
+        call_start = _time()
+    cdef char* news_encoded = _cstr(news_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* urn_c = _cstr(urn)
@@ -586,6 +815,7 @@ def provider_delete(str ctx, str provider, str urn, str id, news, int timeout=60
             ctx_c, provider_c, urn_c, id_c,
             news_encoded, timeout
         )
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
@@ -593,95 +823,224 @@ def provider_delete(str ctx, str provider, str urn, str id, news, int timeout=60
     free(urn_c)
     free(id_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
         return res.r1
     raise ProviderError(res.r0, _str(res.r2))
 
 
-def provider_get_plugin_info(str ctx, str provider):
+def provider_get_plugin_info(str ctx, str provider, trace=None):
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
+    cdef double call_start = _time()
 
     with nogil:
         res = ProviderGetPluginInfo(ctx_c, provider_c)
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        return json_loads(_bytes(res.r1))
+        out_raw = _bytes(res.r1)
+        out_decoded = json_loads(out_raw)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(out_raw))
+        return out_decoded
     raise ProviderError(res.r0, _str(res.r1))
 
 
-def provider_invoke(str ctx, str provider, str member, args):
-    cdef char* args_c = _cstr(json_dumps(args).encode())
+def provider_get_plugin_pid(str ctx, str provider):
+    cdef char* ctx_c = _cstr(ctx)
+    cdef char* provider_c = _cstr(provider)
+
+    with nogil:
+        res = ProviderGetPluginPid(ctx_c, provider_c)
+
+    free(ctx_c)
+    free(provider_c)
+
+    if res.r0 == 0:
+        return res.r1 if res.r1 >= 0 else None
+    raise ProviderError(res.r0, _str(res.r2))
+
+
+def provider_invoke(str ctx, str provider, str member, args, pool=None, trace=None):
+    cdef double start = _time()
+    args_json = json_dumps(args).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(args_json))
+        call_start = _time()
+    cdef char* args_c = _cstr(args_json)
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
     cdef char* member_c = _cstr(member)
 
     with nogil:
         res = ProviderInvoke(ctx_c, provider_c, member_c, args_c)
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
     free(member_c)
     free(args_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
-        result = json_loads(_bytes(res.r1))
-        failures = json_loads(_bytes(res.r2))
+        result_raw = _bytes(res.r1)
+        failures_raw = _bytes(res.r2)
+        result = json_loads(result_raw, pool)
+        failures = json_loads(failures_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(result_raw) + len(failures_raw))
         return result, failures
     raise ProviderError(res.r0, _str(res.r3))
 
 
-def provider_signal_cancellation(str ctx, str provider):
+def provider_invoke_stream(
+    str ctx,
+    str provider,
+    str member,
+    args,
+    str path,
+    int spill_threshold=-1,
+    str spill_dir='',
+    pool=None,
+    trace=None
+):
+    """
+    Invoke a function, returning the elements of the array at `path` in the result
+    separately as newline-delimited JSON. Returns a tuple of the encoded elements
+    (None if they were spilled to a file), the spill file path (None if the
+    elements are inline), the rest of the result and the failures.
+    """
+    cdef double start = _time()
+    args_json = json_dumps(args).encode()
+    cdef double call_start = _time()
+    if trace is not None:
+        trace.record('encode', start, call_start, len(args_json))
+        call_start = _time()
+    cdef char* args_c = _cstr(args_json)
+    cdef char* ctx_c = _cstr(ctx)
+    cdef char* provider_c = _cstr(provider)
+    cdef char* member_c = _cstr(member)
+    cdef char* path_c = _cstr(path)
+    cdef char* spill_dir_c = _cstr(spill_dir)
+
+    with nogil:
+        res = ProviderInvokeStream(
+            ctx_c, provider_c, member_c, args_c, path_c, spill_threshold, spill_dir_c
+        )
+    cdef double call_end = _time()
+
+    free(ctx_c)
+    free(provider_c)
+    free(member_c)
+    free(args_c)
+    free(path_c)
+    free(spill_dir_c)
+
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
+    if res.r0 == 0:
+        elements = None if res.r1 == NULL else _bytes(res.r1)
+        spill_path = None if res.r2 == NULL else _str(res.r2)
+        rest_raw = _bytes(res.r3)
+        failures_raw = _bytes(res.r4)
+        rest = json_loads(rest_raw, pool)
+        failures = json_loads(failures_raw, pool)
+        if trace is not None:
+            trace.record('decode', call_end, _time(), len(rest_raw) + len(failures_raw))
+        return elements, spill_path, rest, failures
+    raise ProviderError(res.r0, _str(res.r5))
+
+
+def provider_signal_cancellation(str ctx, str provider, trace=None):
     cdef char* ctx_c = _cstr(ctx)
     cdef char* provider_c = _cstr(provider)
+    cdef double call_start = _time()
 
     with nogil:
         res = ProviderSignalCancellation(ctx_c, provider_c)
+    cdef double call_end = _time()
 
     free(ctx_c)
     free(provider_c)
 
+    if trace is not None:
+        trace.record('call', call_start, call_end, 0)
     if res.r0 == 0:
         return None
     raise ProviderError(res.r0, _str(res.r1))
 
 
-class PylumiError(Exception):
-    """
-    Base class for pylumi errors
-    """
+# Tracing methods
 
+def tracing_enable(int capacity=10000):
+    with nogil:
+        res = TracingEnable(capacity)
+    if res.r0 == 0:
+        return None
+    raise PylumiGoError(_str(res.r1))
 
-class PylumiGoError(PylumiError):
+
+def tracing_drain_spans():
+    with nogil:
+        res = TracingDrainSpans()
+    if res.r0 == 0:
+        return json_loads(_bytes(res.r1))
+    raise PylumiGoError(_str(res.r2))
+
+
+def tracing_begin_call(str call_id):
     """
-    Errors originating from go within Pylumi
+    Tag the gRPC spans recorded by calls made from this thread with `call_id`,
+    until tracing_end_call() is called
     """
+    cdef char* call_id_c = _cstr(call_id)
+    with nogil:
+        res = TracingBeginCall(call_id_c)
+    free(call_id_c)
+    if res.r0 == 0:
+        return None
+    raise PylumiGoError(_str(res.r1))
 
 
-class ContextError(PylumiGoError):
+def tracing_end_call():
     """
-    Errors from context_ methods
+    Stop tagging the gRPC spans recorded by calls made from this thread
     """
-    def __init__(self, int status_code, str message):
-        self.status_code = status_code
-        self.message = message
-        super().__init__(
-            'Error from pulumi context: %s (status code: %d)'
-            % (message, status_code)
-        )
+    with nogil:
+        res = TracingEndCall()
+    if res.r0 == 0:
+        return None
+    raise PylumiGoError(_str(res.r1))
 
 
-class ProviderError(PylumiGoError):
+def diagnostics_goroutine_stacks():
     """
-    Errors from provider_ methods
+    Get the stack traces of all goroutines in the Go runtime
     """
-    def __init__(self, int status_code, str message):
-        self.status_code = status_code
-        self.message = message
-        super().__init__(
-            'Error from pulumi provider: %s (status code: %d)'
-            % (message, status_code)
-        )
+    with nogil:
+        res = DiagnosticsGoroutineStacks()
+    if res.r0 == 0:
+        return _str(res.r1)
+    raise PylumiGoError(_str(res.r2))
+
+
+# Fingerprint methods
+
+def fingerprint_properties(values):
+    values_json = json_dumps(values).encode()
+    cdef char* values_c = _cstr(values_json)
+    with nogil:
+        res = FingerprintProperties(values_c)
+    free(values_c)
+    if res.r0 == 0:
+        return json.loads(_bytes(res.r1))
+    raise PylumiGoError(_str(res.r2))
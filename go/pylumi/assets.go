@@ -0,0 +1,173 @@
+package pylumi
+
+import (
+    "fmt"
+
+    "github.com/pulumi/pulumi/sdk/v3/go/common/resource"
+)
+
+// Assets and archives cross the FFI as references e.g. {"$asset": {"path": "..."}};
+// their contents are only read here, when they are hashed, and by the provider.
+const (
+    AssetKey = "$asset"
+    ArchiveKey = "$archive"
+)
+
+func specString(spec map[string]interface{}, key string) (string, bool, error) {
+    value, ok := spec[key]
+    if !ok || value == nil {
+        return "", false, nil
+    }
+    s, ok := value.(string)
+    if !ok {
+        return "", false, fmt.Errorf("%s must be a string, got %T", key, value)
+    }
+    return s, true, nil
+}
+
+// UnmarshalAsset creates an asset from a reference with one of the keys "path",
+// "text" or "uri". References with a "hash", e.g. from earlier results, are
+// trusted as-is, since their file may no longer exist; others are hashed, path
+// assets by streaming the file from disk.
+func UnmarshalAsset(spec map[string]interface{}) (*resource.Asset, error) {
+    hash, hashed, err := specString(spec, "hash")
+    if err != nil {
+        return nil, fmt.Errorf("invalid asset: %v", err)
+    }
+    for _, key := range []string{"path", "text", "uri"} {
+        value, ok, err := specString(spec, key)
+        if err != nil {
+            return nil, fmt.Errorf("invalid asset: %v", err)
+        }
+        if !ok {
+            continue
+        }
+        if hashed {
+            asset := &resource.Asset{Sig: resource.AssetSig, Hash: hash}
+            switch key {
+            case "path":
+                asset.Path = value
+            case "text":
+                asset.Text = value
+            default:
+                asset.URI = value
+            }
+            return asset, nil
+        }
+        switch key {
+        case "path":
+            return resource.NewPathAsset(value)
+        case "text":
+            return resource.NewTextAsset(value)
+        default:
+            return resource.NewURIAsset(value)
+        }
+    }
+    return nil, fmt.Errorf("invalid asset: one of path, text or uri is required")
+}
+
+// UnmarshalArchive creates an archive from a reference with one of the keys
+// "path", "uri" or "assets", a map of names to asset and archive references.
+// Like assets, archives are only hashed if the reference has no "hash".
+func UnmarshalArchive(spec map[string]interface{}) (*resource.Archive, error) {
+    hash, hashed, err := specString(spec, "hash")
+    if err != nil {
+        return nil, fmt.Errorf("invalid archive: %v", err)
+    }
+    if raw, ok := spec["assets"]; ok && raw != nil {
+        members, ok := raw.(map[string]interface{})
+        if !ok {
+            return nil, fmt.Errorf("invalid archive: assets must be an object, got %T", raw)
+        }
+        assets := make(map[string]interface{}, len(members))
+        for name, member := range members {
+            value, err := unmarshalArchiveMember(member)
+            if err != nil {
+                return nil, fmt.Errorf("invalid archive member %s: %v", name, err)
+            }
+            assets[name] = value
+        }
+        if hashed {
+            return &resource.Archive{Sig: resource.ArchiveSig, Hash: hash, Assets: assets}, nil
+        }
+        return resource.NewAssetArchive(assets)
+    }
+
+    for _, key := range []string{"path", "uri"} {
+        value, ok, err := specString(spec, key)
+        if err != nil {
+            return nil, fmt.Errorf("invalid archive: %v", err)
+        }
+        if !ok {
+            continue
+        }
+        if hashed {
+            archive := &resource.Archive{Sig: resource.ArchiveSig, Hash: hash}
+            if key == "path" {
+                archive.Path = value
+            } else {
+                archive.URI = value
+            }
+            return archive, nil
+        }
+        if key == "path" {
+            return resource.NewPathArchive(value)
+        }
+        return resource.NewURIArchive(value)
+    }
+    return nil, fmt.Errorf("invalid archive: one of path, uri or assets is required")
+}
+
+func unmarshalArchiveMember(member interface{}) (interface{}, error) {
+    obj, ok := member.(map[string]interface{})
+    if ok && len(obj) == 1 {
+        if spec, ok := obj[AssetKey].(map[string]interface{}); ok {
+            return UnmarshalAsset(spec)
+        }
+        if spec, ok := obj[ArchiveKey].(map[string]interface{}); ok {
+            return UnmarshalArchive(spec)
+        }
+    }
+    return nil, fmt.Errorf("expected an asset or archive, got %v", member)
+}
+
+// MarshalAsset converts an asset to a reference, without its contents
+func MarshalAsset(asset *resource.Asset) map[string]interface{} {
+    spec := make(map[string]interface{})
+    if asset.Hash != "" {
+        spec["hash"] = asset.Hash
+    }
+    if asset.Path != "" {
+        spec["path"] = asset.Path
+    } else if asset.URI != "" {
+        spec["uri"] = asset.URI
+    } else {
+        spec["text"] = asset.Text
+    }
+    return map[string]interface{}{AssetKey: spec}
+}
+
+// MarshalArchive converts an archive to a reference, without its contents
+func MarshalArchive(archive *resource.Archive) map[string]interface{} {
+    spec := make(map[string]interface{})
+    if archive.Hash != "" {
+        spec["hash"] = archive.Hash
+    }
+    if archive.Path != "" {
+        spec["path"] = archive.Path
+    } else if archive.URI != "" {
+        spec["uri"] = archive.URI
+    } else {
+        assets := make(map[string]interface{}, len(archive.Assets))
+        for name, member := range archive.Assets {
+            switch m := member.(type) {
+            case *resource.Asset:
+                assets[name] = MarshalAsset(m)
+            case *resource.Archive:
+                assets[name] = MarshalArchive(m)
+            }
+        }
+        spec["assets"] = assets
+    }
+    return map[string]interface{}{ArchiveKey: spec}
+}
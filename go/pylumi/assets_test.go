@@ -0,0 +1,59 @@
+package pylumi
+
+import (
+    "encoding/json"
+    "path/filepath"
+    "reflect"
+    "testing"
+)
+
+func TestHashedAssetRoundTrip(t *testing.T) {
+    // A result asset whose file has since been deleted, e.g. a temporary file
+    missing := filepath.Join(t.TempDir(), "deleted.zip")
+    input := map[string]interface{}{
+        "code": map[string]interface{}{
+            AssetKey: map[string]interface{}{"path": missing, "hash": "abc"},
+        },
+        "bundle": map[string]interface{}{
+            ArchiveKey: map[string]interface{}{
+                "hash": "def",
+                "assets": map[string]interface{}{
+                    "index.js": map[string]interface{}{
+                        AssetKey: map[string]interface{}{"path": missing, "hash": "ghi"},
+                    },
+                },
+            },
+        },
+        "site": map[string]interface{}{
+            ArchiveKey: map[string]interface{}{"uri": "https://example.com/site.zip", "hash": "jkl"},
+        },
+    }
+    data, err := json.Marshal(input)
+    if err != nil {
+        t.Fatal(err)
+    }
+
+    props, err := JSONToPropertyMap(data)
+    if err != nil {
+        t.Fatalf("error decoding hashed references: %v", err)
+    }
+    encoded, err := PropertyMapToJSON(props)
+    if err != nil {
+        t.Fatal(err)
+    }
+
+    var output map[string]interface{}
+    if err := json.Unmarshal(encoded, &output); err != nil {
+        t.Fatal(err)
+    }
+    if !reflect.DeepEqual(input, output) {
+        t.Fatalf("expected %v, got %v", input, output)
+    }
+}
+
+func TestUnhashedAssetMissingFile(t *testing.T) {
+    spec := map[string]interface{}{"path": filepath.Join(t.TempDir(), "missing.txt")}
+    if _, err := UnmarshalAsset(spec); err == nil {
+        t.Fatal("expected an error hashing a missing file")
+    }
+}
@@ -1,8 +1,16 @@
 package pylumi
 
 import (
+    "crypto/sha256"
+    "encoding/hex"
     "fmt"
     "io"
+    "io/ioutil"
+    "os"
+    "path/filepath"
+    "runtime"
+    "strings"
+    "sync"
 
     "github.com/blang/semver"
 
@@ -21,6 +29,7 @@ type Context struct {
     Sink diag.Sink
     StatusSink diag.Sink
     providers map[tokens.Package]*plugin.Provider
+    providersLock sync.Mutex
 }
 
 func NewContextFromPath(cwd string, sink, statusSink diag.Sink) (*Context, error) {
@@ -45,60 +54,266 @@ func (c *Context) Close() {
     c.PluginCtx.Close()
 }
 
+// PluginSpec identifies a single plugin to install
+type PluginSpec struct {
+    Kind string
+    Name string
+    Version string
+}
+
+// PluginInstallOptions controls how plugins are resolved and installed
+type PluginInstallOptions struct {
+    Reinstall bool
+    Exact bool
+    // Directory (or file:// URL) containing plugin tarballs named the same way as
+    // the ones published by pulumi e.g. pulumi-resource-aws-v4.33.0-linux-amd64.tar.gz
+    MirrorDir string
+    // Content-addressed tarball cache; tarballs are stored by their sha256 digest
+    CacheDir string
+    Concurrency int
+    Progress bool
+}
+
+// PluginInstallResult describes the outcome of installing a single plugin
+type PluginInstallResult struct {
+    Kind string
+    Name string
+    Version string
+    Skipped bool
+    Source string
+    Error string
+}
+
 func (c *Context) InstallPlugin(kind string, name string, version string, reinstall bool, exact bool, sink diag.Sink) error {
-    versionInfo, err := semver.ParseTolerant(version)
+    opts := PluginInstallOptions{Reinstall: reinstall, Exact: exact, Progress: true}
+    _, _, err := c.installPlugin(PluginSpec{Kind: kind, Name: name, Version: version}, opts, sink)
+    return err
+}
+
+// InstallPlugins installs all of the given plugins, using up to opts.Concurrency
+// goroutines. A result is returned for every spec in the same order as `specs`.
+func (c *Context) InstallPlugins(specs []PluginSpec, opts PluginInstallOptions, sink diag.Sink) []PluginInstallResult {
+    concurrency := opts.Concurrency
+    if concurrency < 1 {
+        concurrency = 1
+    }
+
+    results := make([]PluginInstallResult, len(specs))
+    sem := make(chan struct{}, concurrency)
+    var wg sync.WaitGroup
+
+    for i, spec := range specs {
+        wg.Add(1)
+        sem <- struct{}{}
+        go func(i int, spec PluginSpec) {
+            defer wg.Done()
+            defer func() { <-sem }()
+
+            result := PluginInstallResult{Kind: spec.Kind, Name: spec.Name, Version: spec.Version}
+            skipped, source, err := c.installPlugin(spec, opts, sink)
+            result.Skipped = skipped
+            result.Source = source
+            if err != nil {
+                result.Error = err.Error()
+            }
+            results[i] = result
+        }(i, spec)
+    }
+
+    wg.Wait()
+    return results
+}
+
+func (c *Context) installPlugin(spec PluginSpec, opts PluginInstallOptions, sink diag.Sink) (bool, string, error) {
+    versionInfo, err := semver.ParseTolerant(spec.Version)
     if err != nil {
-        return fmt.Errorf("error parsing plugin version: %v", err)
+        return false, "", fmt.Errorf("error parsing plugin version: %v", err)
     }
 
     plug := workspace.PluginInfo{
-        Name: name,
+        Name: spec.Name,
         Version: &versionInfo,
-        Kind: workspace.PluginKind(kind),
+        Kind: workspace.PluginKind(spec.Kind),
     }
 
     label := fmt.Sprintf("[%s plugin %s]", plug.Kind, plug)
 
     sink.Infoerrf(diag.Message("", "%s installing"), label)
 
-    if !reinstall {
-        if exact {
-            if workspace.HasPlugin(plug) {
+    if !opts.Reinstall {
+        if opts.Exact {
+            if pluginIndex.HasPlugin(plug) {
                 sink.Infoerrf(diag.Message("", "%s skipping install (existing == match)"), label)
-                return nil
+                return true, "", nil
             }
         } else {
-            if has, _ := workspace.HasPluginGTE(plug); has {
+            if pluginIndex.HasPluginGTE(plug) {
                 sink.Infoerrf(diag.Message("", "%s skipping install (existing >= match)"), label)
-                return nil
+                return true, "", nil
             }
         }
     }
 
-    var tarball io.ReadCloser
-    var size int64
+    tarball, size, source, err := openPluginTarball(plug, opts)
+    if err != nil {
+        return false, "", fmt.Errorf("error downloading %v: %v", label, err)
+    }
 
-    if tarball, size, err = plug.Download(); err != nil {
-        return fmt.Errorf("error downloading %v: %v", label, err)
+    if opts.CacheDir != "" && source != "cache" {
+        cached, err := cachePluginTarball(opts.CacheDir, pluginTarballName(plug), tarball)
+        if err != nil {
+            return false, "", fmt.Errorf("error caching %v: %v", label, err)
+        }
+        if tarball, size, err = openFile(cached); err != nil {
+            return false, "", fmt.Errorf("error opening cached %v: %v", label, err)
+        }
     }
 
-    colors := cmdutil.GetGlobalColorization()
-    tarball = workspace.ReadCloserProgressBar(tarball, size, "Downloading plugin", colors)
+    if opts.Progress && cmdutil.Interactive() {
+        colors := cmdutil.GetGlobalColorization()
+        tarball = workspace.ReadCloserProgressBar(tarball, size, "Downloading plugin", colors)
+    }
 
-    if err = plug.Install(tarball); err != nil {
-        return fmt.Errorf("error installing %v: %v", label, err)
+    err = plug.Install(tarball)
+    pluginIndex.Invalidate()
+    if err != nil {
+        return false, "", fmt.Errorf("error installing %v: %v", label, err)
     }
 
-    return nil
+    return false, source, nil
+}
+
+// pluginTarballName returns the file name pulumi publishes the plugin tarball under
+func pluginTarballName(plug workspace.PluginInfo) string {
+    return fmt.Sprintf(
+        "pulumi-%s-%s-v%s-%s-%s.tar.gz",
+        plug.Kind, plug.Name, plug.Version.String(), runtime.GOOS, runtime.GOARCH,
+    )
+}
+
+// openPluginTarball looks for the plugin tarball in the cache, then the mirror, and
+// only then falls back to downloading it.
+func openPluginTarball(plug workspace.PluginInfo, opts PluginInstallOptions) (io.ReadCloser, int64, string, error) {
+    name := pluginTarballName(plug)
+
+    if opts.CacheDir != "" {
+        if path, ok := lookupCachedPluginTarball(opts.CacheDir, name); ok {
+            tarball, size, err := openFile(path)
+            if err == nil {
+                return tarball, size, "cache", nil
+            }
+        }
+    }
+
+    if opts.MirrorDir != "" {
+        mirror := strings.TrimPrefix(opts.MirrorDir, "file://")
+        tarball, size, err := openFile(filepath.Join(mirror, name))
+        if err != nil {
+            return nil, 0, "", fmt.Errorf("error reading from mirror: %v", err)
+        }
+        return tarball, size, "mirror", nil
+    }
+
+    tarball, size, err := plug.Download()
+    if err != nil {
+        return nil, 0, "", err
+    }
+    return tarball, size, "download", nil
+}
+
+func openFile(path string) (io.ReadCloser, int64, error) {
+    file, err := os.Open(path)
+    if err != nil {
+        return nil, 0, err
+    }
+    info, err := file.Stat()
+    if err != nil {
+        file.Close()
+        return nil, 0, err
+    }
+    return file, info.Size(), nil
+}
+
+// The cache is laid out as <cache>/sha256/<digest>.tar.gz, with <cache>/index/<tarball name>
+// holding the digest of the tarball published under that name.
+func lookupCachedPluginTarball(cacheDir string, name string) (string, bool) {
+    digest, err := ioutil.ReadFile(filepath.Join(cacheDir, "index", name))
+    if err != nil {
+        return "", false
+    }
+    path := filepath.Join(cacheDir, "sha256", strings.TrimSpace(string(digest))+".tar.gz")
+    if _, err := os.Stat(path); err != nil {
+        return "", false
+    }
+    return path, true
+}
+
+func cachePluginTarball(cacheDir string, name string, tarball io.ReadCloser) (string, error) {
+    defer tarball.Close()
+
+    blobDir := filepath.Join(cacheDir, "sha256")
+    indexDir := filepath.Join(cacheDir, "index")
+    for _, dir := range []string{blobDir, indexDir} {
+        if err := os.MkdirAll(dir, 0755); err != nil {
+            return "", err
+        }
+    }
+
+    tmp, err := ioutil.TempFile(blobDir, "download-")
+    if err != nil {
+        return "", err
+    }
+    defer os.Remove(tmp.Name())
+
+    hash := sha256.New()
+    if _, err := io.Copy(io.MultiWriter(tmp, hash), tarball); err != nil {
+        tmp.Close()
+        return "", err
+    }
+    if err := tmp.Close(); err != nil {
+        return "", err
+    }
+
+    digest := hex.EncodeToString(hash.Sum(nil))
+    path := filepath.Join(blobDir, digest+".tar.gz")
+    if err := os.Rename(tmp.Name(), path); err != nil {
+        return "", err
+    }
+
+    indexTmp, err := ioutil.TempFile(indexDir, "index-")
+    if err != nil {
+        return "", err
+    }
+    defer os.Remove(indexTmp.Name())
+    if _, err := indexTmp.WriteString(digest); err != nil {
+        indexTmp.Close()
+        return "", err
+    }
+    if err := indexTmp.Close(); err != nil {
+        return "", err
+    }
+    if err := os.Rename(indexTmp.Name(), filepath.Join(indexDir, name)); err != nil {
+        return "", err
+    }
+
+    return path, nil
 }
 
 func (c *Context) Provider(name tokens.Package, version *semver.Version) (*plugin.Provider, error) {
+    c.providersLock.Lock()
+    defer c.providersLock.Unlock()
+
     if c.providers == nil {
         c.providers = make(map[tokens.Package]*plugin.Provider)
     }
 
     provider, ok := c.providers[name]
     if !ok {
+        if version == nil {
+            // Resolve the version from the plugin index so the host doesn't have
+            // to pick between installed versions itself.
+            version = pluginIndex.Latest(workspace.ResourcePlugin, string(name))
+        }
         providerValue, err := c.PluginCtx.Host.Provider(name, version)
         if err != nil {
             return nil, fmt.Errorf("error getting provider: %v", err)
@@ -110,26 +325,26 @@ func (c *Context) Provider(name tokens.Package, version *semver.Version) (*plugi
 }
 
 func (c *Context) CloseProvider(name tokens.Package) error {
+    c.providersLock.Lock()
     provider, ok := c.providers[name]
+    if ok {
+        delete(c.providers, name)
+    }
+    c.providersLock.Unlock()
+
     if !ok {
         return nil
     }
     if err := c.PluginCtx.Host.CloseProvider(*provider); err != nil {
         return fmt.Errorf("error closing provider: %v", err)
     }
-    delete(c.providers, name)
-    return nil
-}
-
-func (c *Context) CloseProviders() error {
-    for key, _ := range c.providers {
-        if err := c.CloseProvider(key); err != nil {
-            return err
-        }
-    }
     return nil
 }
 
 func (c *Context) ListPlugins() []workspace.PluginInfo {
     return c.PluginCtx.Host.ListPlugins()
 }
+
+func (c *Context) ListInstalledPlugins() ([]workspace.PluginInfo, error) {
+    return pluginIndex.Plugins()
+}
@@ -0,0 +1,148 @@
+package pylumi
+
+import (
+    "fmt"
+    "runtime"
+    "sync"
+    "time"
+
+    "github.com/pulumi/pulumi/sdk/v3/go/common/diag"
+)
+
+// DropPolicy determines which events are discarded when a BufferedSink is full
+type DropPolicy string
+
+const (
+    DropOldest DropPolicy = "oldest"
+    DropNewest DropPolicy = "newest"
+)
+
+// DiagnosticEvent is a single structured diagnostic message
+type DiagnosticEvent struct {
+    Severity diag.Severity
+    URN string
+    Message string
+    Timestamp float64
+}
+
+// BufferedSink is a diag.Sink that stores events in a bounded ring buffer
+// instead of writing them out, so that emitting a diagnostic never blocks on IO.
+// Events are removed from the buffer with Drain().
+type BufferedSink struct {
+    mu sync.Mutex
+    events []DiagnosticEvent
+    start int
+    count int
+    policy DropPolicy
+    debug bool
+    dropped uint64
+}
+
+func NewBufferedSink(capacity int, policy DropPolicy, debug bool) (*BufferedSink, error) {
+    if capacity < 1 {
+        return nil, fmt.Errorf("buffer capacity must be positive, got %d", capacity)
+    }
+    if policy != DropOldest && policy != DropNewest {
+        return nil, fmt.Errorf("invalid drop policy: %q", policy)
+    }
+    return &BufferedSink{
+        events: make([]DiagnosticEvent, capacity),
+        policy: policy,
+        debug: debug,
+    }, nil
+}
+
+func (s *BufferedSink) push(event DiagnosticEvent) {
+    s.mu.Lock()
+    defer s.mu.Unlock()
+
+    capacity := len(s.events)
+    if s.count == capacity {
+        s.dropped++
+        if s.policy == DropNewest {
+            return
+        }
+        s.start = (s.start + 1) % capacity
+        s.count--
+    }
+    s.events[(s.start+s.count)%capacity] = event
+    s.count++
+}
+
+// Drain removes and returns up to max events from the buffer (all of them if
+// max < 1), along with the total number of events dropped so far.
+func (s *BufferedSink) Drain(max int) ([]DiagnosticEvent, uint64) {
+    s.mu.Lock()
+    defer s.mu.Unlock()
+
+    n := s.count
+    if max > 0 && max < n {
+        n = max
+    }
+
+    capacity := len(s.events)
+    out := make([]DiagnosticEvent, n)
+    for i := 0; i < n; i++ {
+        idx := (s.start + i) % capacity
+        out[i] = s.events[idx]
+        s.events[idx] = DiagnosticEvent{}
+    }
+    s.start = (s.start + n) % capacity
+    s.count -= n
+
+    return out, s.dropped
+}
+
+func (s *BufferedSink) Logf(sev diag.Severity, d *diag.Diag, args ...interface{}) {
+    if sev == diag.Debug && !s.debug {
+        return
+    }
+    _, message := s.Stringify(sev, d, args...)
+    s.push(DiagnosticEvent{
+        Severity: sev,
+        URN: string(d.URN),
+        Message: message,
+        Timestamp: float64(time.Now().UnixNano()) / 1e9,
+    })
+}
+
+func (s *BufferedSink) Debugf(d *diag.Diag, args ...interface{}) {
+    s.Logf(diag.Debug, d, args...)
+}
+
+func (s *BufferedSink) Infof(d *diag.Diag, args ...interface{}) {
+    s.Logf(diag.Info, d, args...)
+}
+
+func (s *BufferedSink) Infoerrf(d *diag.Diag, args ...interface{}) {
+    s.Logf(diag.Infoerr, d, args...)
+}
+
+func (s *BufferedSink) Errorf(d *diag.Diag, args ...interface{}) {
+    s.Logf(diag.Error, d, args...)
+}
+
+func (s *BufferedSink) Warningf(d *diag.Diag, args ...interface{}) {
+    s.Logf(diag.Warning, d, args...)
+}
+
+func (s *BufferedSink) Stringify(sev diag.Severity, d *diag.Diag, args ...interface{}) (string, string) {
+    if d.Raw {
+        return string(sev), d.Message
+    }
+    return string(sev), fmt.Sprintf(d.Message, args...)
+}
+
+
+// GoroutineStacks returns the stack traces of all goroutines, in the format of
+// an unrecovered panic
+func GoroutineStacks() string {
+    buf := make([]byte, 1<<16)
+    for {
+        n := runtime.Stack(buf, true)
+        if n < len(buf) {
+            return string(buf[:n])
+        }
+        buf = make([]byte, 2*len(buf))
+    }
+}
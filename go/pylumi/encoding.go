@@ -83,9 +83,32 @@ func JSONToPropertyMap(data []byte) (resource.PropertyMap, error) {
         return nil, fmt.Errorf("error unmarshalling data: %v", err)
     }
 
+    var replErr error
     replv := func(value interface{}) (resource.PropertyValue, bool) {
         switch i := value.(type) {
         case map[string]interface{}:
+            if len(i) == 1 {
+                if spec, ok := i[AssetKey].(map[string]interface{}); ok {
+                    asset, err := UnmarshalAsset(spec)
+                    if err != nil {
+                        if replErr == nil {
+                            replErr = err
+                        }
+                        return resource.NewNullProperty(), true
+                    }
+                    return resource.NewAssetProperty(asset), true
+                }
+                if spec, ok := i[ArchiveKey].(map[string]interface{}); ok {
+                    archive, err := UnmarshalArchive(spec)
+                    if err != nil {
+                        if replErr == nil {
+                            replErr = err
+                        }
+                        return resource.NewNullProperty(), true
+                    }
+                    return resource.NewArchiveProperty(archive), true
+                }
+            }
             one := false
             for key, _ := range i {
                 one = true
@@ -102,11 +125,17 @@ func JSONToPropertyMap(data []byte) (resource.PropertyMap, error) {
         return resource.NewNullProperty(), false
     }
 
-    return resource.NewPropertyMapFromMapRepl(raw, nil, replv), nil
+    props := resource.NewPropertyMapFromMapRepl(raw, nil, replv)
+    if replErr != nil {
+        return nil, replErr
+    }
+    return props, nil
 }
 
 
-func PropertyMapToJSON(data resource.PropertyMap) ([]byte, error) {
+// PropertyMapToObject converts a property map to plain values that encode to the
+// same JSON as PropertyMapToJSON
+func PropertyMapToObject(data resource.PropertyMap) map[string]interface{} {
 
     var mapper func(resource.PropertyValue) (interface{}, bool)
     mapper = func(value resource.PropertyValue) (interface{}, bool) {
@@ -127,12 +156,20 @@ func PropertyMapToJSON(data resource.PropertyMap) ([]byte, error) {
             out := make(map[string]interface{})
             out[UnknownKey] = marshalUnknownProperty(v.Element)
             return out, true
+        case *resource.Asset:
+            return MarshalAsset(v), true
+        case *resource.Archive:
+            return MarshalArchive(v), true
         }
         return value.V, true
     }
 
-    simpleMap := data.MapRepl(nil, mapper)
-    out, err := json.Marshal(simpleMap)
+    return data.MapRepl(nil, mapper)
+}
+
+
+func PropertyMapToJSON(data resource.PropertyMap) ([]byte, error) {
+    out, err := json.Marshal(PropertyMapToObject(data))
     if err != nil {
         return nil, fmt.Errorf("error marshalling property map: %v", err)
     }
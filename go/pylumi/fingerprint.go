@@ -0,0 +1,138 @@
+package pylumi
+
+import (
+    "crypto/sha256"
+    "encoding/binary"
+    "encoding/hex"
+    "hash"
+    "math"
+    "runtime"
+    "sort"
+    "sync"
+)
+
+// Number of bytes of each SHA-256 digest kept in fingerprints
+const fingerprintSize = 16
+
+// PropertiesFingerprint is a Merkle hash of a property map: Root covers the whole
+// map, and Paths has the hash of each top-level property. Two maps have the same
+// root if and only if (barring collisions) they are equal, regardless of key order.
+// Unknown values hash by their kind, so e.g. two unknown strings are equal.
+type PropertiesFingerprint struct {
+    Root string
+    Paths map[string]string
+}
+
+func writeLength(h hash.Hash, n int) {
+    var buf [binary.MaxVarintLen64]byte
+    h.Write(buf[:binary.PutUvarint(buf[:], uint64(n))])
+}
+
+func writeString(h hash.Hash, s string) {
+    writeLength(h, len(s))
+    h.Write([]byte(s))
+}
+
+// hashValue computes the Merkle hash of a JSON-decoded property value. Each value
+// is prefixed with a type tag, so e.g. "1" and 1 hash differently, and containers
+// hash the hashes of their elements.
+func hashValue(value interface{}) []byte {
+    h := sha256.New()
+    switch v := value.(type) {
+    case nil:
+        h.Write([]byte{'n'})
+    case bool:
+        if v {
+            h.Write([]byte{'t'})
+        } else {
+            h.Write([]byte{'f'})
+        }
+    case float64:
+        if v == 0 {
+            // Treat -0 and 0 as equal
+            v = 0
+        }
+        var buf [8]byte
+        binary.BigEndian.PutUint64(buf[:], math.Float64bits(v))
+        h.Write([]byte{'d'})
+        h.Write(buf[:])
+    case string:
+        h.Write([]byte{'s'})
+        writeString(h, v)
+    case []interface{}:
+        h.Write([]byte{'a'})
+        writeLength(h, len(v))
+        for _, item := range v {
+            h.Write(hashValue(item))
+        }
+    case map[string]interface{}:
+        if kind, ok := v[UnknownKey].(string); ok && len(v) == 1 {
+            h.Write([]byte{'u'})
+            writeString(h, kind)
+            break
+        }
+        h.Write([]byte{'o'})
+        writeObject(h, v)
+    default:
+        panic("unexpected type in property value")
+    }
+    return h.Sum(nil)[:fingerprintSize]
+}
+
+func sortedKeys(props map[string]interface{}) []string {
+    keys := make([]string, 0, len(props))
+    for key := range props {
+        keys = append(keys, key)
+    }
+    sort.Strings(keys)
+    return keys
+}
+
+func writeObject(h hash.Hash, props map[string]interface{}) {
+    writeLength(h, len(props))
+    for _, key := range sortedKeys(props) {
+        writeString(h, key)
+        h.Write(hashValue(props[key]))
+    }
+}
+
+// FingerprintProperties computes the fingerprint of a single property map
+func FingerprintProperties(props map[string]interface{}) PropertiesFingerprint {
+    paths := make(map[string]string, len(props))
+    h := sha256.New()
+    h.Write([]byte{'o'})
+    writeLength(h, len(props))
+    for _, key := range sortedKeys(props) {
+        digest := hashValue(props[key])
+        paths[key] = hex.EncodeToString(digest)
+        writeString(h, key)
+        h.Write(digest)
+    }
+    return PropertiesFingerprint{
+        Root: hex.EncodeToString(h.Sum(nil)[:fingerprintSize]),
+        Paths: paths,
+    }
+}
+
+// FingerprintAll computes the fingerprints of many property maps, spread across
+// one goroutine per CPU.
+func FingerprintAll(values []map[string]interface{}) []PropertiesFingerprint {
+    results := make([]PropertiesFingerprint, len(values))
+    workers := runtime.NumCPU()
+    if workers > len(values) {
+        workers = len(values)
+    }
+
+    var wg sync.WaitGroup
+    for w := 0; w < workers; w++ {
+        wg.Add(1)
+        go func(w int) {
+            defer wg.Done()
+            for i := w; i < len(values); i += workers {
+                results[i] = FingerprintProperties(values[i])
+            }
+        }(w)
+    }
+    wg.Wait()
+    return results
+}
@@ -0,0 +1,116 @@
+package pylumi
+
+import (
+    "fmt"
+    "os"
+    "sync"
+    "time"
+
+    "github.com/blang/semver"
+
+    "github.com/pulumi/pulumi/sdk/v3/go/common/workspace"
+)
+
+// PluginIndex is an in-process cache of the plugins installed in the workspace
+// plugin directory. It is rebuilt only when the modification time of the plugin
+// directory changes, which happens whenever a plugin is installed or removed.
+type PluginIndex struct {
+    mu sync.Mutex
+    loaded bool
+    modTime time.Time
+    plugins []workspace.PluginInfo
+}
+
+var pluginIndex PluginIndex
+
+// Plugins returns all of the installed plugins, refreshing the index first if
+// the plugin directory has changed.
+func (idx *PluginIndex) Plugins() ([]workspace.PluginInfo, error) {
+    idx.mu.Lock()
+    defer idx.mu.Unlock()
+
+    if err := idx.refresh(); err != nil {
+        return nil, err
+    }
+    return idx.plugins, nil
+}
+
+func (idx *PluginIndex) refresh() error {
+    dir, err := workspace.GetPluginDir()
+    if err != nil {
+        return fmt.Errorf("error getting plugin directory: %v", err)
+    }
+
+    var modTime time.Time
+    info, err := os.Stat(dir)
+    if err == nil {
+        modTime = info.ModTime()
+    } else if !os.IsNotExist(err) {
+        return fmt.Errorf("error reading plugin directory: %v", err)
+    }
+
+    if idx.loaded && modTime.Equal(idx.modTime) {
+        return nil
+    }
+
+    plugins, err := workspace.GetPlugins()
+    if err != nil {
+        return fmt.Errorf("error listing plugins: %v", err)
+    }
+
+    idx.plugins = plugins
+    idx.modTime = modTime
+    idx.loaded = true
+    return nil
+}
+
+// Invalidate forces the index to be rebuilt on next use. Some filesystems only
+// have coarse modification times, so this is called explicitly after installs.
+func (idx *PluginIndex) Invalidate() {
+    idx.mu.Lock()
+    defer idx.mu.Unlock()
+    idx.loaded = false
+}
+
+// HasPlugin is equivalent to workspace.HasPlugin, but answered from the index.
+func (idx *PluginIndex) HasPlugin(plug workspace.PluginInfo) bool {
+    plugins, err := idx.Plugins()
+    if err != nil {
+        return workspace.HasPlugin(plug)
+    }
+    for _, installed := range plugins {
+        if installed.Kind == plug.Kind && installed.Name == plug.Name &&
+            installed.Version != nil && plug.Version != nil && installed.Version.EQ(*plug.Version) {
+            return true
+        }
+    }
+    return false
+}
+
+// HasPluginGTE is equivalent to workspace.HasPluginGTE, but answered from the index.
+func (idx *PluginIndex) HasPluginGTE(plug workspace.PluginInfo) bool {
+    if plug.Version == nil {
+        return idx.HasPlugin(plug)
+    }
+    latest := idx.Latest(plug.Kind, plug.Name)
+    return latest != nil && latest.GTE(*plug.Version)
+}
+
+// Latest returns the newest installed version of the given plugin, or nil if
+// there is no such plugin installed.
+func (idx *PluginIndex) Latest(kind workspace.PluginKind, name string) *semver.Version {
+    plugins, err := idx.Plugins()
+    if err != nil {
+        return nil
+    }
+    var latest *semver.Version
+    for _, installed := range plugins {
+        if installed.Kind != kind || installed.Name != name || installed.Version == nil {
+            continue
+        }
+        if latest == nil || installed.Version.GT(*latest) {
+            latest = installed.Version
+        }
+    }
+    return latest
+}
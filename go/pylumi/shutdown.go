@@ -0,0 +1,154 @@
+package pylumi
+
+import (
+    "os"
+    "sync"
+    "time"
+
+    "github.com/pulumi/pulumi/sdk/v3/go/common/resource/plugin"
+    "github.com/pulumi/pulumi/sdk/v3/go/common/tokens"
+)
+
+// How long to wait for CloseProvider to return after killing a plugin process
+const killWait = 2 * time.Second
+
+const (
+    ShutdownClosed = "closed"
+    ShutdownError = "error"
+    ShutdownKilled = "killed"
+    ShutdownAbandoned = "abandoned"
+)
+
+// The name of the shutdown report added for the plugin host if closing it is
+// abandoned
+const HostShutdownName = "<plugin host>"
+
+// ProviderShutdownReport describes how a single provider was shut down. Outcome is
+// one of "closed" (it exited within the grace period), "error" (closing it failed
+// within the grace period), "killed" (its plugin process was killed after the grace
+// period) or "abandoned" (it couldn't be killed, or didn't exit after being killed).
+type ProviderShutdownReport struct {
+    Name string
+    Pid int
+    Outcome string
+    Duration float64
+    Error string
+}
+
+// closeProvider closes a single provider, killing its plugin process if it hasn't
+// exited after gracePeriod. A negative gracePeriod waits indefinitely.
+func (c *Context) closeProvider(name tokens.Package, provider *plugin.Provider, gracePeriod time.Duration) (report ProviderShutdownReport) {
+    report = ProviderShutdownReport{Name: string(name), Pid: PluginPid(*provider)}
+    start := time.Now()
+    defer func() {
+        report.Duration = time.Since(start).Seconds()
+    }()
+
+    // The plugin host serializes CloseProvider calls through its plugin loading
+    // goroutine, so close the provider directly; the host's own bookkeeping is
+    // cleaned up when the context is closed.
+    done := make(chan error, 1)
+    go func() {
+        done <- (*provider).Close()
+    }()
+
+    var deadline <-chan time.Time
+    if gracePeriod >= 0 {
+        timer := time.NewTimer(gracePeriod)
+        defer timer.Stop()
+        deadline = timer.C
+    }
+
+    select {
+    case err := <-done:
+        report.Outcome = ShutdownClosed
+        if err != nil {
+            report.Outcome = ShutdownError
+            report.Error = err.Error()
+        }
+        return report
+    case <-deadline:
+    }
+
+    report.Outcome = ShutdownAbandoned
+    if report.Pid < 0 {
+        report.Error = "grace period expired and the plugin process ID is unknown"
+        return report
+    }
+    proc, err := os.FindProcess(report.Pid)
+    if err == nil {
+        err = proc.Kill()
+    }
+    if err != nil {
+        report.Error = "error killing plugin process: " + err.Error()
+        return report
+    }
+
+    select {
+    case <-done:
+        report.Outcome = ShutdownKilled
+    case <-time.After(killWait):
+        report.Error = "plugin process did not exit after being killed"
+    }
+    return report
+}
+
+// CloseProvidersWithin closes all of the context's providers concurrently, each
+// with its own grace period, and returns a report for each provider.
+func (c *Context) CloseProvidersWithin(gracePeriod time.Duration) []ProviderShutdownReport {
+    c.providersLock.Lock()
+    providers := c.providers
+    c.providers = nil
+    c.providersLock.Unlock()
+
+    reports := make([]ProviderShutdownReport, 0, len(providers))
+    results := make(chan ProviderShutdownReport, len(providers))
+    var wg sync.WaitGroup
+    for name, provider := range providers {
+        wg.Add(1)
+        go func(name tokens.Package, provider *plugin.Provider) {
+            defer wg.Done()
+            results <- c.closeProvider(name, provider, gracePeriod)
+        }(name, provider)
+    }
+    wg.Wait()
+    close(results)
+
+    for report := range results {
+        reports = append(reports, report)
+    }
+    return reports
+}
+
+// CloseWithin closes the context, waiting for it until gracePeriod after start
+// (and at least killWait). The plugin host closes every plugin it loaded again,
+// including any whose first Close is still hung after being abandoned, so the
+// host close runs in its own goroutine and is left behind if it doesn't return
+// in time. A negative gracePeriod waits indefinitely. Returns false if the host
+// close was left behind.
+func (c *Context) CloseWithin(gracePeriod time.Duration, start time.Time) bool {
+    if gracePeriod < 0 {
+        c.Close()
+        return true
+    }
+
+    done := make(chan struct{})
+    go func() {
+        defer close(done)
+        c.Close()
+    }()
+
+    wait := time.Until(start.Add(gracePeriod))
+    if wait < killWait {
+        wait = killWait
+    }
+    timer := time.NewTimer(wait)
+    defer timer.Stop()
+
+    select {
+    case <-done:
+        return true
+    case <-timer.C:
+        return false
+    }
+}
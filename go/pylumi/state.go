@@ -3,6 +3,7 @@ package pylumi
 import (
     "fmt"
     "sync"
+    "time"
 
     "github.com/blang/semver"
 
@@ -59,15 +60,30 @@ func Provider(ctxName string, name tokens.Package, version *semver.Version) (*pl
     return ctx.Provider(name, version)
 }
 
-func CloseContext(name string) error {
+// CloseContext closes all of the context's providers concurrently, killing any
+// plugin that hasn't exited after gracePeriod (a negative gracePeriod waits
+// indefinitely), then closes the context itself. Closing the context is bounded
+// by the same grace period, see CloseWithin; if it's left behind, a report named
+// HostShutdownName with the "abandoned" outcome is added.
+func CloseContext(name string, gracePeriod time.Duration) ([]ProviderShutdownReport, error) {
     ctx, err := GetContext(name)
     if err != nil {
-        return fmt.Errorf("error getting context: %v", err)
+        return nil, fmt.Errorf("error getting context: %v", err)
     }
-    if err := ctx.CloseProviders(); err != nil {
-        return fmt.Errorf("error closing providers: %v", err)
+    start := time.Now()
+    reports := ctx.CloseProvidersWithin(gracePeriod)
+    hostStart := time.Now()
+    if !ctx.CloseWithin(gracePeriod, start) {
+        reports = append(reports, ProviderShutdownReport{
+            Name: HostShutdownName,
+            Pid: -1,
+            Outcome: ShutdownAbandoned,
+            Duration: time.Since(hostStart).Seconds(),
+            Error: "the plugin host did not close within the grace period",
+        })
     }
-    ctx.Close()
+    contextCreationLock.Lock()
     delete(contexts, name)
-    return nil
+    contextCreationLock.Unlock()
+    return reports, nil
 }
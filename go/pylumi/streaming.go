@@ -0,0 +1,111 @@
+package pylumi
+
+import (
+    "bufio"
+    "bytes"
+    "encoding/json"
+    "fmt"
+    "io/ioutil"
+    "os"
+    "strings"
+)
+
+// PopArray removes the array at a dot-separated path of object keys from obj and
+// returns it. A missing or null value is treated as an empty array.
+func PopArray(obj map[string]interface{}, path string) ([]interface{}, error) {
+    keys := strings.Split(path, ".")
+    parent := obj
+    for idx, key := range keys[:len(keys)-1] {
+        child, ok := parent[key].(map[string]interface{})
+        if !ok {
+            if parent[key] == nil {
+                return nil, nil
+            }
+            return nil, fmt.Errorf("%s is not an object", strings.Join(keys[:idx+1], "."))
+        }
+        parent = child
+    }
+
+    last := keys[len(keys)-1]
+    value, ok := parent[last]
+    if !ok || value == nil {
+        return nil, nil
+    }
+    items, ok := value.([]interface{})
+    if !ok {
+        return nil, fmt.Errorf("%s is not an array", path)
+    }
+    delete(parent, last)
+    return items, nil
+}
+
+// StreamedElements is a set of array elements encoded as newline-delimited JSON,
+// either held in memory or spilled to a file.
+type StreamedElements struct {
+    Inline []byte
+    SpillPath string
+    Count int
+}
+
+// EncodeElements encodes each item as one line of JSON. Once the encoded size
+// exceeds spillThreshold bytes the output moves to a temporary file in spillDir
+// (the system default if empty); a negative threshold keeps everything in memory.
+// Each element is released once encoded, so the encoded and decoded forms of
+// the whole array don't have to be held at once.
+func EncodeElements(items []interface{}, spillThreshold int, spillDir string) (out StreamedElements, err error) {
+    var buf bytes.Buffer
+    var file *os.File
+    var writer *bufio.Writer
+
+    defer func() {
+        if file == nil {
+            return
+        }
+        if closeErr := file.Close(); err == nil {
+            err = closeErr
+        }
+        if err != nil {
+            os.Remove(file.Name())
+            out = StreamedElements{}
+        }
+    }()
+
+    for idx := range items {
+        line, err := json.Marshal(items[idx])
+        if err != nil {
+            return out, fmt.Errorf("error marshalling element %d: %v", idx, err)
+        }
+        items[idx] = nil
+
+        if file == nil && spillThreshold >= 0 && buf.Len()+len(line)+1 > spillThreshold {
+            file, err = ioutil.TempFile(spillDir, "pylumi-invoke-*.ndjson")
+            if err != nil {
+                return out, fmt.Errorf("error creating spill file: %v", err)
+            }
+            writer = bufio.NewWriter(file)
+            if _, err := buf.WriteTo(writer); err != nil {
+                return out, fmt.Errorf("error writing spill file: %v", err)
+            }
+        }
+
+        if writer != nil {
+            _, err = writer.Write(append(line, '\n'))
+        } else {
+            _, err = buf.Write(append(line, '\n'))
+        }
+        if err != nil {
+            return out, fmt.Errorf("error writing element %d: %v", idx, err)
+        }
+        out.Count++
+    }
+
+    if writer != nil {
+        if err := writer.Flush(); err != nil {
+            return out, fmt.Errorf("error writing spill file: %v", err)
+        }
+        out.SpillPath = file.Name()
+        return out, nil
+    }
+    out.Inline = buf.Bytes()
+    return out, nil
+}
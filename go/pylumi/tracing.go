@@ -0,0 +1,157 @@
+package pylumi
+
+import (
+    "fmt"
+    "reflect"
+    "sync"
+
+    "github.com/opentracing/basictracer-go"
+    "github.com/opentracing/opentracing-go"
+
+    "github.com/pulumi/pulumi/sdk/v3/go/common/resource/plugin"
+)
+
+// SpanRecord is a finished OpenTracing span recorded by the Go host. The
+// gRPC client interceptors pulumi installs for plugin connections create one
+// of these for every request made to a plugin.
+type SpanRecord struct {
+    TraceID string
+    SpanID string
+    ParentSpanID string
+    Operation string
+    Start float64
+    Duration float64
+    Tags map[string]string
+}
+
+// spanBuffer is a basictracer.SpanRecorder keeping the most recent spans in memory.
+// Payload logs are discarded, only timings and tags are kept.
+type spanBuffer struct {
+    mu sync.Mutex
+    spans []SpanRecord
+    capacity int
+}
+
+func (b *spanBuffer) RecordSpan(span basictracer.RawSpan) {
+    tags := make(map[string]string, len(span.Tags))
+    for key, value := range span.Tags {
+        tags[key] = fmt.Sprint(value)
+    }
+    // gRPC client spans are finished by the goroutine making the request, which
+    // runs on the thread of the call that made it.
+    if ThreadID != nil {
+        if callID, ok := calls.Load(ThreadID()); ok {
+            tags[CallIDTag] = callID.(string)
+        }
+    }
+    var parent string
+    if span.ParentSpanID != 0 {
+        parent = fmt.Sprintf("%016x", span.ParentSpanID)
+    }
+    record := SpanRecord{
+        TraceID: fmt.Sprintf("%016x", span.Context.TraceID),
+        SpanID: fmt.Sprintf("%016x", span.Context.SpanID),
+        ParentSpanID: parent,
+        Operation: span.Operation,
+        Start: float64(span.Start.UnixNano()) / 1e9,
+        Duration: span.Duration.Seconds(),
+        Tags: tags,
+    }
+
+    b.mu.Lock()
+    defer b.mu.Unlock()
+    if len(b.spans) >= b.capacity {
+        b.spans = b.spans[1:]
+    }
+    b.spans = append(b.spans, record)
+}
+
+func (b *spanBuffer) drain() []SpanRecord {
+    b.mu.Lock()
+    defer b.mu.Unlock()
+    out := b.spans
+    b.spans = make([]SpanRecord, 0)
+    return out
+}
+
+// CallIDTag is the tag holding the ID passed to BeginCall on spans recorded
+// during a call.
+const CallIDTag = "pylumi.call_id"
+
+var (
+    spans *spanBuffer
+    tracingLock sync.Mutex
+
+    // ThreadID returns an identifier of the OS thread the calling goroutine is
+    // running on. It's set by the cgo entry points.
+    ThreadID func() uint64
+    // The call ID set by BeginCall for each thread
+    calls sync.Map
+)
+
+// EnableTracing installs a global OpenTracing tracer that records spans in memory.
+// Pulumi's plugin connections pick up the global tracer when they are dialed, so
+// this only affects providers started afterwards. Calling it again is a no-op.
+func EnableTracing(capacity int) {
+    tracingLock.Lock()
+    defer tracingLock.Unlock()
+    if spans != nil {
+        return
+    }
+    spans = &spanBuffer{capacity: capacity}
+    opentracing.SetGlobalTracer(basictracer.New(spans))
+}
+
+// DrainSpans removes and returns all of the spans recorded so far.
+func DrainSpans() []SpanRecord {
+    tracingLock.Lock()
+    buffer := spans
+    tracingLock.Unlock()
+    if buffer == nil {
+        return []SpanRecord{}
+    }
+    return buffer.drain()
+}
+
+// BeginCall tags the spans recorded on the calling thread with callID until
+// EndCall is called on the same thread. Each exported function runs locked to
+// the thread that called it, so this attributes the gRPC requests made by the
+// next call from that thread to callID.
+func BeginCall(callID string) {
+    if ThreadID != nil {
+        calls.Store(ThreadID(), callID)
+    }
+}
+
+// EndCall stops tagging the spans recorded on the calling thread.
+func EndCall() {
+    if ThreadID != nil {
+        calls.Delete(ThreadID())
+    }
+}
+
+// PluginPid returns the process ID of the plugin backing a provider, or -1 if
+// it can't be determined. The process isn't exposed by the plugin.Provider
+// interface, so this relies on the layout of pulumi's provider implementation.
+func PluginPid(provider plugin.Provider) int {
+    value := reflect.ValueOf(provider)
+    for _, field := range []string{"plug", "Proc", "Pid"} {
+        for value.Kind() == reflect.Ptr || value.Kind() == reflect.Interface {
+            if value.IsNil() {
+                return -1
+            }
+            value = value.Elem()
+        }
+        if value.Kind() != reflect.Struct {
+            return -1
+        }
+        value = value.FieldByName(field)
+        if !value.IsValid() {
+            return -1
+        }
+    }
+    if value.Kind() != reflect.Int {
+        return -1
+    }
+    return int(value.Int())
+}
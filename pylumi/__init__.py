@@ -1,8 +1,10 @@
-from pylumi import exc
-from pylumi.async_context import AsyncContext
-from pylumi.async_provider import AsyncProvider
+import importlib
+
+from pylumi import exc, tracing
+from pylumi.assets import Archive, Asset
 from pylumi.context import Context
-from pylumi.ext import (
+from pylumi.diagnostics import Diagnostic, DropPolicy
+from pylumi.constants import (
     UNKNOWN_KEY,
     UNKNOWN_BOOL_VALUE,
     UNKNOWN_NUMBER_VALUE,
@@ -19,11 +21,39 @@ from pylumi.ext import (
     DIFF_UPDATE,
     DIFF_UPDATE_REPLACE,
     UnknownValue,
+    DiffChanges,
     DiffKind,
 )
 from pylumi.provider import Provider
-from pylumi.urn import URN
+from pylumi.results import (
+    CreateResult,
+    DetailedDiff,
+    DiffResult,
+    ReadResult,
+    UpdateResult,
+)
+from pylumi.urn import URN, URNIndex
 
 __version__ = "1.3.0"
 
 __pulumi_version__ = "2.12.0"
+
+# Attributes imported on first access, so that `import pylumi` doesn't import
+# asyncio or multiprocessing
+_LAZY_ATTRIBUTES = {
+    "AsyncContext": "pylumi.async_context",
+    "AsyncProvider": "pylumi.async_provider",
+    "prefork": "pylumi.forking",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
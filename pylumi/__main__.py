@@ -0,0 +1,5 @@
+import sys
+
+from pylumi.runner import main
+
+sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+Admission control of provider calls by payload size. A ByteBudget limits the
+total encoded size of the requests and results of calls in flight, so peak
+memory stays predictable however many calls are made at once:
+
+.. code-block:: python
+
+   budget = pylumi.admission.ByteBudget(256 * 2**20)
+   with pylumi.Context(byte_budget=budget) as ctx:
+       aws = ctx.provider("aws", {"aws:region": "us-east-1"})
+       ...
+       print(budget.stats()["in_use"], budget.stats()["wait"]["p95"])
+
+A call is admitted once its request has been encoded, before it's passed to the
+Go runtime. While the budget is exhausted, calls wait and are admitted in the
+order they arrived. The encoded result of a call is added to its usage when it's
+decoded, and the call's usage is released when it returns. A request larger than
+the whole budget is admitted once nothing else is in flight. A call waiting to be
+admitted isn't in flight for the watchdog or the transport monitor yet, see
+`pylumi.hooks`.
+"""
+
+import collections
+import itertools
+import threading
+import time
+from typing import Any, Deque, Dict
+
+from pylumi.stats import DurationStats
+
+
+class Admission:
+    """
+    Admission of a single provider call into a ByteBudget, see `pylumi.hooks`
+    """
+
+    __slots__ = ("budget", "nbytes")
+
+    def __init__(self, budget: "ByteBudget") -> None:
+        self.budget = budget
+        self.nbytes = 0
+
+    def admit(self, nbytes: int) -> bool:
+        """
+        Wait for the encoded request to be admitted.
+
+        **Returns:**
+
+        True if the call had to wait, otherwise False.
+        """
+        waited = self.budget.acquire(nbytes)
+        self.nbytes += nbytes
+        return waited
+
+    def charge(self, nbytes: int) -> None:
+        """
+        Add the encoded result to the call's usage
+        """
+        self.budget.charge(nbytes)
+        self.nbytes += nbytes
+
+    def release(self) -> None:
+        """
+        Release the bytes used by the call
+        """
+        self.budget.release(self.nbytes)
+        self.nbytes = 0
+
+
+class ByteBudget:
+    """
+    A limit on the total encoded size of provider requests and results in flight.
+    A budget can be shared by several contexts and threads.
+
+    **Parameters:**
+
+    * **limit** - The maximum number of bytes in flight.
+    * **history** - (optional) The number of recent admissions used to compute wait
+    time percentiles, default 1024.
+    """
+
+    def __init__(self, limit: int, history: int = 1024) -> None:
+        if limit <= 0:
+            raise ValueError(f"Invalid limit: {limit}.")
+        self.limit = limit
+        self.in_use = 0
+        self.peak = 0
+        self._cond = threading.Condition()
+        self._tickets = itertools.count()
+        self._queue: Deque[int] = collections.deque()
+        self._waits = DurationStats(history)
+
+    def _fits(self, nbytes: int) -> bool:
+        return self.in_use == 0 or self.in_use + nbytes <= self.limit
+
+    def _take(self, nbytes: int) -> None:
+        self.in_use += nbytes
+        self.peak = max(self.peak, self.in_use)
+
+    def acquire(self, nbytes: int) -> bool:
+        """
+        Wait until `nbytes` fit in the budget and take them. Callers are admitted in
+        the order they called this.
+
+        **Returns:**
+
+        True if the caller had to wait, otherwise False.
+        """
+        if nbytes <= 0:
+            return False
+        with self._cond:
+            if not self._queue and self._fits(nbytes):
+                self._take(nbytes)
+                self._waits.record(0.0)
+                return False
+
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            start = time.monotonic()
+            try:
+                while self._queue[0] != ticket or not self._fits(nbytes):
+                    self._cond.wait()
+            except BaseException:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+                raise
+            self._queue.popleft()
+            self._take(nbytes)
+            self._waits.record(time.monotonic() - start)
+            # The next caller in line may fit as well
+            self._cond.notify_all()
+            return True
+
+    def charge(self, nbytes: int) -> None:
+        """
+        Take `nbytes` without waiting, for data that's already in memory
+        """
+        with self._cond:
+            self._take(nbytes)
+
+    def release(self, nbytes: int) -> None:
+        """
+        Return `nbytes` to the budget
+        """
+        if nbytes <= 0:
+            return
+        with self._cond:
+            self.in_use -= nbytes
+            self._cond.notify_all()
+
+    def waiting(self) -> int:
+        """
+        Get the number of calls waiting to be admitted
+        """
+        with self._cond:
+            return len(self._queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the usage of this budget.
+
+        **Returns:**
+
+        A dictionary with the keys `limit`, `in_use` and `peak` (in bytes), `waiting`
+        (the number of calls waiting to be admitted), `admitted` (the number of
+        calls admitted) and `wait`, a dictionary of `mean`, `max`, `p50`, `p95` and
+        `p99` wait times in seconds. Percentiles are over recent admissions.
+        """
+        with self._cond:
+            return {
+                "limit": self.limit,
+                "in_use": self.in_use,
+                "peak": self.peak,
+                "waiting": len(self._queue),
+                "admitted": self._waits.count,
+                "wait": self._waits.summary(),
+            }
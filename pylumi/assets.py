@@ -0,0 +1,199 @@
+"""
+Assets and archives, e.g. the code of a Lambda function or the body of an S3
+object. They are passed to the Go runtime as references to their contents, so a
+file is read and hashed there, in a streaming way, and never loaded into Python:
+
+.. code-block:: python
+
+   code = pylumi.Archive.from_path("build/function.zip")
+   aws.create(urn, {"code": code, "role": role_arn, ...})
+
+   body = pylumi.Asset.from_buffer(response.raw)
+   aws.create(urn, {"bucket": "my-bucket", "source": body, ...})
+
+Assets and archives in provider results are decoded to the same types, with
+their `hash` set.
+"""
+
+import dataclasses as dc
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from pylumi.constants import ARCHIVE_KEY, ASSET_KEY
+
+
+@dc.dataclass(frozen=True)
+class Asset:
+    """
+    A single blob of data, from exactly one of a local file, a string or a URI.
+
+    **Attributes:**
+
+    * **path** - The path of a local file.
+    * **text** - The contents of the asset, as a string.
+    * **uri** - A URI the contents are read from, e.g. `https://` or `file://`.
+    * **hash** - The SHA-256 hash of the contents, set on assets returned from providers.
+    """
+
+    path: Optional[str] = None
+    text: Optional[str] = None
+    uri: Optional[str] = None
+    hash: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if sum(value is not None for value in (self.path, self.text, self.uri)) != 1:
+            raise ValueError("Exactly one of path, text or uri is required.")
+
+    @classmethod
+    def from_path(cls, path: str) -> "Asset":
+        """
+        Create an asset from a local file
+        """
+        return cls(path=os.path.abspath(path))
+
+    @classmethod
+    def from_text(cls, text: str) -> "Asset":
+        """
+        Create an asset from a string
+        """
+        return cls(text=text)
+
+    @classmethod
+    def from_uri(cls, uri: str) -> "Asset":
+        """
+        Create an asset from a URI
+        """
+        return cls(uri=uri)
+
+    @classmethod
+    def from_buffer(
+        cls,
+        data: Union[bytes, bytearray, memoryview, BinaryIO],
+        dir: Optional[str] = None,
+    ) -> "Asset":
+        """
+        Create an asset from in-memory bytes or a binary file-like object. The data is
+        written to a temporary file in `dir`, reading file-like objects in chunks. The
+        file is deleted when the asset is garbage collected.
+        """
+        fd, path = tempfile.mkstemp(dir=dir, prefix="pylumi-asset-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if isinstance(data, (bytes, bytearray, memoryview)):
+                    f.write(data)
+                else:
+                    shutil.copyfileobj(data, f)
+        except BaseException:
+            os.unlink(path)
+            raise
+        asset = cls(path=path)
+        weakref.finalize(asset, _remove, path)
+        return asset
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Get the reference to this asset passed to the Go runtime
+        """
+        return {ASSET_KEY: _spec(self)}
+
+
+@dc.dataclass(frozen=True)
+class Archive:
+    """
+    A collection of assets and archives, from exactly one of a local file or
+    directory, a URI or a dictionary of names to assets and archives.
+
+    **Attributes:**
+
+    * **path** - The path of a local directory or `.zip`, `.tar` or `.tgz` file.
+    * **uri** - A URI the archive is read from.
+    * **assets** - A dictionary of names to Asset and Archive objects.
+    * **hash** - The SHA-256 hash of the contents, set on archives returned from providers.
+    """
+
+    path: Optional[str] = None
+    uri: Optional[str] = None
+    assets: Optional[Dict[str, Union[Asset, "Archive"]]] = None
+    hash: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if sum(value is not None for value in (self.path, self.uri, self.assets)) != 1:
+            raise ValueError("Exactly one of path, uri or assets is required.")
+
+    @classmethod
+    def from_path(cls, path: str) -> "Archive":
+        """
+        Create an archive from a local directory or archive file
+        """
+        return cls(path=os.path.abspath(path))
+
+    @classmethod
+    def from_uri(cls, uri: str) -> "Archive":
+        """
+        Create an archive from a URI
+        """
+        return cls(uri=uri)
+
+    @classmethod
+    def from_assets(cls, assets: Dict[str, Union[Asset, "Archive"]]) -> "Archive":
+        """
+        Create an archive from a dictionary of names to assets and archives
+        """
+        return cls(assets=dict(assets))
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Get the reference to this archive passed to the Go runtime
+        """
+        spec = _spec(self)
+        if self.assets is not None:
+            spec["assets"] = {
+                name: value.to_json() for name, value in self.assets.items()
+            }
+        return {ARCHIVE_KEY: spec}
+
+
+def _remove(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _spec(value: Union[Asset, Archive]) -> Dict[str, Any]:
+    return {
+        field.name: getattr(value, field.name)
+        for field in dc.fields(value)
+        if getattr(value, field.name) is not None
+    }
+
+
+def from_json(value: Dict[str, Any]) -> Optional[Union[Asset, Archive]]:
+    """
+    Convert an asset or archive reference returned from the Go runtime to an Asset
+    or Archive object. Returns None if `value` isn't a reference.
+    """
+    if len(value) != 1:
+        return None
+    spec = value.get(ASSET_KEY)
+    if isinstance(spec, dict):
+        return Asset(**spec)
+    spec = value.get(ARCHIVE_KEY)
+    if isinstance(spec, dict):
+        if spec.get("assets") is not None:
+            spec = dict(
+                spec,
+                assets={
+                    name: (
+                        member
+                        if isinstance(member, (Asset, Archive))
+                        else from_json(member)
+                    )
+                    for name, member in spec["assets"].items()
+                },
+            )
+        return Archive(**spec)
+    return None
@@ -1,9 +1,10 @@
 import asyncio
 from concurrent.futures import Executor
 from functools import wraps
-from typing import Optional, Dict, Any, Sequence
+from typing import AsyncIterator, Optional, Dict, Any, Sequence
 
 from pylumi import async_provider, context
+from pylumi.diagnostics import Diagnostic
 
 
 class AsyncContext:
@@ -19,20 +20,32 @@ class AsyncContext:
 
     See the Context class for more information
     """
-    def __init__(self, name: Optional[str] = None, cwd: Optional[str] = None, executor: Optional[Executor] = None) -> None:
-        self.ctx = context.Context(name, cwd)
+    def __init__(self, name: Optional[str] = None, cwd: Optional[str] = None, executor: Optional[Executor] = None, **kwargs) -> None:
+        self.ctx = context.Context(name, cwd, **kwargs)
         self.executor = executor
 
+    @classmethod
+    def wrap(cls, ctx: Any, executor: Optional[Executor] = None) -> "AsyncContext":
+        """
+        Create an AsyncContext wrapping an existing Context-like object, such as a
+        `pylumi.replay.ReplayContext`.
+        """
+        instance = cls.__new__(cls)
+        instance.ctx = ctx
+        instance.executor = executor
+        return instance
+
     @wraps(context.Context.provider)
     def provider(
         self,
         name: str,
         config: Optional[Dict[str, Any]] = None,
         version: Optional[str] = None,
+        **kwargs
     ) -> async_provider.AsyncProvider:
         if config is None:
             config = {}
-        return async_provider.AsyncProvider(self, name, config, version)
+        return async_provider.AsyncProvider(self, name, config, version, **kwargs)
 
     @wraps(context.Context.setup)
     async def setup(self) -> None:
@@ -43,13 +56,38 @@ class AsyncContext:
         )
 
     @wraps(context.Context.teardown)
-    async def teardown(self) -> None:
+    async def teardown(self, *args, **kwargs) -> Sequence[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: self.ctx.teardown(*args, **kwargs)
+        )
+
+    @wraps(context.Context.drain_diagnostics)
+    async def drain_diagnostics(self, *args, **kwargs) -> Sequence[Diagnostic]:
         loop = asyncio.get_running_loop()
         return await loop.run_in_executor(
             self.executor,
-            self.ctx.teardown
+            lambda: self.ctx.drain_diagnostics(*args, **kwargs)
         )
 
+    async def diagnostics(
+        self,
+        interval: float = 0.1,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Diagnostic]:
+        """
+        Async iterator over diagnostic events, polling the buffer every `interval` seconds.
+        Only available if the context was created with `diagnostics_buffer_size`. Iterates
+        until the consumer stops e.g. by breaking out of the loop or cancelling the task.
+        """
+        while True:
+            events = await self.drain_diagnostics(batch_size)
+            for event in events:
+                yield event
+            if batch_size is None or len(events) < batch_size:
+                await asyncio.sleep(interval)
+
     @wraps(context.Context.list_plugins)
     async def list_plugins(self) -> Sequence[str]:
         loop = asyncio.get_running_loop()
@@ -58,6 +96,14 @@ class AsyncContext:
             self.ctx.list_plugins
         )
 
+    @wraps(context.Context.list_installed_plugins)
+    async def list_installed_plugins(self) -> Sequence[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self.ctx.list_installed_plugins
+        )
+
     @wraps(context.Context.install_plugin)
     async def install_plugin(
         self,
@@ -70,9 +116,21 @@ class AsyncContext:
             lambda: self.ctx.install_plugin(*args, **kwargs)
         )
 
+    @wraps(context.Context.install_plugins)
+    async def install_plugins(
+        self,
+        *args,
+        **kwargs,
+    ) -> Sequence[Dict[str, Any]]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            lambda: self.ctx.install_plugins(*args, **kwargs)
+        )
+
     async def __aenter__(self) -> "AsyncContext":
         await self.setup()
         return self
 
-    async def __exit__(self, exc_type, exc_value, tb) -> None:
+    async def __aexit__(self, exc_type, exc_value, tb) -> None:
         await self.teardown()
@@ -1,8 +1,9 @@
 import asyncio
 from functools import wraps
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, Optional
 
-from pylumi import provider
+from pylumi import provider, streaming
+from pylumi.scheduling import CallScheduler, PriorityLike
 
 
 class AsyncProvider:
@@ -13,6 +14,10 @@ class AsyncProvider:
     - It is an async context manager rather than a normal context
     manager, and thus the `async for` syntax must be used
 
+    If a `scheduler` is given, calls are admitted through that
+    `pylumi.scheduling.CallScheduler`. Every method then also accepts
+    `priority` and `tenant` keyword arguments.
+
     See the Provider class for more information
     """
     def __init__(
@@ -21,120 +26,170 @@ class AsyncProvider:
         name: str,
         config: Optional[Dict[str, Any]] = None,
         version: Optional[str] = None,
+        scheduler: Optional[CallScheduler] = None,
+        **kwargs
     ) -> None:
         self.ctx = ctx
-        self.provider = provider.Provider(ctx.ctx, name, config, version)
-    
-    @wraps(provider.Provider.configure)
-    async def configure(self, *args, **kwargs):
+        self.scheduler = scheduler
+        self.provider = ctx.ctx.provider(name, config, version, **kwargs)
+
+    def _release(self, future: asyncio.Future) -> None:
+        if not future.cancelled():
+            # Mark the exception as retrieved if the caller was cancelled
+            future.exception()
+        self.scheduler.release()
+
+    async def _run(
+        self,
+        func: Callable[[], Any],
+        priority: Optional[PriorityLike] = None,
+        tenant: Optional[str] = None
+    ) -> Any:
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.configure(*args, **kwargs)
+        if self.scheduler is None:
+            return await loop.run_in_executor(self.ctx.executor, func)
+
+        await self.scheduler.acquire(priority, tenant)
+        future = loop.run_in_executor(self.ctx.executor, func)
+        # Hold the slot until the call finishes, even if the caller is cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.shield(future)
+
+    @wraps(provider.Provider.configure)
+    async def configure(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.configure(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.teardown)
-    async def teardown(self):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.teardown()
+    async def teardown(self, priority=None, tenant=None):
+        return await self._run(
+            lambda: self.provider.teardown(),
+            priority,
+            tenant
         )
     
     @wraps(provider.Provider.get_plugin_info)
-    async def get_plugin_info(self):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.get_plugin_info()
+    async def get_plugin_info(self, priority=None, tenant=None):
+        return await self._run(
+            lambda: self.provider.get_plugin_info(),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.get_schema)
-    async def get_schema(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.get_schema(*args, **kwargs)
+    async def get_schema(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.get_schema(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.check_config)
-    async def check_config(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.check_config(*args, **kwargs)
+    async def check_config(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.check_config(*args, **kwargs),
+            priority,
+            tenant
         )
     
     @wraps(provider.Provider.diff_config)
-    async def diff_config(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.diff_config(*args, **kwargs)
+    async def diff_config(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.diff_config(*args, **kwargs),
+            priority,
+            tenant
         )
     
     @wraps(provider.Provider.check)
-    async def check(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.check(*args, **kwargs)
+    async def check(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.check(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.diff)
-    async def diff(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.diff(*args, **kwargs)
+    async def diff(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.diff(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.create)
-    async def create(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.create(*args, **kwargs)
+    async def create(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.create(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.read)
-    async def read(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.read(*args, **kwargs)
+    async def read(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.read(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.update)
-    async def update(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.update(*args, **kwargs)
+    async def update(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.update(*args, **kwargs),
+            priority,
+            tenant
         )
     
     @wraps(provider.Provider.delete)
-    async def delete(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.delete(*args, **kwargs)
+    async def delete(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.delete(*args, **kwargs),
+            priority,
+            tenant
         )
 
     @wraps(provider.Provider.invoke)
-    async def invoke(self, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.invoke(*args, **kwargs)
+    async def invoke(self, *args, priority=None, tenant=None, **kwargs):
+        return await self._run(
+            lambda: self.provider.invoke(*args, **kwargs),
+            priority,
+            tenant
         )
     
+    async def invoke_iter(
+        self,
+        *args,
+        priority=None,
+        tenant=None,
+        batch_size: int = streaming.DEFAULT_BATCH_SIZE,
+        **kwargs
+    ) -> streaming.AsyncInvokeStream:
+        """
+        Invoke a function, returning an AsyncInvokeStream over the elements of an
+        array in its result, see `Provider.invoke_iter()`. Elements are read and
+        decoded in the executor `batch_size` at a time, and each batch is admitted
+        through the scheduler like a call.
+        """
+        stream = await self._run(
+            lambda: self.provider.invoke_iter(*args, **kwargs),
+            priority,
+            tenant
+        )
+        return streaming.AsyncInvokeStream(
+            stream,
+            lambda func: self._run(func, priority, tenant),
+            batch_size
+        )
+
     @wraps(provider.Provider.signal_cancellation)
-    async def signal_cancellation(self):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(
-            self.ctx.executor,
-            lambda: self.provider.signal_cancellation()
+    async def signal_cancellation(self, priority=None, tenant=None):
+        return await self._run(
+            lambda: self.provider.signal_cancellation(),
+            priority,
+            tenant
         )
 
     async def __aenter__(self) -> "AsyncProvider":
@@ -0,0 +1,440 @@
+"""
+Generation of typed Python classes from provider schemas. For example, to generate
+a `pylumi_aws` package in the current directory:
+
+.. code-block:: python
+
+   with ctx.provider("aws") as aws:
+       pylumi.codegen.generate(aws.get_schema(), ".", "pylumi_aws")
+
+The generated package has one module per schema module e.g. `pylumi_aws.s3`, and
+modules are only imported when they are first accessed. Each module contains:
+
+- An `<Name>Args` class with the input properties of each resource, and an
+  `<Name>Outputs` class with its output properties.
+- An `<Name>Args` class with the arguments of each function, and an `<Name>Result`
+  class with its result.
+- A class for each object type and an enum for each enum type in the module.
+
+Generated classes are slotted subclasses of `pylumi.types.PropertyBag`. Their
+`to_properties()` and `from_properties()` methods convert to and from the property
+dictionaries taken and returned by Provider methods. Any property may be set to
+an UnknownValue.
+"""
+
+import keyword
+import os
+import re
+import urllib.parse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_MODULE_FORMAT = "(.*)"
+
+INDEX_MODULE = "index"
+
+# Attribute names that would clash with generated methods or parameters
+RESERVED_ATTRIBUTES = {"self", "to_properties", "from_properties"}
+
+
+def snake_case(name: str) -> str:
+    """
+    Convert a schema property name to a valid Python attribute name e.g.
+    `bucketPrefix` -> `bucket_prefix`.
+    """
+    name = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1_\2", name)
+    name = re.sub(r"([a-z0-9])([A-Z])", r"\1_\2", name)
+    name = re.sub(r"[^0-9a-zA-Z_]", "_", name).lower()
+    if not name or name[0].isdigit():
+        name = "_" + name
+    if keyword.iskeyword(name):
+        name += "_"
+    return name
+
+
+def class_name(name: str) -> str:
+    """
+    Convert a schema token name to a valid Python class name
+    """
+    name = re.sub(r"[^0-9a-zA-Z_]", "_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+    return name[0].upper() + name[1:]
+
+
+def module_name(token: str, module_format: str = DEFAULT_MODULE_FORMAT) -> str:
+    """
+    Get the name of the generated module for a schema token e.g.
+    `aws:s3/bucket:Bucket` -> `s3` with the module format `(.*)(?:/[^/]*)`.
+    """
+    parts = token.split(":")
+    module = parts[1] if len(parts) == 3 else INDEX_MODULE
+    match = re.fullmatch(module_format, module)
+    if match is not None and match.groups() and match.group(1):
+        module = match.group(1)
+    if not module:
+        module = INDEX_MODULE
+    return snake_case(module.replace("/", "_"))
+
+
+def _type_ref(spec: Dict[str, Any]) -> Optional[str]:
+    ref = spec.get("$ref")
+    if ref is None or not ref.startswith("#/types/"):
+        return None
+    return urllib.parse.unquote(ref[len("#/types/") :])
+
+
+class _Class:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        properties: Dict[str, Any],
+        required: Sequence[str],
+        token: Optional[str] = None,
+    ) -> None:
+        self.name = name
+        self.description = description
+        self.properties = properties
+        self.required = set(required)
+        self.token = token
+
+
+class _Enum:
+    def __init__(self, name: str, token: str, spec: Dict[str, Any]) -> None:
+        self.name = name
+        self.token = token
+        self.spec = spec
+
+
+class _Module:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.enums: List[_Enum] = []
+        self.classes: List[_Class] = []
+        self.names = set()
+
+    def unique_name(self, name: str) -> str:
+        while name in self.names:
+            name += "_"
+        self.names.add(name)
+        return name
+
+
+class _Generator:
+    def __init__(self, schema: Dict[str, Any], module_format: str) -> None:
+        self.schema = schema
+        self.module_format = module_format
+        self.modules: Dict[str, _Module] = {}
+        # Schema type token -> (module name, class name, is enum)
+        self.types: Dict[str, Tuple[str, str, bool]] = {}
+
+    def module(self, token: str) -> _Module:
+        name = module_name(token, self.module_format)
+        if name not in self.modules:
+            self.modules[name] = _Module(name)
+        return self.modules[name]
+
+    def collect(self) -> None:
+        # Types first, so references to them can be resolved
+        for token, spec in sorted(self.schema.get("types", {}).items()):
+            module = self.module(token)
+            name = module.unique_name(class_name(token.split(":")[-1]))
+            if "enum" in spec:
+                module.enums.append(_Enum(name, token, spec))
+                self.types[token] = (module.name, name, True)
+            else:
+                module.classes.append(
+                    _Class(
+                        name,
+                        f"The {token} type.",
+                        spec.get("properties", {}),
+                        spec.get("required", ()),
+                    )
+                )
+                self.types[token] = (module.name, name, False)
+
+        provider = self.schema.get("provider")
+        if provider is not None:
+            module = self.module(f"{self.schema.get('name', '')}:{INDEX_MODULE}:_")
+            module.classes.append(
+                _Class(
+                    module.unique_name("ProviderArgs"),
+                    "Configuration of the provider.",
+                    provider.get("inputProperties", {}),
+                    provider.get("requiredInputs", ()),
+                )
+            )
+
+        for token, spec in sorted(self.schema.get("resources", {}).items()):
+            module = self.module(token)
+            base = class_name(token.split(":")[-1])
+            module.classes.append(
+                _Class(
+                    module.unique_name(f"{base}Args"),
+                    f"Inputs of the {token} resource.",
+                    spec.get("inputProperties", {}),
+                    spec.get("requiredInputs", ()),
+                    token,
+                )
+            )
+            module.classes.append(
+                _Class(
+                    module.unique_name(f"{base}Outputs"),
+                    f"Outputs of the {token} resource.",
+                    spec.get("properties", {}),
+                    spec.get("required", ()),
+                    token,
+                )
+            )
+
+        for token, spec in sorted(self.schema.get("functions", {}).items()):
+            module = self.module(token)
+            base = class_name(token.split(":")[-1])
+            inputs = spec.get("inputs") or {}
+            outputs = spec.get("outputs") or {}
+            module.classes.append(
+                _Class(
+                    module.unique_name(f"{base}Args"),
+                    f"Arguments of the {token} function.",
+                    inputs.get("properties", {}),
+                    inputs.get("required", ()),
+                    token,
+                )
+            )
+            module.classes.append(
+                _Class(
+                    module.unique_name(f"{base}Result"),
+                    f"Result of the {token} function.",
+                    outputs.get("properties", {}),
+                    outputs.get("required", ()),
+                    token,
+                )
+            )
+
+    def class_expr(self, module: _Module, token: str) -> str:
+        type_module, name, _ = self.types[token]
+        if type_module == module.name:
+            return name
+        return f'_m(".{type_module}").{name}'
+
+    def has_refs(self, spec: Dict[str, Any]) -> bool:
+        ref = _type_ref(spec)
+        if ref is not None:
+            return ref in self.types
+        if "items" in spec and self.has_refs(spec["items"]):
+            return True
+        additional = spec.get("additionalProperties")
+        return isinstance(additional, dict) and self.has_refs(additional)
+
+    def from_expr(self, module: _Module, spec: Dict[str, Any], var: str) -> str:
+        """
+        Expression converting the property encoding in `var` to its typed value
+        """
+        ref = _type_ref(spec)
+        if ref is not None and ref in self.types:
+            func = "from_enum" if self.types[ref][2] else "from_object"
+            return f"{func}({self.class_expr(module, ref)}, {var})"
+        if "items" in spec and self.has_refs(spec["items"]):
+            item = self.from_expr(module, spec["items"], "x")
+            return f"from_list(lambda x: {item}, {var})"
+        additional = spec.get("additionalProperties")
+        if isinstance(additional, dict) and self.has_refs(additional):
+            item = self.from_expr(module, additional, "x")
+            return f"from_map(lambda x: {item}, {var})"
+        return var
+
+    def render_enum(self, enum_: _Enum) -> List[str]:
+        values = enum_.spec["enum"]
+        base = "str, enum.Enum" if enum_.spec.get("type") == "string" else "enum.Enum"
+        lines = [
+            f"class {enum_.name}({base}):",
+            '    """',
+            f"    The {enum_.token} enum.",
+            '    """',
+            "",
+        ]
+        names = set()
+        for value in values:
+            name = value.get("name") or str(value["value"])
+            name = snake_case(name).upper().strip("_") or "VALUE"
+            if name[0].isdigit():
+                name = "_" + name
+            while name in names:
+                name += "_"
+            names.add(name)
+            lines.append(f"    {name} = {value['value']!r}")
+        return lines
+
+    def render_class(self, module: _Module, cls: _Class) -> List[str]:
+        fields = []
+        attrs = set()
+        for prop, spec in sorted(cls.properties.items()):
+            attr = snake_case(prop)
+            while attr in attrs or attr in RESERVED_ATTRIBUTES:
+                attr += "_"
+            attrs.add(attr)
+            fields.append((attr, prop, spec))
+
+        lines = [
+            f"class {cls.name}(PropertyBag):",
+            '    """',
+            f"    {cls.description}",
+            '    """',
+            "",
+            f"    __slots__ = {tuple(attr for attr, _, _ in fields)!r}",
+            "",
+            f"    _FIELDS = {tuple((attr, prop) for attr, prop, _ in fields)!r}",
+            "",
+        ]
+        if cls.token is not None:
+            lines.extend([f"    TOKEN = {cls.token!r}", ""])
+
+        required = [attr for attr, prop, _ in fields if prop in cls.required]
+        optional = [attr for attr, prop, _ in fields if prop not in cls.required]
+        params = required + [f"{attr}=None" for attr in optional]
+        if params:
+            lines.append(f"    def __init__(self, *, {', '.join(params)}):")
+            lines.extend(f"        self.{attr} = {attr}" for attr, _, _ in fields)
+        else:
+            lines.extend(["    def __init__(self):", "        pass"])
+        lines.append("")
+
+        lines.extend(["    def to_properties(self):", "        props = {}"])
+        for attr, prop, spec in fields:
+            value = "to_value(value)" if self.has_refs(spec) else "value"
+            lines.extend(
+                [
+                    f"        value = self.{attr}",
+                    "        if value is not None:",
+                    f"            props[{prop!r}] = {value}",
+                ]
+            )
+        lines.extend(["        return props", ""])
+
+        lines.extend(
+            [
+                "    @classmethod",
+                "    def from_properties(cls, props):",
+                "        self = cls.__new__(cls)",
+            ]
+        )
+        if fields:
+            lines.append("        get = props.get")
+        for attr, prop, spec in fields:
+            expr = self.from_expr(module, spec, f"get({prop!r})")
+            lines.append(f"        self.{attr} = {expr}")
+        lines.append("        return self")
+        return lines
+
+    def render_module(self, module: _Module) -> str:
+        lines = [
+            self.header(),
+            "import enum",
+            "from importlib import import_module as _import_module",
+            "",
+            "from pylumi.types import (",
+            "    PropertyBag,",
+            "    from_enum,",
+            "    from_list,",
+            "    from_map,",
+            "    from_object,",
+            "    to_value,",
+            ")",
+            "",
+            "",
+            "def _m(name):",
+            "    return _import_module(name, __package__)",
+        ]
+        for enum_ in module.enums:
+            lines.extend(["", ""])
+            lines.extend(self.render_enum(enum_))
+        for cls in module.classes:
+            lines.extend(["", ""])
+            lines.extend(self.render_class(module, cls))
+        return "\n".join(lines) + "\n"
+
+    def render_init(self) -> str:
+        modules = sorted(self.modules)
+        lines = [
+            self.header(),
+            "import importlib",
+            "",
+            f"__all__ = {modules!r}",
+            "",
+            "",
+            "def __getattr__(name):",
+            "    if name in __all__:",
+            '        return importlib.import_module(f"{__name__}.{name}")',
+            '    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")',
+            "",
+            "",
+            "def __dir__():",
+            "    return list(__all__)",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def header(self) -> str:
+        parts = (self.schema.get("name"), self.schema.get("version"))
+        source = " ".join(part for part in parts if part)
+        return f"# Generated by pylumi.codegen from the {source} schema. Do not edit.\n"
+
+
+def render_package(
+    schema: Dict[str, Any], module_format: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Render the source code of a package of typed classes for a provider schema.
+
+    **Parameters:**
+
+    * **schema** - A decoded provider schema, as returned from `Provider.get_schema()`.
+    * **module_format** - (optional) A regular expression whose first group extracts the
+    module name from the module part of a token. By default the `moduleFormat` from the
+    schema's metadata is used.
+
+    **Returns:**
+
+    A dictionary mapping file names relative to the package directory to their source.
+    """
+    if module_format is None:
+        module_format = schema.get("meta", {}).get(
+            "moduleFormat", DEFAULT_MODULE_FORMAT
+        )
+    generator = _Generator(schema, module_format)
+    generator.collect()
+    files = {
+        f"{name}.py": generator.render_module(module)
+        for name, module in generator.modules.items()
+    }
+    files["__init__.py"] = generator.render_init()
+    return files
+
+
+def generate(
+    schema: Dict[str, Any],
+    path: str,
+    package: Optional[str] = None,
+    module_format: Optional[str] = None,
+) -> str:
+    """
+    Generate a package of typed classes for a provider schema.
+
+    **Parameters:**
+
+    * **schema** - A decoded provider schema, as returned from `Provider.get_schema()`.
+    * **path** - The directory to create the package in.
+    * **package** - (optional) The name of the package, by default `pylumi_<provider name>`.
+    * **module_format** - (optional) See `render_package()`.
+
+    **Returns:**
+
+    The path of the generated package directory.
+    """
+    if package is None:
+        package = "pylumi_" + snake_case(schema["name"])
+    package_dir = os.path.join(path, package)
+    os.makedirs(package_dir, exist_ok=True)
+    for file_name, source in render_package(schema, module_format).items():
+        with open(os.path.join(package_dir, file_name), "w") as f:
+            f.write(source)
+    return package_dir
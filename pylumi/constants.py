@@ -0,0 +1,80 @@
+"""
+Constants shared with the Pulumi engine. These mirror the values exported by the
+native extension so that they can be used without loading it; the extension
+checks that they match when it is loaded.
+"""
+
+import enum
+
+UNKNOWN_KEY = "$unknown"
+
+UNKNOWN_BOOL_VALUE = "1c4a061d-8072-4f0a-a4cb-0ff528b18fe7"
+
+UNKNOWN_NUMBER_VALUE = "3eeb2bf0-c639-47a8-9e75-3b44932eb421"
+
+UNKNOWN_STRING_VALUE = "04da6b54-80e4-46f7-96ec-b56ff0331ba9"
+
+UNKNOWN_ARRAY_VALUE = "6a19a0b0-7e62-4c92-b797-7f8e31da9cc2"
+
+UNKNOWN_ASSET_VALUE = "030794c1-ac77-496b-92df-f27374a8bd58"
+
+UNKNOWN_ARCHIVE_VALUE = "e48ece36-62e2-4504-bad9-02848725956a"
+
+UNKNOWN_OBJECT_VALUE = "dd056dcd-154b-4c76-9bd3-c8f88648b5ff"
+
+UNKNOWN_NULL_VALUE = ""
+
+ASSET_KEY = "$asset"
+
+ARCHIVE_KEY = "$archive"
+
+
+class UnknownValue(enum.Enum):
+    """
+    Enum of UNKNOWN_*_VALUE values
+    """
+
+    BOOL = UNKNOWN_BOOL_VALUE
+    NUMBER = UNKNOWN_NUMBER_VALUE
+    STRING = UNKNOWN_STRING_VALUE
+    ARRAY = UNKNOWN_ARRAY_VALUE
+    ASSET = UNKNOWN_ASSET_VALUE
+    ARCHIVE = UNKNOWN_ARCHIVE_VALUE
+    OBJECT = UNKNOWN_OBJECT_VALUE
+    NULL_ = UNKNOWN_NULL_VALUE
+
+
+DIFF_ADD = 0
+
+DIFF_ADD_REPLACE = 1
+
+DIFF_DELETE = 2
+
+DIFF_DELETE_REPLACE = 3
+
+DIFF_UPDATE = 4
+
+DIFF_UPDATE_REPLACE = 5
+
+
+class DiffKind(enum.Enum):
+    """
+    Enum of DIFF_* values
+    """
+
+    ADD = DIFF_ADD
+    ADD_REPLACE = DIFF_ADD_REPLACE
+    DELETE = DIFF_DELETE
+    DELETE_REPLACE = DIFF_DELETE_REPLACE
+    UPDATE = DIFF_UPDATE
+    UPDATE_REPLACE = DIFF_UPDATE_REPLACE
+
+
+class DiffChanges(enum.Enum):
+    """
+    Enum of the overall outcomes of a diff
+    """
+
+    UNKNOWN = 0
+    NONE = 1
+    SOME = 2
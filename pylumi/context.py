@@ -1,9 +1,22 @@
 import os
 import uuid
-from typing import Any, Sequence, Optional, Dict
+from typing import TYPE_CHECKING, Any, Callable, Sequence, Optional, Dict, Tuple, Union
 
+from pylumi import ext
+from pylumi.descriptors import ContextDescriptor
+from pylumi.diagnostics import Diagnostic, DiagnosticSubscription, DropPolicy
+from pylumi.exc import PluginInstallError
+from pylumi.interning import InternPool
 from pylumi.ext import _pylumi
 from pylumi.provider import Provider
+from pylumi.tracing import Tracer
+
+if TYPE_CHECKING:
+    # Imported when used, to keep `import pylumi` fast
+    from pylumi.admission import ByteBudget
+    from pylumi.store import StateStore
+    from pylumi.transport import TransportMonitor
+    from pylumi.watchdog import Watchdog
 
 
 class Context:
@@ -19,10 +32,29 @@ class Context:
     so if two contexts are created with the same name then they will point to
     the same Provider object in the go runtime.
     * **cwd** - (optional) Pass a current working directory to use for the context.
+    * **diagnostics_buffer_size** - (optional) If given, diagnostics from the engine and plugins
+    are stored in a bounded buffer of this many events instead of being written to stderr. They
+    can be retrieved with `drain_diagnostics()` or `subscribe_diagnostics()`.
+    * **diagnostics_drop_policy** - (optional) Which events to drop when the diagnostics buffer is
+    full, either "oldest" (the default) or "newest".
+    * **diagnostics_debug** - (optional) Also buffer debug-level diagnostics, default False.
+    * **tracer** - (optional) A `pylumi.tracing.Tracer` used to trace all provider calls made through this context.
+    * **recorder** - (optional) A `pylumi.replay.TrafficRecorder` that all provider requests and responses made through this context are written to.
+    * **byte_budget** - (optional) A `pylumi.admission.ByteBudget` that limits the encoded size of requests and results of provider calls in flight through this context.
 
     """
 
-    def __init__(self, name: Optional[str] = None, cwd: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        cwd: Optional[str] = None,
+        diagnostics_buffer_size: Optional[int] = None,
+        diagnostics_drop_policy: Union[str, DropPolicy] = DropPolicy.OLDEST,
+        diagnostics_debug: bool = False,
+        tracer: Optional[Tracer] = None,
+        recorder: Optional["TrafficRecorder"] = None,
+        byte_budget: Optional["ByteBudget"] = None,
+    ) -> None:
         if cwd is None:
             cwd = os.getcwd()
         if name is None:
@@ -30,12 +62,30 @@ class Context:
 
         self.name = name
         self.cwd = cwd
+        self.diagnostics_buffer_size = diagnostics_buffer_size
+        self.diagnostics_drop_policy = DropPolicy(diagnostics_drop_policy)
+        self.diagnostics_debug = diagnostics_debug
+        self.diagnostics_dropped = 0
+        self.tracer = tracer
+        self.recorder = recorder
+        self.byte_budget = byte_budget
+        # Fork generation this context was set up in, see `pylumi.prefork()`
+        self._setup_generation = None
+        # Fingerprints of the configuration applied to each provider plugin, see
+        # `Provider.configure()`
+        self._configured: Dict[str, Tuple[int, str]] = {}
 
     def provider(
         self,
         name: str,
         config: Optional[Dict[str, Any]] = None,
         version: Optional[str] = None,
+        typed_results: bool = False,
+        validate_inputs: bool = False,
+        intern_pool: Optional[InternPool] = None,
+        transport: Optional["TransportMonitor"] = None,
+        state_store: Optional["StateStore"] = None,
+        watchdog: Optional["Watchdog"] = None,
     ) -> Provider:
         """
         Get a Provider object with the given name. This just creates the provider object,
@@ -46,6 +96,19 @@ class Context:
 
         * **name** - The name of the provider, e.g. 'aws'.
         * **config** - (optional) configuration parameters for the provider.
+        * **version** - (optional) the version of the provider plugin to use.
+        * **typed_results** - (optional) return typed result objects from diff(),
+        create(), read() and update() instead of dictionaries, default False.
+        * **validate_inputs** - (optional) validate inputs against the provider schema
+        in-process before check(), create() and update(), default False.
+        * **intern_pool** - (optional) a `pylumi.interning.InternPool` to decode results through,
+        sharing repeated strings and immutable objects between them.
+        * **transport** - (optional) a `pylumi.transport.TransportMonitor` to record the
+        latency and payload sizes of calls in.
+        * **state_store** - (optional) a `pylumi.store.StateStore` that the results of
+        create(), read(), update() and delete() are written through to.
+        * **watchdog** - (optional) a `pylumi.watchdog.Watchdog` that tracks calls in
+        flight and reports those that take too long.
 
         **Returns:**
 
@@ -60,7 +123,37 @@ class Context:
         """
         if config is None:
             config = {}
-        return Provider(self, name, config, version)
+        return Provider(
+            self,
+            name,
+            config,
+            version,
+            typed_results,
+            validate_inputs,
+            intern_pool,
+            transport,
+            state_store,
+            watchdog,
+        )
+
+    def descriptor(self) -> ContextDescriptor:
+        """
+        Get a picklable description of this context, which can be used to create an
+        equivalent context in another process. The tracer, recorder and byte
+        budget are not included.
+
+        **Returns:**
+
+        A ContextDescriptor object.
+        """
+        return ContextDescriptor(
+            kwargs={
+                "cwd": self.cwd,
+                "diagnostics_buffer_size": self.diagnostics_buffer_size,
+                "diagnostics_drop_policy": self.diagnostics_drop_policy.value,
+                "diagnostics_debug": self.diagnostics_debug,
+            }
+        )
 
     def setup(self) -> None:
         """
@@ -71,18 +164,107 @@ class Context:
 
         None
         """
-        return _pylumi.context_setup(self.name, self.cwd)
+        if self.tracer is not None:
+            self.tracer.setup()
+        _pylumi.context_setup(
+            self.name,
+            self.cwd,
+            self.diagnostics_buffer_size or 0,
+            self.diagnostics_drop_policy.value,
+            self.diagnostics_debug,
+        )
+        self._setup_generation = ext.fork_generation()
+        self._configured.clear()
+
+    def _ensure_setup(self) -> None:
+        """
+        Set up this context again if it was set up in another process i.e. before
+        this process forked, or marked for setup by `pylumi.prefork()`.
+        """
+        generation = self._setup_generation
+        if generation is not None and generation != ext.fork_generation():
+            self.setup()
 
-    def teardown(self) -> None:
+    def teardown(
+        self, grace_period: Optional[float] = None
+    ) -> Sequence[Dict[str, Any]]:
         """
-        Tear down this provider, removing associated OS resources such as plugin
-        processes.
+        Tear down this context, removing associated OS resources such as plugin
+        processes. All providers are closed concurrently.
+
+        **Parameters:**
+
+        * **grace_period** - (optional) How long to wait for each plugin process to exit, in
+        seconds, before killing it. The plugin host is closed within the same grace period, and
+        is left closing in the background if it takes longer. By default teardown waits until
+        every plugin has exited.
 
         **Returns:**
 
-        None
+        A list of dictionaries, one per provider, with the keys `Name`, `Pid` (None if unknown),
+        `Duration` (in seconds), `Outcome` and `Error`. `Outcome` is "closed" if the provider
+        exited within the grace period, "error" if closing it failed, "killed" if its plugin
+        was killed after the grace period or "abandoned" if it couldn't be killed. If closing
+        the plugin host is left in the background, a report named "<plugin host>" with the
+        outcome "abandoned" is added.
+        """
+        generation = self._setup_generation
+        self._setup_generation = None
+        self._configured.clear()
+        if generation is not None and generation != ext.fork_generation():
+            # Set up in another process, so there's nothing to tear down in this one
+            return []
+        if grace_period is None:
+            grace_period = -1
+        reports = _pylumi.context_teardown(self.name, grace_period)
+        for report in reports:
+            if report["Pid"] < 0:
+                report["Pid"] = None
+        return reports
+
+    def drain_diagnostics(
+        self, max_events: Optional[int] = None
+    ) -> Sequence[Diagnostic]:
+        """
+        Remove diagnostic events from this context's buffer and return them. Only
+        available if the context was created with `diagnostics_buffer_size`.
+
+        **Parameters:**
+
+        * **max_events** - (optional) The maximum number of events to return. By default all buffered events are returned.
+
+        **Returns:**
+
+        A list of Diagnostic objects, oldest first. The total number of events dropped because
+        the buffer was full is available afterwards as `diagnostics_dropped`.
+        """
+        self._ensure_setup()
+        response = _pylumi.context_drain_diagnostics(self.name, max_events or 0)
+        self.diagnostics_dropped = response["Dropped"]
+        return list(map(Diagnostic.from_event, response["Events"]))
+
+    def subscribe_diagnostics(
+        self,
+        callback: Callable[[Diagnostic], None],
+        interval: float = 0.1,
+        batch_size: Optional[int] = None,
+    ) -> DiagnosticSubscription:
+        """
+        Deliver buffered diagnostics to `callback` from a background thread. Only
+        available if the context was created with `diagnostics_buffer_size`.
+
+        **Parameters:**
+
+        * **callback** - A function called with each Diagnostic object.
+        * **interval** - (optional) How often to poll the buffer, in seconds. Default 0.1.
+        * **batch_size** - (optional) The maximum number of events to drain at a time.
+
+        **Returns:**
+
+        A DiagnosticSubscription; call its `close()` method (or use it as a context manager)
+        to stop delivery.
         """
-        return _pylumi.context_teardown(self.name)
+        return DiagnosticSubscription(self, callback, interval, batch_size)
 
     def list_plugins(self) -> Sequence[str]:
         """
@@ -97,8 +279,23 @@ class Context:
         ListPlugins lists all plugins that have been loaded, with version information.
         Reference: `ListPlugins <github.com/pulumi/pulumi/sdk/v2/go/common/resource/plugin/host.go>`_
         """
+        self._ensure_setup()
         return _pylumi.context_list_plugins(self.name)
 
+    def list_installed_plugins(self) -> Sequence[Dict[str, Any]]:
+        """
+        List the plugins installed in the current pulumi workspace. This is answered
+        from an in-process index of the plugin directory which is only rebuilt when
+        the directory changes, so it is cheap to call repeatedly.
+
+        **Returns:**
+
+        A list of dictionaries with plugin information, in the same format as
+        `Provider.get_plugin_info()`.
+        """
+        self._ensure_setup()
+        return _pylumi.context_list_installed_plugins(self.name)
+
     def install_plugin(
         self,
         plugin_kind: str,
@@ -124,10 +321,55 @@ class Context:
         **Pulumi docs**:
         Reference: `plugins.go https://github.com/pulumi/pulumi/blob/master/sdk/go/common/workspace/plugins.go`_
         """
+        self._ensure_setup()
         return _pylumi.context_install_plugin(
             self.name, plugin_kind, plugin_name, version, reinstall, exact
         )
 
+    def install_plugins(
+        self,
+        plugins: Sequence[Tuple[str, str, str]],
+        mirror: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        concurrency: int = 4,
+        reinstall: bool = False,
+        exact: bool = False,
+        progress: bool = False,
+    ) -> Sequence[Dict[str, Any]]:
+        """
+        Install many plugins into the current pulumi workspace concurrently.
+
+        **Parameters:**
+
+        * **plugins** - A sequence of `(kind, name, version)` tuples e.g. `[("resource", "aws", "4.33.0")]`.
+        * **mirror** - (optional) A directory or `file://` URL containing plugin tarballs named the same way pulumi publishes them e.g. `pulumi-resource-aws-v4.33.0-linux-amd64.tar.gz`. If given, nothing is downloaded over the network.
+        * **cache_dir** - (optional) A content-addressed tarball cache directory. Tarballs are read from here if present and are stored here after being fetched.
+        * **concurrency** - (optional) The maximum number of plugins to install at once, default 4.
+        * **reinstall** - (optional) Reinstall plugins even if they are already installed, default False.
+        * **exact** - (optional) Require that installed plugin versions match exactly, see `install_plugin()`.
+        * **progress** - (optional) Render download progress bars, default False. Progress bars are never rendered in non-interactive sessions.
+
+        **Returns:**
+
+        A list of dictionaries, one per plugin, with the keys `Kind`, `Name`, `Version`, `Skipped`,
+        `Source` (one of "cache", "mirror" or "download", empty if skipped) and `Error`.
+        A `PluginInstallError` is raised if any plugin fails to install.
+        """
+        self._ensure_setup()
+        results = _pylumi.context_install_plugins(
+            self.name,
+            plugins,
+            mirror,
+            cache_dir,
+            concurrency,
+            reinstall,
+            exact,
+            progress,
+        )
+        if any(result["Error"] for result in results):
+            raise PluginInstallError(results)
+        return results
+
     def __enter__(self) -> "Context":
         self.setup()
         return self
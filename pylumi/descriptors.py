@@ -0,0 +1,81 @@
+import dataclasses as dc
+import json
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+@dc.dataclass(frozen=True)
+class ContextDescriptor:
+    """
+    Picklable description of a context, used to create an equivalent context in
+    another process. Get one from `Context.descriptor()`.
+
+    **Attributes:**
+
+    * **factory** - (optional) The context class or factory function, by default
+    `pylumi.Context`. Must be importable by the process creating the context.
+    * **args** - (optional) Positional arguments for the factory.
+    * **kwargs** - (optional) Keyword arguments for the factory.
+    """
+
+    factory: Optional[Callable[..., Any]] = None
+    args: Tuple[Any, ...] = ()
+    kwargs: Dict[str, Any] = dc.field(default_factory=dict)
+
+    def key(self) -> str:
+        """
+        Return a string identifying this descriptor, for caching the contexts created from it
+        """
+        factory = self.factory
+        name = (
+            None if factory is None else f"{factory.__module__}.{factory.__qualname__}"
+        )
+        return json.dumps([name, self.args, self.kwargs], sort_keys=True, default=str)
+
+    def create(self) -> Any:
+        """
+        Create a context from this descriptor. The context is not set up.
+        """
+        factory = self.factory
+        if factory is None:
+            from pylumi.context import Context
+
+            factory = Context
+        return factory(*self.args, **self.kwargs)
+
+
+@dc.dataclass(frozen=True)
+class ProviderDescriptor:
+    """
+    Picklable description of a provider, used to create an equivalent provider in
+    another process. Get one from `Provider.descriptor()`.
+
+    **Attributes:**
+
+    * **name** - The name of the provider, e.g. 'aws'.
+    * **config** - (optional) Configuration parameters for the provider.
+    * **version** - (optional) The version of the provider plugin.
+    * **options** - (optional) Other keyword arguments for `Context.provider()` e.g.
+    `typed_results`.
+    """
+
+    name: str
+    config: Dict[str, Any] = dc.field(default_factory=dict)
+    version: Optional[str] = None
+    options: Dict[str, Any] = dc.field(default_factory=dict)
+
+    def key(self) -> str:
+        """
+        Return a string identifying this descriptor, for caching the providers created from it
+        """
+        return json.dumps(
+            [self.name, self.config, self.version, self.options],
+            sort_keys=True,
+            default=str,
+        )
+
+    def create(self, ctx: Any) -> Any:
+        """
+        Create a provider in the given context from this descriptor. The provider is
+        not configured.
+        """
+        return ctx.provider(self.name, self.config, self.version, **self.options)
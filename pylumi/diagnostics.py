@@ -0,0 +1,111 @@
+import dataclasses as dc
+import enum
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("pylumi.diagnostics")
+
+
+class DropPolicy(enum.Enum):
+    """
+    Which diagnostic events are discarded when a context's diagnostic buffer is full.
+    """
+
+    OLDEST = "oldest"
+    NEWEST = "newest"
+
+
+@dc.dataclass(frozen=True)
+class Diagnostic:
+    """
+    A single diagnostic event emitted by the Pulumi engine or a resource plugin.
+
+    **Attributes:**
+
+    * **severity** - One of "debug", "info", "info#err", "warning" or "error".
+    * **urn** - The URN of the resource the event relates to, or an empty string.
+    * **message** - The formatted message.
+    * **timestamp** - The time the event was emitted, in seconds since the epoch.
+    """
+
+    severity: str
+    urn: str
+    message: str
+    timestamp: float
+
+    @classmethod
+    def from_event(cls, event: Dict[str, Any]) -> "Diagnostic":
+        """
+        Construct a Diagnostic object from a decoded Go DiagnosticEvent.
+        """
+        return cls(
+            severity=event["Severity"],
+            urn=event["URN"],
+            message=event["Message"],
+            timestamp=event["Timestamp"],
+        )
+
+
+class DiagnosticSubscription:
+    """
+    Background thread that periodically drains the diagnostic buffer of a context
+    and passes each event to a callback. Created via `Context.subscribe_diagnostics()`;
+    call `close()` to stop it. Any events still buffered are delivered before
+    `close()` returns. Exceptions raised by the callback are logged to the
+    `pylumi.diagnostics` logger and don't stop delivery. If draining the buffer
+    fails, e.g. because the context was torn down, the error is logged, stored as
+    `error` and the subscription stops.
+    """
+
+    def __init__(
+        self,
+        ctx: "Context",
+        callback: Callable[[Diagnostic], None],
+        interval: float = 0.1,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        self.ctx = ctx
+        self.callback = callback
+        self.interval = interval
+        self.batch_size = batch_size
+        self.error: Optional[Exception] = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _deliver(self) -> int:
+        events = self.ctx.drain_diagnostics(self.batch_size)
+        for event in events:
+            try:
+                self.callback(event)
+            except Exception:
+                logger.exception("Error in diagnostics callback for %r.", event)
+        return len(events)
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.is_set():
+                delivered = self._deliver()
+                # Keep draining without waiting as long as full batches are coming back.
+                if self.batch_size is not None and delivered >= self.batch_size:
+                    continue
+                self._stopped.wait(self.interval)
+            while self._deliver():
+                pass
+        except Exception as err:
+            logger.exception("Error draining diagnostics, stopping the subscription.")
+            self.error = err
+
+    def close(self) -> None:
+        """
+        Stop the subscription thread, delivering any remaining events first.
+        """
+        self._stopped.set()
+        self._thread.join()
+
+    def __enter__(self) -> "DiagnosticSubscription":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
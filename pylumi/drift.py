@@ -0,0 +1,409 @@
+"""
+Continuous drift detection. A DriftScheduler cycles through a set of registered
+resources, calling `Provider.read()` on one resource at a time within a budget of
+calls per second, and compares the outputs read with the stored outputs:
+
+.. code-block:: python
+
+   drift = pylumi.drift.DriftScheduler(aws, rate=5, state_path="drift.json")
+   for urn, state in resources.items():
+       drift.register(urn, state["id"], state["inputs"], state["outputs"])
+
+   # Blocking, with a callback
+   drift.run(callback=lambda event: print(event.urn, event.changed_paths))
+
+   # Or as an async iterator
+   async for event in drift.events():
+       ...
+
+Resources are refreshed in order of when they are due. A resource is due
+`max_interval` seconds after it was last read, or sooner if it has drifted
+recently, so resources that change often are read more often. Resources aren't
+read before they're due, so `rate` caps reads rather than setting their pace. The time each
+resource was last read and its recent change rate are saved to `state_path`, so
+a restarted scheduler resumes where it left off instead of starting a full sweep.
+A resource found to be deleted is reported once and then unregistered.
+"""
+
+import asyncio
+import dataclasses as dc
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from pylumi.scheduling import TokenBucket
+from pylumi.serialization import write_atomic
+
+# The longest run() and events() sleep before checking for due resources again,
+# so resources registered in the meantime aren't kept waiting
+_POLL_INTERVAL = 1.0
+
+
+@dc.dataclass
+class TrackedResource:
+    """
+    A resource registered with a DriftScheduler.
+
+    **Attributes:**
+
+    * **urn** - The URN of the resource.
+    * **id** - The ID of the resource.
+    * **inputs** - The inputs of the resource, passed to `Provider.read()`.
+    * **outputs** - The stored outputs of the resource that reads are compared with.
+    * **last_checked** - When the resource was last read, as a UNIX timestamp, or 0.
+    * **change_rate** - Exponentially weighted fraction of recent reads that found drift.
+    * **last_error** - The error from the last read, if it failed.
+    """
+
+    urn: str
+    id: str
+    inputs: Dict[str, Any]
+    outputs: Dict[str, Any]
+    last_checked: float = 0.0
+    change_rate: float = 0.0
+    last_error: Optional[str] = None
+
+
+@dc.dataclass(frozen=True)
+class DriftEvent:
+    """
+    Drift found by a DriftScheduler.
+
+    **Attributes:**
+
+    * **urn** - The URN of the resource.
+    * **id** - The ID of the resource.
+    * **changed_paths** - The sorted top-level output properties that differ.
+    * **expected** - The stored outputs.
+    * **actual** - The outputs read from the provider, or None if the resource was deleted.
+    * **time** - When the resource was read, as a UNIX timestamp.
+    """
+
+    urn: str
+    id: str
+    changed_paths: Sequence[str]
+    expected: Dict[str, Any]
+    actual: Optional[Dict[str, Any]]
+    time: float
+
+    @property
+    def deleted(self) -> bool:
+        """
+        Indicate whether the resource no longer exists
+        """
+        return self.actual is None
+
+
+def changed_paths(expected: Dict[str, Any], actual: Dict[str, Any]) -> List[str]:
+    """
+    Get the sorted top-level property names whose values differ between two
+    property maps
+    """
+    return sorted(
+        key
+        for key in expected.keys() | actual.keys()
+        if expected.get(key) != actual.get(key)
+    )
+
+
+class DriftScheduler:
+    """
+    Budgeted, continuous drift detection for a set of resources of one provider.
+
+    **Parameters:**
+
+    * **provider** - The Provider used to read resources.
+    * **rate** - The maximum average number of reads per second.
+    * **burst** - (optional) The maximum number of reads in a burst, default 1.
+    * **max_interval** - (optional) How long after a resource was last read it is due
+    to be read again, in seconds, default 3600.
+    * **change_weight** - (optional) How strongly recent drift shortens a resource's
+    interval: a resource is due after `max_interval / (1 + change_weight * change_rate)`
+    seconds. Default 10.
+    * **smoothing** - (optional) The weight of the latest read in `change_rate`, default 0.2.
+    * **accept_drift** - (optional) Replace the stored outputs of a resource with the
+    outputs read after reporting drift, so each change is reported once. Default True.
+    * **state_path** - (optional) A file the scheduler's progress is saved to and
+    restored from.
+    * **save_interval** - (optional) The minimum number of seconds between saves of
+    the progress during `run()` and `events()`, default 10.
+    """
+
+    def __init__(
+        self,
+        provider: Any,
+        rate: float,
+        burst: float = 1.0,
+        max_interval: float = 3600.0,
+        change_weight: float = 10.0,
+        smoothing: float = 0.2,
+        accept_drift: bool = True,
+        state_path: Optional[str] = None,
+        save_interval: float = 10.0,
+    ) -> None:
+        self.provider = provider
+        self.bucket = TokenBucket(rate, burst)
+        self.max_interval = max_interval
+        self.change_weight = change_weight
+        self.smoothing = smoothing
+        self.accept_drift = accept_drift
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self.reads = 0
+        self.drifted = 0
+        self.errors = 0
+        self._lock = threading.RLock()
+        self._resources: Dict[str, TrackedResource] = {}
+        # Heap of (due time, sequence, urn); entries are invalidated by comparing
+        # the sequence with `_entries`
+        self._heap: List[Tuple[float, int, str]] = []
+        self._entries: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._last_saved = time.monotonic()
+        self._saved_state: Dict[str, Dict[str, float]] = {}
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                self._saved_state = json.load(f)["resources"]
+
+    def _due(self, resource: TrackedResource) -> float:
+        interval = self.max_interval / (1 + self.change_weight * resource.change_rate)
+        return resource.last_checked + interval
+
+    def _schedule(self, resource: TrackedResource) -> None:
+        seq = next(self._sequence)
+        self._entries[resource.urn] = seq
+        heapq.heappush(self._heap, (self._due(resource), seq, resource.urn))
+
+    def register(
+        self,
+        urn: Any,
+        id: str,
+        inputs: Dict[str, Any],
+        outputs: Dict[str, Any],
+    ) -> TrackedResource:
+        """
+        Start tracking a resource, or replace the stored state of a tracked resource.
+        Progress saved for the resource is restored.
+
+        **Returns:**
+
+        The TrackedResource object.
+        """
+        urn = str(urn)
+        with self._lock:
+            resource = self._resources.get(urn)
+            if resource is None:
+                saved = self._saved_state.pop(urn, {})
+                resource = TrackedResource(
+                    urn,
+                    id,
+                    inputs,
+                    outputs,
+                    last_checked=saved.get("last_checked", 0.0),
+                    change_rate=saved.get("change_rate", 0.0),
+                )
+                self._resources[urn] = resource
+                self._schedule(resource)
+            else:
+                resource.id = id
+                resource.inputs = inputs
+                resource.outputs = outputs
+            return resource
+
+    def unregister(self, urn: Any) -> None:
+        """
+        Stop tracking a resource
+        """
+        urn = str(urn)
+        with self._lock:
+            self._resources.pop(urn, None)
+            self._entries.pop(urn, None)
+
+    def __len__(self) -> int:
+        return len(self._resources)
+
+    def __contains__(self, urn: Any) -> bool:
+        return str(urn) in self._resources
+
+    def get(self, urn: Any) -> Optional[TrackedResource]:
+        """
+        Get a tracked resource by URN
+        """
+        return self._resources.get(str(urn))
+
+    def _next(self) -> Optional[TrackedResource]:
+        with self._lock:
+            while self._heap:
+                _, seq, urn = heapq.heappop(self._heap)
+                if self._entries.get(urn) == seq:
+                    del self._entries[urn]
+                    return self._resources[urn]
+            return None
+
+    def _wait_time(self) -> Optional[float]:
+        """
+        Get the number of seconds until the next resource is due, or None if no
+        resources are scheduled
+        """
+        with self._lock:
+            while self._heap:
+                due, seq, urn = self._heap[0]
+                if self._entries.get(urn) == seq:
+                    return max(0.0, due - time.time())
+                heapq.heappop(self._heap)
+            return None
+
+    def _read(self, resource: TrackedResource) -> Tuple[Optional[str], Any]:
+        result = self.provider.read(
+            resource.urn, resource.id, resource.inputs, resource.outputs
+        )
+        if isinstance(result, dict):
+            return result["ID"], result["Outputs"]
+        return result.id, result.outputs
+
+    def _complete(
+        self,
+        resource: TrackedResource,
+        started: float,
+        result: Optional[Tuple[Optional[str], Any]] = None,
+        error: Optional[Exception] = None,
+    ) -> Optional[DriftEvent]:
+        event = None
+        with self._lock:
+            self.reads += 1
+            resource.last_checked = started
+            resource.last_error = None if error is None else str(error)
+            if error is not None:
+                self.errors += 1
+            else:
+                new_id, outputs = result
+                if not new_id:
+                    outputs = None
+                paths = changed_paths(resource.outputs, outputs or {})
+                drifted = outputs is None or bool(paths)
+                resource.change_rate += self.smoothing * (
+                    float(drifted) - resource.change_rate
+                )
+                if drifted:
+                    self.drifted += 1
+                    event = DriftEvent(
+                        resource.urn,
+                        resource.id,
+                        paths,
+                        resource.outputs,
+                        outputs,
+                        started,
+                    )
+                    if self.accept_drift and outputs is not None:
+                        resource.outputs = outputs
+            if self._resources.get(resource.urn) is resource:
+                if event is not None and event.deleted:
+                    # Reading a deleted resource again would report it again
+                    del self._resources[resource.urn]
+                else:
+                    self._schedule(resource)
+        return event
+
+    def refresh_next(self) -> Optional[DriftEvent]:
+        """
+        Read the resource that is due first, without waiting for the budget.
+
+        **Returns:**
+
+        A DriftEvent if the resource drifted, otherwise None. Errors reading the
+        resource are recorded in its `last_error` attribute, and it's read again
+        when it's next due.
+        """
+        resource = self._next()
+        if resource is None:
+            return None
+        started = time.time()
+        try:
+            result = self._read(resource)
+        except Exception as err:
+            return self._complete(resource, started, error=err)
+        except BaseException as err:
+            # e.g. KeyboardInterrupt; keep the resource scheduled before re-raising
+            self._complete(resource, started, error=err)
+            raise
+        return self._complete(resource, started, result)
+
+    def _maybe_save(self) -> None:
+        if (
+            self.state_path is not None
+            and time.monotonic() - self._last_saved >= self.save_interval
+        ):
+            self.save()
+
+    def run(
+        self,
+        callback: Callable[[DriftEvent], None],
+        stop: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        Refresh resources continuously within the budget as they become due, calling
+        `callback` with each DriftEvent, until `stop` is set. Progress is saved before
+        returning.
+        """
+        if stop is None:
+            stop = threading.Event()
+        try:
+            while not stop.is_set():
+                wait = self._wait_time()
+                if wait != 0:
+                    stop.wait(
+                        _POLL_INTERVAL if wait is None else min(wait, _POLL_INTERVAL)
+                    )
+                    continue
+                self.bucket.acquire()
+                event = self.refresh_next()
+                if event is not None:
+                    callback(event)
+                self._maybe_save()
+        finally:
+            if self.state_path is not None:
+                self.save()
+
+    async def events(self, executor: Any = None) -> AsyncIterator[DriftEvent]:
+        """
+        Async iterator over DriftEvents, refreshing resources continuously within the
+        budget as they become due. Reads run in `executor`, by default the event loop's default executor.
+        Iterates until the consumer stops e.g. by breaking out of the loop. Progress is
+        saved when iteration stops.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                wait = self._wait_time()
+                if wait != 0:
+                    await asyncio.sleep(
+                        _POLL_INTERVAL if wait is None else min(wait, _POLL_INTERVAL)
+                    )
+                    continue
+                await self.bucket.acquire_async()
+                event = await loop.run_in_executor(executor, self.refresh_next)
+                if event is not None:
+                    yield event
+                self._maybe_save()
+        finally:
+            if self.state_path is not None:
+                self.save()
+
+    def save(self) -> None:
+        """
+        Save the progress of every tracked resource to `state_path`. Progress saved for
+        resources that haven't been registered since is kept.
+        """
+        with self._lock:
+            state = dict(self._saved_state)
+            for urn, resource in self._resources.items():
+                state[urn] = {
+                    "last_checked": resource.last_checked,
+                    "change_rate": resource.change_rate,
+                }
+        write_atomic(self.state_path, json.dumps({"resources": state}))
+        self._last_saved = time.monotonic()
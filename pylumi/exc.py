@@ -1,6 +1,48 @@
 from typing import Sequence, Dict, Any
 
-from pylumi.ext import PylumiError, PylumiGoError, ContextError, ProviderError
+
+class PylumiError(Exception):
+    """
+    Base class for pylumi errors
+    """
+
+
+class PylumiGoError(PylumiError):
+    """
+    Errors originating from go within Pylumi
+    """
+
+
+class ContextError(PylumiGoError):
+    """
+    Errors from context_ methods
+    """
+
+    def __init__(self, status_code: int, message: str) -> None:
+        self.status_code = status_code
+        self.message = message
+        super().__init__(
+            "Error from pulumi context: %s (status code: %d)" % (message, status_code)
+        )
+
+    def __reduce__(self):
+        return (type(self), (self.status_code, self.message))
+
+
+class ProviderError(PylumiGoError):
+    """
+    Errors from provider_ methods
+    """
+
+    def __init__(self, status_code: int, message: str) -> None:
+        self.status_code = status_code
+        self.message = message
+        super().__init__(
+            "Error from pulumi provider: %s (status code: %d)" % (message, status_code)
+        )
+
+    def __reduce__(self):
+        return (type(self), (self.status_code, self.message))
 
 
 class InvalidURN(PylumiError):
@@ -12,6 +54,27 @@ class InvalidURN(PylumiError):
         self.value = value
         super().__init__(f"Invalid URN value: {repr(value)}.")
 
+    def __reduce__(self):
+        return (type(self), (self.value,))
+
+
+class PluginInstallError(ContextError):
+    """
+    Error when one or more plugins fail to install during a bulk install.
+    """
+
+    def __init__(self, results: Sequence[Dict[str, Any]]) -> None:
+        self.results = results
+        self.failures = [result for result in results if result["Error"]]
+        messages = "; ".join(
+            f"{result['Kind']} plugin {result['Name']}-v{result['Version']}: {result['Error']}"
+            for result in self.failures
+        )
+        super().__init__(-1, f"Failure installing plugins: {messages}.")
+
+    def __reduce__(self):
+        return (type(self), (self.results,))
+
 
 class InvocationValidationError(ProviderError):
     """
@@ -22,3 +85,75 @@ class InvocationValidationError(ProviderError):
         self.member = member
         self.failures = failures
         super().__init__(-1, f"Failure when invoking {member}: {failures}.")
+
+    def __reduce__(self):
+        return (type(self), (self.member, self.failures))
+
+
+class InputValidationError(ProviderError):
+    """
+    Error when inputs fail local validation against the provider schema.
+    """
+
+    def __init__(self, urn: str, failures: Sequence[Dict[str, Any]]) -> None:
+        self.urn = urn
+        self.failures = failures
+        super().__init__(-1, f"Invalid inputs for {urn}: {failures}.")
+
+    def __reduce__(self):
+        return (type(self), (self.urn, self.failures))
+
+
+class PayloadTooLargeError(ProviderError):
+    """
+    Error when a provider call fails and its request was larger than the maximum
+    message size of the transport, see `pylumi.transport`.
+    """
+
+    def __init__(self, method: str, size: int, limit: int, message: str) -> None:
+        self.method = method
+        self.size = size
+        self.limit = limit
+        super().__init__(
+            -1,
+            f"{method} request of {size} bytes exceeds the maximum message size of "
+            f"{limit} bytes: {message}",
+        )
+
+    def __reduce__(self):
+        return (type(self), (self.method, self.size, self.limit, self.message))
+
+
+class ReplayMissError(PylumiError):
+    """
+    Error when replaying recorded traffic and no response was recorded for a request.
+    """
+
+    def __init__(self, provider: str, method: str) -> None:
+        self.provider = provider
+        self.method = method
+        super().__init__(
+            f"No recorded response for {method} request to provider {provider}."
+        )
+
+    def __reduce__(self):
+        return (type(self), (self.provider, self.method))
+
+
+class ForkSafetyError(PylumiError):
+    """
+    Error when the native extension is used in a process forked from a process that
+    had already started the Go runtime.
+    """
+
+    def __init__(self, parent_pid: int) -> None:
+        self.parent_pid = parent_pid
+        super().__init__(
+            f"The Go runtime was started in process {parent_pid} before it forked, "
+            f"so it can't be used in this process. Avoid using pylumi in the parent "
+            f"before forking (see `pylumi.prefork()`) or start processes with the "
+            f'"spawn" method.'
+        )
+
+    def __reduce__(self):
+        return (type(self), (self.parent_pid,))
@@ -1,98 +1,144 @@
-import enum
+import importlib
 import os
+import threading
+from typing import Any
 
-# Used to import null _pylumi name on ReadTheDocs
-try:
-    import _pylumi
-    from _pylumi import (
-        UNKNOWN_KEY,
-        UNKNOWN_BOOL_VALUE,
-        UNKNOWN_NUMBER_VALUE,
-        UNKNOWN_STRING_VALUE,
-        UNKNOWN_ARRAY_VALUE,
-        UNKNOWN_ASSET_VALUE,
-        UNKNOWN_ARCHIVE_VALUE,
-        UNKNOWN_OBJECT_VALUE,
-        UNKNOWN_NULL_VALUE,
-        DIFF_ADD,
-        DIFF_ADD_REPLACE,
-        DIFF_DELETE,
-        DIFF_DELETE_REPLACE,
-        DIFF_UPDATE,
-        DIFF_UPDATE_REPLACE,
-        DiffKind,
-        UnknownValue,
-        PylumiError,
-        PylumiGoError,
-        ContextError,
-        ProviderError,
-    )
-
-except ImportError:
-    if not os.getenv("READTHEDOCS"):
-        raise
-
-    _pylumi = None
-
-    UNKNOWN_KEY = None
-    UNKNOWN_BOOL_VALUE = None
-    UNKNOWN_NUMBER_VALUE = None
-    UNKNOWN_STRING_VALUE = None
-    UNKNOWN_ARRAY_VALUE = None
-    UNKNOWN_ASSET_VALUE = None
-    UNKNOWN_ARCHIVE_VALUE = None
-    UNKNOWN_OBJECT_VALUE = None
-    UNKNOWN_NULL_VALUE = None
-
-    DIFF_ADD = None
-    DIFF_ADD_REPLACE = None
-    DIFF_DELETE = None
-    DIFF_DELETE_REPLACE = None
-    DIFF_UPDATE = None
-    DIFF_UPDATE_REPLACE = None
-
-    class UnknownValue(enum.Enum):
-        """
-        Enum for the UNKNOWN_*_VALUE values
-        """
-
-        BOOL = UNKNOWN_BOOL_VALUE
-        NUMBER = UNKNOWN_NUMBER_VALUE
-        STRING = UNKNOWN_STRING_VALUE
-        ARRAY = UNKNOWN_ARRAY_VALUE
-        ASSET = UNKNOWN_ASSET_VALUE
-        ARCHIVE = UNKNOWN_ARCHIVE_VALUE
-        OBJECT = UNKNOWN_OBJECT_VALUE
-        NULL_ = UNKNOWN_NULL_VALUE
-
-    class DiffKind(enum.Enum):
-        """
-        Enum for diff types
-        """
-
-        ADD = DIFF_ADD
-        ADD_REPLACE = DIFF_ADD_REPLACE
-        DELETE = DIFF_DELETE
-        DELETE_REPLACE = DIFF_DELETE_REPLACE
-        UPDATE = DIFF_UPDATE
-        UPDATE_REPLACE = DIFF_UPDATE_REPLACE
-
-    class PylumiError(Exception):
-        """
-        Base class for pylumi errors
-        """
-
-    class PylumiGoError(PylumiError):
-        """
-        Pylumi error originating from go
-        """
-
-    class ContextError(PylumiGoError):
-        """
-        Error relating to a pylumi context
-        """
-
-    class ProviderError(PylumiGoError):
-        """
-        Error relating to a pylumi provider
-        """
+from pylumi.constants import (
+    UNKNOWN_KEY,
+    UNKNOWN_BOOL_VALUE,
+    UNKNOWN_NUMBER_VALUE,
+    UNKNOWN_STRING_VALUE,
+    UNKNOWN_ARRAY_VALUE,
+    UNKNOWN_ASSET_VALUE,
+    UNKNOWN_ARCHIVE_VALUE,
+    UNKNOWN_OBJECT_VALUE,
+    UNKNOWN_NULL_VALUE,
+    DIFF_ADD,
+    DIFF_ADD_REPLACE,
+    DIFF_DELETE,
+    DIFF_DELETE_REPLACE,
+    DIFF_UPDATE,
+    DIFF_UPDATE_REPLACE,
+    DiffKind,
+    UnknownValue,
+)
+from pylumi.exc import (
+    PylumiError,
+    PylumiGoError,
+    ContextError,
+    ProviderError,
+    ForkSafetyError,
+)
+
+_LOAD_LOCK = threading.Lock()
+
+_MODULE = None
+
+# PID of the process that loaded the extension
+_LOADED_PID = None
+
+# Set in a forked child if the extension was loaded by the parent: the child
+# inherits the loaded module but not the Go runtime's threads, so it can't be used
+_INHERITED_FROM = None
+
+# Incremented in the child each time the process forks. Contexts and providers
+# record the generation they were set up in and re-initialize when it changes.
+_GENERATION = 0
+
+# Constants checked against the values reported by the Go runtime on load
+_CHECKED_CONSTANTS = (
+    "UNKNOWN_KEY",
+    "UNKNOWN_BOOL_VALUE",
+    "UNKNOWN_NUMBER_VALUE",
+    "UNKNOWN_STRING_VALUE",
+    "UNKNOWN_ARRAY_VALUE",
+    "UNKNOWN_ASSET_VALUE",
+    "UNKNOWN_ARCHIVE_VALUE",
+    "UNKNOWN_OBJECT_VALUE",
+    "UNKNOWN_NULL_VALUE",
+    "DIFF_ADD",
+    "DIFF_ADD_REPLACE",
+    "DIFF_DELETE",
+    "DIFF_DELETE_REPLACE",
+    "DIFF_UPDATE",
+    "DIFF_UPDATE_REPLACE",
+)
+
+
+def load():
+    """
+    Import the native extension, booting the embedded Go runtime, if it has not
+    been imported yet, and return it. This happens automatically the first time
+    the extension is used e.g. in `Context.setup()`.
+    """
+    global _MODULE, _LOADED_PID
+
+    if _MODULE is not None:
+        return _MODULE
+
+    if _INHERITED_FROM is not None:
+        raise ForkSafetyError(_INHERITED_FROM)
+
+    with _LOAD_LOCK:
+        if _MODULE is None:
+            module = importlib.import_module("_pylumi")
+            constants = globals()
+            for name in _CHECKED_CONSTANTS:
+                native = getattr(module, name)
+                if native != constants[name]:
+                    raise PylumiError(
+                        f"{name} from the native extension ({native!r}) does not "
+                        f"match pylumi.constants ({constants[name]!r})."
+                    )
+            _LOADED_PID = os.getpid()
+            _MODULE = module
+
+    return _MODULE
+
+
+def is_loaded() -> bool:
+    """
+    Indicate whether the native extension has been loaded
+    """
+    return _MODULE is not None
+
+
+def fork_generation() -> int:
+    """
+    Get the number of times this process's ancestors have forked since pylumi was
+    imported, used to detect that a context or provider was set up in another process.
+    """
+    return _GENERATION
+
+
+def _after_fork_in_child() -> None:
+    global _LOAD_LOCK, _MODULE, _INHERITED_FROM, _GENERATION
+
+    _GENERATION += 1
+    _LOAD_LOCK = threading.Lock()
+    if _MODULE is not None:
+        # Drop the cached attributes so the next use goes through load() and fails
+        _INHERITED_FROM = _LOADED_PID
+        _MODULE = None
+        _pylumi.__dict__.clear()
+
+
+class _LazyExtension:
+    """
+    Stand-in for the _pylumi module that loads it on first attribute access.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(load(), name)
+        self.__dict__[name] = value
+        return value
+
+    def __repr__(self) -> str:
+        state = "loaded" if is_loaded() else "not loaded"
+        return f"<lazy extension module '_pylumi' ({state})>"
+
+
+_pylumi = _LazyExtension()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,130 @@
+"""
+Support for forking after creating contexts and providers, e.g. in prefork servers
+or with the multiprocessing "fork" start method. The Go runtime can't survive a
+fork, so the parent must not use the native extension; instead, contexts and
+providers are set up lazily in each child the first time they're used:
+
+.. code-block:: python
+
+   ctx = pylumi.Context()
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, validate_inputs=True)
+
+   # In the parent, before forking workers
+   pylumi.prefork(providers=[aws])
+
+   # In each worker: sets up the context and configures the provider on first use
+   aws.read(urn, id, {})
+
+Contexts and providers that were set up in a process that forked are also
+set up again in the child, which works as long as the parent never loaded the
+native extension. Otherwise using them raises ForkSafetyError.
+"""
+
+import concurrent.futures
+import multiprocessing
+import os
+import tempfile
+from typing import Any, Dict, Optional, Sequence
+
+from pylumi import ext, schemas, validation
+from pylumi.descriptors import ContextDescriptor, ProviderDescriptor
+from pylumi.exc import ForkSafetyError
+
+# Marks a context or provider to be set up in whichever process uses it first
+PENDING_GENERATION = -1
+
+
+def _warm(
+    ctx_desc: ContextDescriptor,
+    provider_descs: Sequence[ProviderDescriptor],
+    schema_cache_dir: str,
+) -> Dict[str, str]:
+    ctx = ctx_desc.create()
+    ctx.setup()
+    try:
+        versions = {}
+        for desc in provider_descs:
+            provider = desc.create(ctx)
+            version = desc.version or provider.get_plugin_info()["Version"]
+            schemas.load_schema(
+                desc.name,
+                version,
+                lambda: provider.get_schema(decode=False),
+                cache_dir=schema_cache_dir,
+            )
+            versions[desc.key()] = version
+        return versions
+    finally:
+        ctx.teardown()
+
+
+def prefork(
+    contexts: Sequence[Any] = (),
+    providers: Sequence[Any] = (),
+    schema_cache_dir: Optional[str] = None,
+) -> None:
+    """
+    Prepare contexts and providers to be used by processes forked from this one.
+    Provider plugin versions are resolved and schemas fetched once, in a separate
+    process so that the Go runtime isn't started in this one. Schemas are written
+    to the on-disk schema cache, and the schema validators of providers with
+    `validate_inputs` are compiled in this process so children inherit them.
+
+    The contexts, and the contexts of the providers, are then marked to be set up,
+    and the providers to be configured with their configuration, the first time
+    they are used in each child. This process should not use them itself.
+
+    **Parameters:**
+
+    * **contexts** - (optional) Contexts to set up in each child.
+    * **providers** - (optional) Providers to configure in each child.
+    * **schema_cache_dir** - (optional) The schema cache directory, see `pylumi.schemas`.
+    By default the configured directory is used, or if there isn't one a temporary
+    directory is created and set in the environment for children to use.
+
+    **Returns:**
+
+    None
+    """
+    if ext.is_loaded():
+        raise ForkSafetyError(os.getpid())
+
+    if schema_cache_dir is None:
+        schema_cache_dir = schemas.get_cache_dir()
+    if schema_cache_dir is None:
+        schema_cache_dir = tempfile.mkdtemp(prefix="pylumi-schemas-")
+        os.environ[schemas.CACHE_DIR_ENV] = schema_cache_dir
+
+    by_context = {id(ctx): (ctx, []) for ctx in contexts}
+    for provider in providers:
+        by_context.setdefault(id(provider.ctx), (provider.ctx, []))[1].append(provider)
+
+    mp_context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=mp_context) as pool:
+        for ctx, ctx_providers in by_context.values():
+            if not ctx_providers:
+                continue
+            descs = [provider.descriptor() for provider in ctx_providers]
+            versions = pool.submit(
+                _warm, ctx.descriptor(), descs, schema_cache_dir
+            ).result()
+            for provider, desc in zip(ctx_providers, descs):
+                if not provider.validate_inputs:
+                    continue
+                version = versions[desc.key()]
+                provider._validator = validation.get_validator(
+                    provider.name,
+                    version,
+                    lambda: schemas.load_schema(
+                        provider.name,
+                        version,
+                        lambda: provider.get_schema(decode=False),
+                        cache_dir=schema_cache_dir,
+                    ),
+                )
+
+    for ctx, ctx_providers in by_context.values():
+        ctx._setup_generation = PENDING_GENERATION
+        for provider in ctx_providers:
+            provider._configured_inputs = provider.config
+            provider._generation = PENDING_GENERATION
@@ -0,0 +1,108 @@
+"""
+Hooks on the phases of provider calls. The native extension records each phase
+of a call on its `trace` argument: "encode" with the encoded request size,
+"call", and "decode" with the encoded response size. Providers pass it a
+HookChain, which admits the request and then records each phase on the call's
+hooks in this order:
+
+1. Admission into the context's ByteBudget (`pylumi.admission`), which waits in
+   the "encode" phase until the request fits in the budget.
+2. The provider's Watchdog (`pylumi.watchdog`), which tracks the call in flight.
+3. The provider's TransportMonitor (`pylumi.transport`), which measures the call.
+4. The context's Tracer (`pylumi.tracing`), which records the call as a span.
+
+The hooks begin once the request has been admitted, so a call waiting for the
+byte budget isn't in flight yet. If it had to wait, an "admit" phase is recorded
+on the hooks after the "encode" phase.
+"""
+
+import time
+from typing import Any, Optional, Sequence
+
+
+class CallHook:
+    """
+    Base class of the hooks on a single provider call
+    """
+
+    __slots__ = ()
+
+    def begin(self) -> None:
+        """
+        Called when the call starts, after its request has been admitted
+        """
+
+    def record(self, phase: str, start: float, end: float, nbytes: int = 0) -> None:
+        """
+        Record a completed phase of the call
+        """
+
+    def end(self) -> None:
+        """
+        Called when a call that began returns or raises
+        """
+
+
+class HookChain:
+    """
+    The hooks of a single provider call, passed to the native extension as its
+    `trace` argument. Use it as a context manager around the call.
+
+    **Parameters:**
+
+    * **hooks** - The hooks of the call in order. None entries are skipped.
+    * **admission** - (optional) The admission of the call's request into a byte
+    budget. If given, the hooks begin when the request is admitted, otherwise when
+    the chain is entered.
+    """
+
+    __slots__ = ("hooks", "admission", "begun")
+
+    def __init__(
+        self, hooks: Sequence[Optional[CallHook]], admission: Any = None
+    ) -> None:
+        self.hooks = [hook for hook in hooks if hook is not None]
+        self.admission = admission
+        self.begun = False
+
+    def _begin(self) -> None:
+        if self.begun:
+            return
+        self.begun = True
+        for hook in self.hooks:
+            hook.begin()
+
+    def record(self, phase: str, start: float, end: float, nbytes: int = 0) -> None:
+        """
+        Record a completed phase of the call on the hooks, waiting for the request
+        to be admitted after the "encode" phase
+        """
+        admit_start = None
+        if self.admission is not None:
+            if phase == "encode":
+                wait_start = time.time()
+                if self.admission.admit(nbytes):
+                    admit_start = wait_start
+            elif phase == "decode":
+                self.admission.charge(nbytes)
+        self._begin()
+        for hook in self.hooks:
+            hook.record(phase, start, end, nbytes)
+        if admit_start is not None:
+            admit_end = time.time()
+            for hook in self.hooks:
+                hook.record("admit", admit_start, admit_end, nbytes)
+
+    def __enter__(self) -> "HookChain":
+        if self.admission is None:
+            self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        try:
+            if self.begun:
+                for hook in reversed(self.hooks):
+                    hook.end()
+        finally:
+            if self.admission is not None:
+                self.admission.release()
@@ -0,0 +1,211 @@
+"""
+Decoding of provider results with structural sharing. Results decoded through an
+InternPool share one copy of each repeated string, such as property names, regions
+and ARN prefixes. Objects whose values are all immutable, such as tag maps, are
+returned as read-only FrozenDict mappings, and identical objects are shared
+between results. The top-level object of each result stays a plain dictionary:
+
+.. code-block:: python
+
+   pool = pylumi.interning.InternPool(budget=256 * 2 ** 20)
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, intern_pool=pool)
+
+   ...
+   print(pool.stats()["saved_bytes"])
+
+The pool stops taking new entries once it retains `budget` bytes, but it keeps
+serving existing ones.
+"""
+
+import json
+import math
+import sys
+from typing import Any, Dict, List, Tuple, Union
+
+from pylumi import assets
+from pylumi.constants import ARCHIVE_KEY, ASSET_KEY, UNKNOWN_KEY, UnknownValue
+
+
+class FrozenDict(dict):
+    """
+    Read-only, hashable dictionary returned for shared objects. Operations that
+    would modify it raise TypeError; use `dict(value)` to get a mutable copy.
+    """
+
+    __slots__ = ("_hash",)
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} objects are read-only")
+
+    __setitem__ = _readonly
+    __delitem__ = _readonly
+    __ior__ = _readonly
+    clear = _readonly
+    pop = _readonly
+    popitem = _readonly
+    setdefault = _readonly
+    update = _readonly
+
+    def __hash__(self) -> int:
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(frozenset(self.items()))
+            return self._hash
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict.__repr__(self)})"
+
+
+class InternPool:
+    """
+    Pool of strings and immutable objects shared between decoded results. Pools
+    can be shared by several providers. Counters are approximate when a pool is
+    used from several threads at once.
+
+    **Parameters:**
+
+    * **budget** - (optional) The approximate maximum number of bytes retained by the
+    pool, default 64 MiB.
+    """
+
+    def __init__(self, budget: int = 64 * 2**20) -> None:
+        self.budget = budget
+        self._strings: Dict[str, str] = {}
+        self._objects: Dict[Tuple[Any, ...], FrozenDict] = {}
+        self.retained_bytes = 0
+        self.saved_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def intern(self, value: str) -> str:
+        """
+        Get the pooled copy of a string, adding it to the pool if there's room.
+        """
+        pooled = self._strings.get(value)
+        if pooled is not None:
+            self.hits += 1
+            self.saved_bytes += sys.getsizeof(value)
+            return pooled
+        self.misses += 1
+        size = sys.getsizeof(value)
+        if self.retained_bytes + size > self.budget:
+            self.rejected += 1
+            return value
+        self._strings[value] = value
+        self.retained_bytes += size
+        return value
+
+    def _intern_list(self, values: List[Any]) -> None:
+        for idx, value in enumerate(values):
+            if type(value) is str:
+                values[idx] = self.intern(value)
+            elif type(value) is list:
+                self._intern_list(value)
+
+    def _share(self, items: List[Tuple[str, Any]], kinds: List[Any]) -> FrozenDict:
+        # Values that compare equal but differ in type e.g. 1 and True, or 0.0 and
+        # -0.0, must not be shared, so the key includes the type of each value (the
+        # sign of zero floats), or the identity of nested objects since they
+        # compare like dictionaries
+        key = (tuple(items), tuple(kinds))
+        pooled = self._objects.get(key)
+        if pooled is not None:
+            self.hits += 1
+            self.saved_bytes += sys.getsizeof(pooled)
+            return pooled
+        self.misses += 1
+        value = FrozenDict(items)
+        size = sys.getsizeof(value) + sys.getsizeof(key[0]) + sys.getsizeof(key[1])
+        if self.retained_bytes + size > self.budget:
+            self.rejected += 1
+            return value
+        self._objects[key] = value
+        self.retained_bytes += size
+        return value
+
+    def _object_pairs_hook(self, pairs: List[Tuple[str, Any]]) -> Any:
+        if len(pairs) == 1:
+            key, value = pairs[0]
+            if key == UNKNOWN_KEY:
+                return UnknownValue(value)
+            if key in (ASSET_KEY, ARCHIVE_KEY):
+                return assets.from_json({key: value})
+        intern = self.intern
+        items = []
+        kinds = []
+        immutable = True
+        for key, value in pairs:
+            value_type = type(value)
+            if value_type is str:
+                value = intern(value)
+            elif value_type is list:
+                self._intern_list(value)
+                immutable = False
+            elif value_type is dict or value_type is assets.Archive:
+                # Archives may hold a dictionary of members, so they aren't hashable
+                immutable = False
+            items.append((intern(key), value))
+            if value_type is FrozenDict:
+                kinds.append(id(value))
+            elif value_type is float and value == 0.0:
+                kinds.append((float, math.copysign(1.0, value)))
+            else:
+                kinds.append(value_type)
+        if immutable:
+            return self._share(items, kinds)
+        return dict(items)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """
+        Decode JSON returned from the Go runtime, converting unknown values and
+        sharing strings and objects through this pool.
+        """
+        value = json.loads(data, object_pairs_hook=self._object_pairs_hook)
+        value_type = type(value)
+        if value_type is FrozenDict:
+            # Callers commonly modify top-level objects e.g. check() results
+            value = dict(value)
+        elif value_type is list:
+            self._intern_list(value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get counters describing this pool.
+
+        **Returns:**
+
+        A dictionary with the keys `strings` and `objects` (the number of pooled
+        strings and objects), `retained_bytes` (the approximate memory used by the
+        pool), `saved_bytes` (the approximate memory saved by returning pooled values
+        instead of new copies), `hits`, `misses`, `rejected` (misses not added to the
+        pool because it was over budget) and `budget`.
+        """
+        return {
+            "strings": len(self._strings),
+            "objects": len(self._objects),
+            "retained_bytes": self.retained_bytes,
+            "saved_bytes": self.saved_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "budget": self.budget,
+        }
+
+    def clear(self) -> None:
+        """
+        Remove all pooled values and reset counters. Values already returned from
+        the pool are unaffected.
+        """
+        self._strings.clear()
+        self._objects.clear()
+        self.retained_bytes = 0
+        self.saved_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
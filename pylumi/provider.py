@@ -1,8 +1,29 @@
+import hashlib
 import json
-from typing import Any, Sequence, Dict, Optional, Tuple
-
-from pylumi.exc import InvocationValidationError
+import os
+import time
+from typing import TYPE_CHECKING, Any, Sequence, Dict, Optional, Tuple, Union
+
+from pylumi import ext, streaming
+from pylumi.descriptors import ProviderDescriptor
+from pylumi.exc import InputValidationError, InvocationValidationError, ProviderError
+from pylumi.hooks import HookChain
+from pylumi.interning import InternPool
 from pylumi.ext import _pylumi
+from pylumi.results import CreateResult, DiffResult, ReadResult, UpdateResult
+from pylumi.urn import URN
+
+if TYPE_CHECKING:
+    # Imported when used, to keep `import pylumi` fast
+    from pylumi.store import StateStore
+    from pylumi.transport import CallMeasurement, TransportMonitor
+    from pylumi.validation import SchemaValidator
+    from pylumi.watchdog import Watchdog
+
+# Provider methods that send no encoded request, so there's nothing to admit
+_REQUESTLESS_METHODS = frozenset(
+    {"get_schema", "get_plugin_info", "signal_cancellation"}
+)
 
 
 class Provider:
@@ -10,6 +31,29 @@ class Provider:
     A pulumi provider logically maps to a real-world service or API, and in Pulumi
     terms maps to a resource provider process running locally that Pulumi communicates
     with via a gRPC interface. Common examples would be AWS or GCP.
+
+    If `typed_results` is True, diff(), diff_config(), create(), read() and update()
+    return DiffResult, CreateResult, ReadResult and UpdateResult objects instead of
+    dictionaries. Their property bags are decoded lazily on first access.
+
+    If `validate_inputs` is True, inputs to check(), create() and update() are first
+    validated against the provider schema in-process, see `pylumi.validation`.
+
+    If `intern_pool` is given, results of check(), diff(), create(), read(), update()
+    and invoke() are decoded through that `pylumi.interning.InternPool`, sharing
+    repeated strings and immutable objects between results. Property bags of typed
+    results are then decoded eagerly. Nested objects whose values are all scalars
+    are returned as read-only `pylumi.interning.FrozenDict` mappings; copy them
+    with `dict()` before modifying them. Top-level results are plain dictionaries.
+
+    If `transport` is given, the latency and payload sizes of calls are recorded in
+    that `pylumi.transport.TransportMonitor`.
+
+    If `state_store` is given, the results of create(), read(), update() and delete()
+    are written through to that `pylumi.store.StateStore`.
+
+    If `watchdog` is given, calls in flight are tracked by that
+    `pylumi.watchdog.Watchdog`, which reports calls that take too long.
     """
 
     def __init__(
@@ -18,6 +62,12 @@ class Provider:
         name: str,
         config: Optional[Dict[str, Any]] = None,
         version: Optional[str] = None,
+        typed_results: bool = False,
+        validate_inputs: bool = False,
+        intern_pool: Optional[InternPool] = None,
+        transport: Optional["TransportMonitor"] = None,
+        state_store: Optional["StateStore"] = None,
+        watchdog: Optional["Watchdog"] = None,
     ) -> None:
         if config is None:
             config = {}
@@ -26,15 +76,161 @@ class Provider:
         self.ctx = ctx
         self.config = config
         self.version = version
+        self.typed_results = typed_results
+        self.validate_inputs = validate_inputs
+        self.intern_pool = intern_pool
+        self.transport = transport
+        self.state_store = state_store
+        self.watchdog = watchdog
+        self._plugin_pid = None
+        self._validator = None
+        # Configuration to apply again if this provider is used in a forked child
+        self._configured_inputs = None
+        self._generation = ext.fork_generation()
+
+    def _reinitialize(self) -> None:
+        """
+        Set up the context and configure this provider again in this process, if
+        they were set up in another process i.e. before this process forked.
+        """
+        self._generation = ext.fork_generation()
+        self._plugin_pid = None
+        self.ctx._ensure_setup()
+        if self._configured_inputs is not None:
+            self.configure(self._configured_inputs)
 
-    def configure(self, inputs: Optional[Dict[str, Any]] = None) -> None:
+    def _call(self, method: str, *args, urn: Any = None, **kwargs) -> Any:
+        """
+        Call the `provider_<method>` function of the native extension. The first two
+        positional arguments must be the context and provider names. If the context
+        has a recorder, the call is written to it.
         """
-        Configure this provider with the given configuration.
+        if self._generation != ext.fork_generation():
+            self._reinitialize()
+        recorder = self.ctx.recorder
+        if recorder is None:
+            return self._traced_call(method, *args, urn=urn, **kwargs)
+
+        start = time.time()
+        try:
+            result = self._traced_call(method, *args, urn=urn, **kwargs)
+        except ProviderError as err:
+            recorder.record(
+                self.name,
+                method,
+                args[2:],
+                start,
+                time.time() - start,
+                error=err,
+                kwargs=kwargs,
+            )
+            raise
+        recorder.record(
+            self.name,
+            method,
+            args[2:],
+            start,
+            time.time() - start,
+            result=result,
+            kwargs=kwargs,
+        )
+        return result
+
+    def _traced_call(self, method: str, *args, urn: Any = None, **kwargs) -> Any:
+        """
+        Call the `provider_<method>` function of the native extension through the
+        hooks of the call, see `pylumi.hooks`. The call is traced if the context has
+        a tracer.
+        """
+        func = getattr(_pylumi, f"provider_{method}")
+        admission = None
+        if self.ctx.byte_budget is not None and method not in _REQUESTLESS_METHODS:
+            from pylumi.admission import Admission
+
+            admission = Admission(self.ctx.byte_budget)
+        call = None
+        if self.watchdog is not None:
+            call = self.watchdog.track(self, method, urn)
+        measurement = None
+        if self.transport is not None:
+            measurement = self.transport.measure()
+        tracer = self.ctx.tracer
+        if tracer is None:
+            if admission is None and call is None and measurement is None:
+                return func(*args, **kwargs)
+            hooks = HookChain([call, measurement], admission)
+            return self._hooked_call(method, func, hooks, measurement, *args, **kwargs)
+
+        attributes = {"provider": self.name, "method": method}
+        if urn is not None:
+            if not isinstance(urn, URN):
+                urn = URN(str(urn))
+            attributes["urn"] = str(urn)
+            attributes["type"] = urn.type
+
+        span = tracer.start_span(f"provider.{method}", attributes)
+        with span, tracer.native_call(span):
+            hooks = HookChain([call, measurement, span], admission)
+            result = self._hooked_call(
+                method, func, hooks, measurement, *args, **kwargs
+            )
+            if method != "teardown":
+                span.set_attribute("plugin_pid", self.plugin_pid())
+            return result
+
+    def _hooked_call(
+        self,
+        method: str,
+        func: Any,
+        hooks: HookChain,
+        measurement: Optional["CallMeasurement"],
+        *args,
+        **kwargs,
+    ) -> Any:
+        """
+        Call a function of the native extension with `hooks` as its trace, recording
+        the call in `transport` if it's measured
+        """
+        with hooks:
+            try:
+                result = func(*args, trace=hooks, **kwargs)
+            except ProviderError as err:
+                if measurement is None:
+                    raise
+                error = self.transport.complete(method, measurement, err)
+                if error is err:
+                    raise
+                raise error from err
+        if measurement is not None:
+            self.transport.complete(method, measurement)
+        return result
+
+    def config_fingerprint(self, inputs: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Get a hash of this provider's version and configuration, or of `inputs` if
+        given instead.
+        """
+        if inputs is None:
+            inputs = self.config
+        encoded = json.dumps([self.version, inputs], sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode()).hexdigest()
+
+    def configure(
+        self, inputs: Optional[Dict[str, Any]] = None, check: bool = False
+    ) -> None:
+        """
+        Configure this provider with the given configuration. Providers of the same
+        context with the same name share a plugin, so if the plugin has already been
+        configured with the same version and configuration, by this or another
+        Provider object, this does nothing.
 
         **Parameters:**
 
         * **inputs** - (optional) configure this provider with the given configuration
         instead of the one passed in the constructor.
+        * **check** - (optional) validate the configuration with check_config() before
+        applying it, and apply the checked configuration. Like configuration itself,
+        this only happens if the configuration changed. Default False.
 
         **Returns:**
 
@@ -48,7 +244,32 @@ class Provider:
         """
         if inputs is None:
             inputs = self.config
-        _pylumi.provider_configure(self.ctx.name, self.name, self.version, inputs)
+        if self._generation != ext.fork_generation():
+            self._reinitialize()
+        # Configuration applied before this process forked doesn't count
+        fingerprint = (ext.fork_generation(), self.config_fingerprint(inputs))
+        if self.ctx._configured.get(self.name) == fingerprint:
+            self._configured_inputs = inputs
+            return
+
+        applied = inputs
+        if check:
+            urn = URN(f"pulumi:providers:{self.name}", "default")
+            checked, failures = self.check_config(
+                urn, self._configured_inputs or {}, inputs
+            )
+            if failures:
+                raise InputValidationError(str(urn), failures)
+            applied = checked
+        self._call(
+            "configure",
+            self.ctx.name,
+            self.name,
+            self.version,
+            applied,
+        )
+        self._configured_inputs = inputs
+        self.ctx._configured[self.name] = fingerprint
 
     def teardown(self) -> None:
         """
@@ -58,6 +279,13 @@ class Provider:
 
         None
         """
+        self._configured_inputs = None
+        self._plugin_pid = None
+        self.ctx._configured.pop(self.name, None)
+        if self._generation != ext.fork_generation():
+            # Configured in another process, so there's nothing to tear down in this one
+            self._generation = ext.fork_generation()
+            return
         _pylumi.provider_teardown(self.ctx.name, self.name)
 
     def get_plugin_info(self) -> Dict[str, Any]:
@@ -74,7 +302,85 @@ class Provider:
 
         Reference: `GetProviderInfo <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_get_plugin_info(self.ctx.name, self.name)
+        return self._call(
+            "get_plugin_info",
+            self.ctx.name,
+            self.name,
+        )
+
+    def plugin_pid(self) -> Optional[int]:
+        """
+        Get the process ID of the plugin process backing this provider.
+
+        **Returns:**
+
+        The integer process ID, or None if it can't be determined.
+        """
+        if self._generation != ext.fork_generation():
+            self._reinitialize()
+        if self._plugin_pid is None:
+            pid = _pylumi.provider_get_plugin_pid(self.ctx.name, self.name)
+            # The Go runtime reports -1 if it can't find the plugin process; look
+            # it up again next time rather than caching that
+            if pid < 0:
+                return None
+            self._plugin_pid = pid
+        return self._plugin_pid
+
+    def descriptor(self) -> ProviderDescriptor:
+        """
+        Get a picklable description of this provider, which can be used to create an
+        equivalent provider in another process.
+
+        **Returns:**
+
+        A ProviderDescriptor object.
+        """
+        return ProviderDescriptor(
+            self.name,
+            self.config,
+            self.version,
+            {
+                "typed_results": self.typed_results,
+                "validate_inputs": self.validate_inputs,
+            },
+        )
+
+    def validator(self) -> "SchemaValidator":
+        """
+        Get the schema validator for this provider. Validators are cached per plugin
+        version, so the schema is only fetched once per version and process. The
+        schema is also read from and written to the on-disk schema cache if one is
+        configured, see `pylumi.schemas`.
+
+        **Returns:**
+
+        A SchemaValidator object.
+        """
+        if self._validator is None:
+            from pylumi import schemas, validation
+
+            version = self.version or self.get_plugin_info()["Version"]
+            self._validator = validation.get_validator(
+                self.name,
+                version,
+                lambda: schemas.load_schema(
+                    self.name, version, lambda: self.get_schema(decode=False)
+                ),
+            )
+        return self._validator
+
+    def _raw_properties(self) -> bool:
+        # Typed results decode property bags lazily, unless they're decoded eagerly
+        # through the intern pool
+        return self.typed_results and self.intern_pool is None
+
+    def _validate(self, urn: Any, inputs: Dict[str, Any]) -> Sequence[Dict[str, Any]]:
+        if not self.validate_inputs:
+            return ()
+        if not isinstance(urn, URN):
+            urn = URN(str(urn))
+        return self.validator().validate_resource(urn.type, inputs)
 
     def get_schema(self, version: int = 0, decode: bool = True) -> Dict[str, Any]:
         """
@@ -97,7 +403,7 @@ class Provider:
 
         Reference: `GetSchema <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        res = _pylumi.provider_get_schema(self.ctx.name, self.name, version)
+        res = self._call("get_schema", self.ctx.name, self.name, version)
         return json.loads(res) if decode else res
 
     def check_config(
@@ -128,8 +434,16 @@ class Provider:
 
         Reference: `CheckConfig <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_check_config(
-            self.ctx.name, self.name, self.version, str(urn), olds, news, allow_unknowns
+        return self._call(
+            "check_config",
+            self.ctx.name,
+            self.name,
+            self.version,
+            str(urn),
+            olds,
+            news,
+            allow_unknowns,
+            urn=urn,
         )
 
     def diff_config(
@@ -139,7 +453,7 @@ class Provider:
         news: Dict[str, Any],
         allow_unknowns: bool = False,
         ignore_changes: Sequence[str] = (),
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], DiffResult]:
         """
         Diff the given provider configurations.
 
@@ -152,7 +466,8 @@ class Provider:
 
         **Returns:**
 
-        A dictionary response containing information about the diff.
+        A dictionary response containing information about the diff, or a DiffResult
+        object if typed results are enabled.
 
         **Pulumi Docs:**
 
@@ -160,7 +475,8 @@ class Provider:
 
         Reference: `DiffConfig <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_diff_config(
+        result = self._call(
+            "diff_config",
             self.ctx.name,
             self.name,
             self.version,
@@ -169,7 +485,11 @@ class Provider:
             news,
             allow_unknowns,
             ignore_changes,
+            urn=urn,
         )
+        if self.typed_results:
+            return DiffResult.from_dict(result)
+        return result
 
     def check(
         self,
@@ -199,8 +519,19 @@ class Provider:
 
         Reference: `Check <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_check(
-            self.ctx.name, self.name, str(urn), olds, news, allow_unknowns
+        failures = self._validate(urn, news)
+        if failures:
+            return None, failures
+        return self._call(
+            "check",
+            self.ctx.name,
+            self.name,
+            str(urn),
+            olds,
+            news,
+            allow_unknowns,
+            urn=urn,
+            pool=self.intern_pool,
         )
 
     def diff(
@@ -211,7 +542,7 @@ class Provider:
         news: Dict[str, Any],
         allow_unknowns: bool = False,
         ignore_changes: Sequence[str] = (),
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], DiffResult]:
         """
         Diff the given resource configurations.
 
@@ -225,7 +556,8 @@ class Provider:
 
         **Returns:**
 
-        A dictionary response containing information about the diff.
+        A dictionary response containing information about the diff, or a DiffResult
+        object if typed results are enabled.
 
         **Pulumi Docs:**
 
@@ -233,7 +565,8 @@ class Provider:
 
         Reference: `Diff <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_diff(
+        result = self._call(
+            "diff",
             self.ctx.name,
             self.name,
             str(urn),
@@ -242,11 +575,16 @@ class Provider:
             news,
             allow_unknowns,
             ignore_changes,
+            urn=urn,
+            pool=self.intern_pool,
         )
+        if self.typed_results:
+            return DiffResult.from_dict(result)
+        return result
 
     def create(
         self, urn: str, news: Dict[str, Any], timeout: int = 60, preview: bool = False
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], CreateResult]:
         """
         Create a pulumi resource.
 
@@ -266,19 +604,40 @@ class Provider:
         * **Properties** - A dictonary of properties of the new created resource.
         * **Status** - An integer status code for the operation
 
+        If typed results are enabled, a CreateResult object instead.
+
         **Pulumi Docs:**
 
         Create allocates a new instance of the provided resource and returns its unique resource.ID.
 
         Reference: `Create <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_create(
-            self.ctx.name, self.name, str(urn), news, timeout, preview
+        failures = self._validate(urn, news)
+        if failures:
+            raise InputValidationError(str(urn), failures)
+        result = self._call(
+            "create",
+            self.ctx.name,
+            self.name,
+            str(urn),
+            news,
+            timeout,
+            preview,
+            urn=urn,
+            raw_properties=self._raw_properties(),
+            pool=self.intern_pool,
         )
+        if self.state_store is not None and not preview:
+            self.state_store.put(
+                urn, self.name, result["ID"], news, result["Properties"]
+            )
+        if self.typed_results:
+            return CreateResult.from_dict(result)
+        return result
 
     def read(
         self, urn: str, id: str, inputs: Dict[str, Any], state: Dict[str, Any]
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], ReadResult]:
         """
         Read the state of a pulumi resource.
 
@@ -298,6 +657,8 @@ class Provider:
         * **Outputs** - The dictionary of outputs for the read resource.
         * **Status** - An integer status code from the operation.
 
+        If typed results are enabled, a ReadResult object instead.
+
         **Pulumi Docs:**
 
         Read the current live state associated with a resource.  Enough state must be include in the
@@ -307,9 +668,28 @@ class Provider:
 
         Reference: `Read <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_read(
-            self.ctx.name, self.name, str(urn), id, inputs, state
+        result = self._call(
+            "read",
+            self.ctx.name,
+            self.name,
+            str(urn),
+            id,
+            inputs,
+            state,
+            urn=urn,
+            raw_properties=self._raw_properties(),
+            pool=self.intern_pool,
         )
+        if self.state_store is not None:
+            if result["ID"]:
+                self.state_store.put(
+                    urn, self.name, result["ID"], result["Inputs"], result["Outputs"]
+                )
+            else:
+                self.state_store.delete(urn)
+        if self.typed_results:
+            return ReadResult.from_dict(result)
+        return result
 
     def update(
         self,
@@ -318,7 +698,7 @@ class Provider:
         olds: Dict[str, Any],
         news: Dict[str, Any],
         timeout: int = 60,
-    ) -> Dict[str, Any]:
+    ) -> Union[Dict[str, Any], UpdateResult]:
         """
         Update the state of a pulumi resource.
 
@@ -338,15 +718,35 @@ class Provider:
         * **Properties** - A dictonary of properties of the new created resource.
         * **Status** - An integer status code for the operation
 
+        If typed results are enabled, an UpdateResult object instead.
+
         **Pulumi Docs:**
 
         Update updates an existing resource with new values.
 
         Reference: `Update <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_update(
-            self.ctx.name, self.name, str(urn), id, olds, news, timeout
+        failures = self._validate(urn, news)
+        if failures:
+            raise InputValidationError(str(urn), failures)
+        result = self._call(
+            "update",
+            self.ctx.name,
+            self.name,
+            str(urn),
+            id,
+            olds,
+            news,
+            timeout,
+            urn=urn,
+            raw_properties=self._raw_properties(),
+            pool=self.intern_pool,
         )
+        if self.state_store is not None:
+            self.state_store.put(urn, self.name, id, news, result["Properties"])
+        if self.typed_results:
+            return UpdateResult.from_dict(result)
+        return result
 
     def delete(self, urn: str, id: str, news: Dict[str, Any], timeout: int = 60) -> int:
         """
@@ -369,9 +769,19 @@ class Provider:
 
         Reference: `Delete <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_delete(
-            self.ctx.name, self.name, str(urn), id, news, timeout
+        status = self._call(
+            "delete",
+            self.ctx.name,
+            self.name,
+            str(urn),
+            id,
+            news,
+            timeout,
+            urn=urn,
         )
+        if self.state_store is not None:
+            self.state_store.delete(urn)
+        return status
 
     def invoke(self, member: str, args: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -392,11 +802,64 @@ class Provider:
 
         Reference: `Invoke <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        result, errors = _pylumi.provider_invoke(self.ctx.name, self.name, member, args)
+        result, errors = self._call(
+            "invoke", self.ctx.name, self.name, member, args, pool=self.intern_pool
+        )
         if errors:
             raise InvocationValidationError(member, errors)
         return result
 
+    def invoke_iter(
+        self,
+        member: str,
+        args: Dict[str, Any],
+        path: str,
+        spill_threshold: Optional[int] = streaming.DEFAULT_SPILL_THRESHOLD,
+        spill_dir: Optional[str] = None,
+    ) -> streaming.InvokeStream:
+        """
+        Invoke a function in the provider, decoding the elements of an array in the
+        result incrementally. Use this instead of `invoke()` for functions that can
+        return very large lists.
+
+        **Parameters:**
+
+        * **member** - function name
+        * **args** - function arguments, as a dictionary
+        * **path** - The dot-separated path of the array in the result e.g. "ids". A
+        missing or null value is treated as an empty array.
+        * **spill_threshold** - (optional) The maximum number of bytes of encoded
+        elements kept in memory; larger results are written to a temporary file. None
+        keeps all elements in memory. Default 16 MiB.
+        * **spill_dir** - (optional) The directory spill files are written to, by
+        default the system temporary directory.
+
+        **Returns:**
+
+        An InvokeStream iterating over the decoded elements of the array, with the
+        rest of the result in its `rest` attribute. Close the stream, or use it as a
+        context manager, to delete its spill file if it isn't exhausted.
+        """
+        if spill_threshold is None or self.ctx.recorder is not None:
+            # Recorded results must not refer to spill files
+            spill_threshold = -1
+        elements, spill_path, rest, errors = self._call(
+            "invoke_stream",
+            self.ctx.name,
+            self.name,
+            member,
+            args,
+            path,
+            spill_threshold=spill_threshold,
+            spill_dir=spill_dir or "",
+            pool=self.intern_pool,
+        )
+        if errors:
+            if spill_path is not None:
+                os.unlink(spill_path)
+            raise InvocationValidationError(member, errors)
+        return streaming.InvokeStream(rest, elements, spill_path, self.intern_pool)
+
     def signal_cancellation(self) -> None:
         """
         Signal cancellation to the provider.
@@ -415,7 +878,11 @@ class Provider:
 
         Reference: `SignalCancellation <https://github.com/pulumi/pulumi/sdk/v2/go/common/resource/provider.go>`_
         """
-        return _pylumi.provider_signal_cancellation(self.ctx.name, self.name)
+        return self._call(
+            "signal_cancellation",
+            self.ctx.name,
+            self.name,
+        )
 
     def __enter__(self) -> "Provider":
         self.configure()
@@ -0,0 +1,281 @@
+import collections
+import gzip
+import hashlib
+import json
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from pylumi.descriptors import ContextDescriptor
+from pylumi.exc import ProviderError, ReplayMissError
+from pylumi.provider import Provider
+from pylumi.serialization import json_default, json_object_hook
+from pylumi.streaming import InvokeStream
+
+# Keyword arguments of native extension calls that change the shape of the
+# result, with the values under which they're left out of request keys. Those
+# are the values recordings made before they were keyed were made with.
+SHAPE_KWARGS = {"raw_properties": False, "spill_threshold": -1}
+
+
+def canonical_dumps(value: Any) -> str:
+    """
+    Encode a value as compact JSON with sorted keys, so that equal values always
+    have the same encoding. Supports unknown values and bytes.
+    """
+    return json.dumps(
+        value, default=json_default, sort_keys=True, separators=(",", ":")
+    )
+
+
+def request_key(
+    provider: str,
+    method: str,
+    args: Sequence[Any],
+    kwargs: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Return the key that requests are matched by when replaying traffic: a hash of
+    the provider name, method, canonicalized arguments and those keyword arguments
+    that change the shape of the result, see `SHAPE_KWARGS`.
+    """
+    key = [provider, method, list(args)]
+    options = {
+        name: kwargs[name]
+        for name, default in SHAPE_KWARGS.items()
+        if kwargs and name in kwargs and kwargs[name] != default
+    }
+    if options:
+        key.append(options)
+    encoded = canonical_dumps(key)
+    return hashlib.sha1(encoded.encode()).hexdigest()
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+class TrafficRecorder:
+    """
+    Append-only log of provider requests and responses. Pass one to a Context to
+    record all provider traffic going through it:
+
+    .. code-block:: python
+
+       with pylumi.Context(recorder=pylumi.replay.TrafficRecorder("traffic.jsonl.gz")) as ctx:
+           ...
+
+    Each line of the log is a compact JSON object with the keys:
+
+    - **k** - the request key, see `request_key()`.
+    - **p** - the provider name.
+    - **m** - the method name.
+    - **a** - the method arguments.
+    - **r** - the result, if the call succeeded.
+    - **e** - `[status_code, message]` if the call failed.
+    - **t** - the start time of the call, in seconds since the epoch.
+    - **d** - the duration of the call in seconds.
+
+    The log is gzipped if `path` ends with `.gz`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = _open(path, "a")
+
+    def record(
+        self,
+        provider: str,
+        method: str,
+        args: Sequence[Any],
+        start: float,
+        duration: float,
+        result: Any = None,
+        error: Optional[ProviderError] = None,
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Append a single request and its response or error to the log. `kwargs` are
+        the keyword arguments of the call, see `request_key()`.
+        """
+        entry = {
+            "k": request_key(provider, method, args, kwargs),
+            "p": provider,
+            "m": method,
+            "a": list(args),
+            "t": start,
+            "d": duration,
+        }
+        if error is None:
+            entry["r"] = result
+        else:
+            entry["e"] = [
+                getattr(error, "status_code", -1),
+                getattr(error, "message", str(error)),
+            ]
+        line = canonical_dumps(entry) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        """
+        Close the underlying log file.
+        """
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self) -> "TrafficRecorder":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+
+def read_traffic(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the entries of a log written by TrafficRecorder, in the order
+    they were recorded.
+    """
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line, object_hook=json_object_hook)
+
+
+class ReplayProvider(Provider):
+    """
+    A Provider that serves responses from recorded traffic instead of calling a
+    plugin. Created via `ReplayContext.provider()`. Requests are matched on method
+    and canonicalized arguments; if the same request was recorded several times
+    the responses are served in the recorded order, repeating the last one once
+    they run out.
+    """
+
+    def _call(self, method: str, *args, urn: Any = None, **kwargs) -> Any:
+        if method == "configure":
+            return None
+        entry = self.ctx._lookup(self.name, method, args[2:], kwargs)
+        if self.ctx.latency_scale:
+            time.sleep(entry["d"] * self.ctx.latency_scale)
+        if "e" in entry:
+            status_code, message = entry["e"]
+            raise ProviderError(status_code, message)
+        result = entry["r"]
+        if method in ("check", "check_config", "invoke", "invoke_stream"):
+            return tuple(result)
+        return result
+
+    def invoke_iter(
+        self,
+        member: str,
+        args: Dict[str, Any],
+        path: str,
+        spill_threshold: Optional[int] = None,
+        spill_dir: Optional[str] = None,
+    ) -> InvokeStream:
+        # Recorded results never refer to spill files
+        return super().invoke_iter(member, args, path, None, spill_dir)
+
+    def teardown(self) -> None:
+        pass
+
+    def plugin_pid(self) -> Optional[int]:
+        return None
+
+
+class ReplayContext:
+    """
+    A stand-in for Context whose providers replay traffic recorded with a
+    TrafficRecorder, without starting the Go runtime or any plugins. This makes
+    it possible to benchmark code built on pylumi against realistic traffic
+    without a network.
+
+    **Parameters:**
+
+    * **path** - Path to a log written by TrafficRecorder.
+    * **latency_scale** - (optional) If given, each response is delayed by its
+    recorded duration multiplied by this factor e.g. 1.0 to reproduce the
+    original latencies. By default responses are served immediately.
+    * **name** - (optional) A name for this context.
+    """
+
+    tracer = None
+    recorder = None
+    byte_budget = None
+
+    def __init__(
+        self,
+        path: str,
+        latency_scale: Optional[float] = None,
+        name: Optional[str] = None,
+    ) -> None:
+        if name is None:
+            name = uuid.uuid4().hex
+        self.name = name
+        self.path = path
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._configured: Dict[str, Tuple[int, str]] = {}
+        self._responses = collections.defaultdict(collections.deque)
+        for entry in read_traffic(path):
+            self._responses[entry["k"]].append(entry)
+
+    def _lookup(
+        self,
+        provider: str,
+        method: str,
+        args: Sequence[Any],
+        kwargs: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        key = request_key(provider, method, args, kwargs)
+        with self._lock:
+            responses = self._responses.get(key)
+            if not responses:
+                raise ReplayMissError(provider, method)
+            if len(responses) > 1:
+                return responses.popleft()
+            return responses[0]
+
+    def provider(
+        self,
+        name: str,
+        config: Optional[Dict[str, Any]] = None,
+        version: Optional[str] = None,
+        **kwargs,
+    ) -> ReplayProvider:
+        """
+        Get a ReplayProvider object with the given name. Keyword arguments are passed
+        to the Provider constructor.
+        """
+        if config is None:
+            config = {}
+        return ReplayProvider(self, name, config, version, **kwargs)
+
+    def descriptor(self) -> ContextDescriptor:
+        """
+        Get a picklable description of this context, which can be used to create an
+        equivalent context in another process.
+        """
+        return ContextDescriptor(
+            ReplayContext, (self.path,), {"latency_scale": self.latency_scale}
+        )
+
+    def setup(self) -> None:
+        pass
+
+    def teardown(
+        self, grace_period: Optional[float] = None
+    ) -> Sequence[Dict[str, Any]]:
+        return []
+
+    def __enter__(self) -> "ReplayContext":
+        self.setup()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.teardown()
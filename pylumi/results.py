@@ -0,0 +1,321 @@
+import collections.abc
+import json
+import sys
+from typing import Any, Dict, FrozenSet, Iterator, Optional, Sequence, Tuple
+
+from pylumi import assets
+from pylumi.constants import UNKNOWN_KEY, DiffChanges, DiffKind, UnknownValue
+
+_DIFF_KINDS = {kind.value: kind for kind in DiffKind}
+
+_DIFF_CHANGES = {changes.value: changes for changes in DiffChanges}
+
+_REPLACE_KINDS = frozenset(
+    {DiffKind.ADD_REPLACE, DiffKind.DELETE_REPLACE, DiffKind.UPDATE_REPLACE}
+)
+
+
+def _object_hook(value: Dict[str, Any]) -> Any:
+    if len(value) == 1:
+        if UNKNOWN_KEY in value:
+            return UnknownValue(value[UNKNOWN_KEY])
+        asset = assets.from_json(value)
+        if asset is not None:
+            return asset
+    return value
+
+
+def decode_properties(value: Any) -> Optional[Dict[str, Any]]:
+    """
+    Decode a property map that was returned from Go as an encoded JSON string.
+    Values that have already been decoded are returned as-is.
+    """
+    if isinstance(value, (str, bytes)):
+        return json.loads(value, object_hook=_object_hook)
+    return value
+
+
+def _lazy_properties(slot: str, doc: str) -> property:
+    def get(self):
+        value = getattr(self, slot)
+        if isinstance(value, (str, bytes)):
+            value = decode_properties(value)
+            setattr(self, slot, value)
+        return value
+
+    return property(get, doc=doc)
+
+
+def _keys(keys: Optional[Sequence[str]]) -> Tuple[str, ...]:
+    if not keys:
+        return ()
+    return tuple(map(sys.intern, keys))
+
+
+class DetailedDiff(collections.abc.Mapping):
+    """
+    Read-only mapping of property paths to the DiffKind of the change to that
+    property, decoded from the `DetailedDiff` field of a diff response.
+    """
+
+    __slots__ = ("_kinds", "_input_diffs")
+
+    def __init__(
+        self,
+        kinds: Dict[str, DiffKind],
+        input_diffs: FrozenSet[str] = frozenset(),
+    ) -> None:
+        self._kinds = kinds
+        self._input_diffs = input_diffs
+
+    @classmethod
+    def from_dict(cls, raw: Optional[Dict[str, Dict[str, Any]]]) -> "DetailedDiff":
+        """
+        Construct a DetailedDiff object from a decoded Go `map[string]PropertyDiff`.
+        """
+        if not raw:
+            return cls({})
+        kinds = {}
+        input_diffs = []
+        for path, diff in raw.items():
+            path = sys.intern(path)
+            kinds[path] = _DIFF_KINDS[diff["Kind"]]
+            if diff.get("InputDiff"):
+                input_diffs.append(path)
+        return cls(kinds, frozenset(input_diffs))
+
+    def is_input_diff(self, path: str) -> bool:
+        """
+        Indicate whether the change to the given path is between the old and new
+        inputs rather than the old state and new inputs.
+        """
+        return path in self._input_diffs
+
+    def paths(self, *kinds: DiffKind) -> Tuple[str, ...]:
+        """
+        Get the paths with any of the given kinds of change, or all paths if no
+        kinds are given.
+        """
+        if not kinds:
+            return tuple(self._kinds)
+        return tuple(path for path, kind in self._kinds.items() if kind in kinds)
+
+    @property
+    def replaces(self) -> Tuple[str, ...]:
+        """
+        The paths whose changes require the resource to be replaced
+        """
+        return tuple(
+            path for path, kind in self._kinds.items() if kind in _REPLACE_KINDS
+        )
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Return this detailed diff in the form returned by `Provider.diff()` when
+        typed results are disabled.
+        """
+        return {
+            path: {"Kind": kind.value, "InputDiff": path in self._input_diffs}
+            for path, kind in self._kinds.items()
+        }
+
+    def __getitem__(self, path: str) -> DiffKind:
+        return self._kinds[path]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._kinds)
+
+    def __len__(self) -> int:
+        return len(self._kinds)
+
+    def __repr__(self) -> str:
+        items = ", ".join(
+            f"{path!r}: {kind.name}" for path, kind in self._kinds.items()
+        )
+        return f"DetailedDiff({{{items}}})"
+
+
+class DiffResult:
+    """
+    Result of `Provider.diff()` or `Provider.diff_config()` when typed results are
+    enabled.
+
+    **Attributes:**
+
+    * **changes** - A DiffChanges value indicating whether there are any changes.
+    * **replace_keys** - Tuple of top-level properties whose changes require replacement.
+    * **stable_keys** - Tuple of top-level properties that are known not to change.
+    * **changed_keys** - Tuple of top-level properties that changed.
+    * **detailed_diff** - A DetailedDiff object with the kind of change to each property path.
+    * **delete_before_replace** - Whether the resource must be deleted before it is replaced.
+    """
+
+    __slots__ = (
+        "changes",
+        "replace_keys",
+        "stable_keys",
+        "changed_keys",
+        "detailed_diff",
+        "delete_before_replace",
+    )
+
+    def __init__(
+        self,
+        changes: DiffChanges,
+        replace_keys: Tuple[str, ...] = (),
+        stable_keys: Tuple[str, ...] = (),
+        changed_keys: Tuple[str, ...] = (),
+        detailed_diff: Optional[DetailedDiff] = None,
+        delete_before_replace: bool = False,
+    ) -> None:
+        if detailed_diff is None:
+            detailed_diff = DetailedDiff({})
+        self.changes = changes
+        self.replace_keys = replace_keys
+        self.stable_keys = stable_keys
+        self.changed_keys = changed_keys
+        self.detailed_diff = detailed_diff
+        self.delete_before_replace = delete_before_replace
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "DiffResult":
+        """
+        Construct a DiffResult object from a decoded Go `DiffResult`.
+        """
+        return cls(
+            changes=_DIFF_CHANGES[raw.get("Changes", 0)],
+            replace_keys=_keys(raw.get("ReplaceKeys")),
+            stable_keys=_keys(raw.get("StableKeys")),
+            changed_keys=_keys(raw.get("ChangedKeys")),
+            detailed_diff=DetailedDiff.from_dict(raw.get("DetailedDiff")),
+            delete_before_replace=bool(raw.get("DeleteBeforeReplace")),
+        )
+
+    @property
+    def has_changes(self) -> bool:
+        """
+        Whether the diff found any changes
+        """
+        return self.changes is DiffChanges.SOME
+
+    @property
+    def requires_replace(self) -> bool:
+        """
+        Whether any of the changes require the resource to be replaced
+        """
+        return bool(self.replace_keys) or bool(self.detailed_diff.replaces)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return this result in the form returned when typed results are disabled.
+        """
+        return {
+            "Changes": self.changes.value,
+            "ReplaceKeys": list(self.replace_keys) or None,
+            "StableKeys": list(self.stable_keys) or None,
+            "ChangedKeys": list(self.changed_keys) or None,
+            "DetailedDiff": self.detailed_diff.to_dict() or None,
+            "DeleteBeforeReplace": self.delete_before_replace,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"DiffResult(changes={self.changes.name}, "
+            f"detailed_diff={self.detailed_diff!r})"
+        )
+
+
+class CreateResult:
+    """
+    Result of `Provider.create()` when typed results are enabled. The output
+    properties are decoded the first time they are accessed.
+
+    **Attributes:**
+
+    * **id** - The ID of the resource.
+    * **properties** - A dictionary of output properties of the resource.
+    * **status** - An integer status code for the operation.
+    """
+
+    __slots__ = ("id", "status", "_properties")
+
+    def __init__(self, id: str, properties: Any, status: int = 0) -> None:
+        self.id = id
+        self.status = status
+        self._properties = properties
+
+    properties = _lazy_properties(
+        "_properties", "A dictionary of output properties of the resource"
+    )
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "CreateResult":
+        """
+        Construct a result object from a decoded Go response.
+        """
+        return cls(raw["ID"], raw["Properties"], raw["Status"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return this result in the form returned when typed results are disabled.
+        """
+        return {"ID": self.id, "Properties": self.properties, "Status": self.status}
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={self.id!r}, status={self.status})"
+
+
+class UpdateResult(CreateResult):
+    """
+    Result of `Provider.update()` when typed results are enabled. The output
+    properties are decoded the first time they are accessed.
+    """
+
+    __slots__ = ()
+
+
+class ReadResult:
+    """
+    Result of `Provider.read()` when typed results are enabled. The inputs and
+    outputs are decoded the first time they are accessed.
+
+    **Attributes:**
+
+    * **id** - The ID of the resource.
+    * **inputs** - A dictionary of inputs of the resource.
+    * **outputs** - A dictionary of outputs of the resource.
+    * **status** - An integer status code for the operation.
+    """
+
+    __slots__ = ("id", "status", "_inputs", "_outputs")
+
+    def __init__(self, id: str, inputs: Any, outputs: Any, status: int = 0) -> None:
+        self.id = id
+        self.status = status
+        self._inputs = inputs
+        self._outputs = outputs
+
+    inputs = _lazy_properties("_inputs", "A dictionary of inputs of the resource")
+
+    outputs = _lazy_properties("_outputs", "A dictionary of outputs of the resource")
+
+    @classmethod
+    def from_dict(cls, raw: Dict[str, Any]) -> "ReadResult":
+        """
+        Construct a ReadResult object from a decoded Go response.
+        """
+        return cls(raw["ID"], raw["Inputs"], raw["Outputs"], raw["Status"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return this result in the form returned when typed results are disabled.
+        """
+        return {
+            "ID": self.id,
+            "Inputs": self.inputs,
+            "Outputs": self.outputs,
+            "Status": self.status,
+        }
+
+    def __repr__(self) -> str:
+        return f"ReadResult(id={self.id!r}, status={self.status})"
@@ -0,0 +1,330 @@
+"""
+Bulk runner for provider operations, also available as `python -m pylumi`.
+Operations are read from a newline-delimited JSON file, one per line:
+
+.. code-block:: json
+
+   {"method": "create", "provider": "aws", "urn": "urn:pulumi:...", "inputs": {...}}
+   {"method": "update", "provider": "aws", "urn": "urn:pulumi:...", "id": "...",
+    "olds": {...}, "inputs": {...}}
+
+The keys are `method` (check, diff, create, read, update, delete or invoke),
+`provider`, `urn`, `id`, `inputs`, `olds` (the old inputs for check, diff and
+update and the stored state for read) and `member` (the function for invoke).
+Results are written as NDJSON in the order operations complete, each with the
+`line` of its operation. An operation that fails for any reason is written with
+`ok` false and its `error`, and the run carries on with the other operations:
+
+.. code-block:: bash
+
+   python -m pylumi ops.ndjson -o results.ndjson --config config.json \\
+       --concurrency 16 --rate 50 --checkpoint ops.checkpoint
+
+Only a bounded number of operations are in memory at once, so files of any size
+can be run. With `--checkpoint`, progress is saved as operations complete; running
+the same command again skips completed operations and appends to the output.
+`--byte-budget` limits the encoded size of requests and results in flight, see
+`pylumi.admission`.
+"""
+
+import argparse
+import concurrent.futures
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, IO, Iterable, Optional, Sequence, Set, Tuple
+
+from pylumi.admission import ByteBudget
+from pylumi.exc import ProviderError
+from pylumi.scheduling import TokenBucket
+from pylumi.serialization import json_default, write_atomic
+from pylumi.stats import DurationStats
+
+METHODS: Dict[str, Callable[[Any, Dict[str, Any]], Any]] = {
+    "check": lambda p, op: p.check(op["urn"], op.get("olds", {}), op["inputs"]),
+    "diff": lambda p, op: p.diff(op["urn"], op["id"], op.get("olds", {}), op["inputs"]),
+    "create": lambda p, op: p.create(op["urn"], op["inputs"]),
+    "read": lambda p, op: p.read(
+        op["urn"], op["id"], op.get("inputs", {}), op.get("olds", {})
+    ),
+    "update": lambda p, op: p.update(
+        op["urn"], op["id"], op.get("olds", {}), op["inputs"]
+    ),
+    "delete": lambda p, op: p.delete(op["urn"], op["id"], op.get("inputs", {})),
+    "invoke": lambda p, op: p.invoke(op["member"], op.get("inputs", {})),
+}
+
+
+class Checkpoint:
+    """
+    Completed operations, saved as the line number below which every operation
+    has completed plus the completed line numbers above it.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.watermark = 0
+        self.completed: Set[int] = set()
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            self.watermark = data["watermark"]
+            self.completed = set(data["completed"])
+
+    def is_done(self, line: int) -> bool:
+        """
+        Indicate whether the operation on a line has completed
+        """
+        return line < self.watermark or line in self.completed
+
+    def mark(self, line: int) -> None:
+        """
+        Record that the operation on a line has completed
+        """
+        self.completed.add(line)
+        while self.watermark in self.completed:
+            self.completed.remove(self.watermark)
+            self.watermark += 1
+
+    def save(self) -> None:
+        """
+        Save the checkpoint to `path` atomically
+        """
+        if self.path is None:
+            return
+        data = {"watermark": self.watermark, "completed": sorted(self.completed)}
+        write_atomic(self.path, json.dumps(data))
+
+
+class Summary:
+    """
+    Throughput and latency of a run.
+    """
+
+    def __init__(self, history: int = 10000) -> None:
+        self.ok = 0
+        self.errors = 0
+        self.skipped = 0
+        self.start = time.monotonic()
+        self.latency = DurationStats(history)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the summary as a JSON-serializable dictionary
+        """
+        elapsed = time.monotonic() - self.start
+        completed = self.ok + self.errors
+        return {
+            "ok": self.ok,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "elapsed": elapsed,
+            "throughput": completed / elapsed if elapsed > 0 else 0.0,
+            "latency": self.latency.summary(),
+        }
+
+
+def _execute(get_provider: Callable[[str], Any], line: int, raw: str) -> Dict[str, Any]:
+    start = time.monotonic()
+    out: Dict[str, Any] = {"line": line}
+    try:
+        op = json.loads(raw)
+        out["method"] = op.get("method")
+        if "urn" in op:
+            out["urn"] = op["urn"]
+        method = METHODS.get(op.get("method"))
+        if method is None:
+            raise ValueError(f"Invalid method: {op.get('method')!r}.")
+        result = method(get_provider(op["provider"]), op)
+        if hasattr(result, "to_dict"):
+            result = result.to_dict()
+        out["ok"] = True
+        out["result"] = result
+    except ProviderError as err:
+        out["ok"] = False
+        out["error"] = err.message
+        out["status_code"] = err.status_code
+    except (ValueError, KeyError, TypeError) as err:
+        out["ok"] = False
+        out["error"] = f"Invalid operation: {type(err).__name__}: {err}"
+    except Exception as err:
+        # Any other error, e.g. from a plugin or a replay miss, fails only this
+        # operation rather than the whole run
+        out["ok"] = False
+        out["error"] = f"{type(err).__name__}: {err}"
+    out["duration"] = time.monotonic() - start
+    return out
+
+
+def run(
+    ctx: Any,
+    operations: Iterable[Tuple[int, str]],
+    output: IO[str],
+    config: Optional[Dict[str, Dict[str, Any]]] = None,
+    versions: Optional[Dict[str, str]] = None,
+    concurrency: int = 8,
+    rate: Optional[float] = None,
+    burst: float = 1.0,
+    checkpoint: Optional[Checkpoint] = None,
+    checkpoint_interval: float = 5.0,
+) -> Summary:
+    """
+    Run operations with a set up context, writing results to `output`.
+
+    **Parameters:**
+
+    * **ctx** - The Context used to create providers.
+    * **operations** - `(line number, line)` pairs, e.g. `enumerate(f)` for a file `f`.
+    * **output** - A text file that results are written to.
+    * **config** - (optional) Dictionary of provider names to their configuration.
+    * **versions** - (optional) Dictionary of provider names to plugin versions.
+    * **concurrency** - (optional) The maximum number of operations running at once, default 8.
+    * **rate** - (optional) The maximum average number of operations started per second.
+    * **burst** - (optional) The maximum number of operations started in a burst, default 1.
+    * **checkpoint** - (optional) A Checkpoint of completed operations to skip and update.
+    * **checkpoint_interval** - (optional) The minimum number of seconds between saves
+    of the checkpoint, default 5.
+
+    **Returns:**
+
+    A Summary of the run.
+    """
+    config = config or {}
+    versions = versions or {}
+    if checkpoint is None:
+        checkpoint = Checkpoint()
+    bucket = None if rate is None else TokenBucket(rate, burst)
+    summary = Summary()
+    providers: Dict[str, Any] = {}
+    providers_lock = threading.Lock()
+
+    def get_provider(name: str) -> Any:
+        with providers_lock:
+            provider = providers.get(name)
+            if provider is None:
+                provider = ctx.provider(name, config.get(name), versions.get(name))
+                provider.configure()
+                providers[name] = provider
+            return provider
+
+    pending: Set[concurrent.futures.Future] = set()
+
+    def complete(futures: Iterable[concurrent.futures.Future]) -> None:
+        for future in futures:
+            pending.discard(future)
+            result = future.result()
+            output.write(json.dumps(result, default=json_default) + "\n")
+            if result["ok"]:
+                summary.ok += 1
+            else:
+                summary.errors += 1
+            summary.latency.record(result["duration"])
+            checkpoint.mark(result["line"])
+
+    last_saved = time.monotonic()
+    executor = concurrent.futures.ThreadPoolExecutor(concurrency)
+    try:
+        for line, raw in operations:
+            if checkpoint.is_done(line):
+                summary.skipped += 1
+                continue
+            if not raw.strip():
+                checkpoint.mark(line)
+                continue
+            if len(pending) >= concurrency:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                complete(done)
+                if time.monotonic() - last_saved >= checkpoint_interval:
+                    output.flush()
+                    checkpoint.save()
+                    last_saved = time.monotonic()
+            if bucket is not None:
+                bucket.acquire()
+            pending.add(executor.submit(_execute, get_provider, line, raw))
+        complete(concurrent.futures.as_completed(list(pending)))
+    finally:
+        # On errors, e.g. KeyboardInterrupt, record operations that were running
+        # so they aren't repeated when resuming
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+        complete([future for future in list(pending) if not future.cancelled()])
+        output.flush()
+        checkpoint.save()
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Entry point of `python -m pylumi`
+    """
+    from pylumi.context import Context
+
+    parser = argparse.ArgumentParser(
+        prog="python -m pylumi",
+        description="Run provider operations from a newline-delimited JSON file.",
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="NDJSON operations, default stdin"
+    )
+    parser.add_argument(
+        "-o", "--output", default="-", help="NDJSON results, default stdout"
+    )
+    parser.add_argument(
+        "--config", help="JSON file of provider names to their configuration"
+    )
+    parser.add_argument(
+        "--version",
+        action="append",
+        default=[],
+        metavar="PROVIDER=VERSION",
+        help="plugin version of a provider, may be repeated",
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, help="maximum operations per second")
+    parser.add_argument("--burst", type=float, default=1.0)
+    parser.add_argument("--checkpoint", help="file to save progress to and resume from")
+    parser.add_argument(
+        "--byte-budget",
+        type=int,
+        help="maximum encoded bytes of requests and results in flight",
+    )
+    parser.add_argument("--cwd", help="working directory of the Pulumi context")
+    args = parser.parse_args(argv)
+
+    config = {}
+    if args.config is not None:
+        with open(args.config) as f:
+            config = json.load(f)
+    versions = dict(item.split("=", 1) for item in args.version)
+    checkpoint = Checkpoint(args.checkpoint)
+    budget = None if args.byte_budget is None else ByteBudget(args.byte_budget)
+
+    input_file = sys.stdin if args.input == "-" else open(args.input)
+    mode = "a" if checkpoint.watermark or checkpoint.completed else "w"
+    output = sys.stdout if args.output == "-" else open(args.output, mode)
+    try:
+        with Context(cwd=args.cwd, byte_budget=budget) as ctx:
+            summary = run(
+                ctx,
+                enumerate(input_file),
+                output,
+                config=config,
+                versions=versions,
+                concurrency=args.concurrency,
+                rate=args.rate,
+                burst=args.burst,
+                checkpoint=checkpoint,
+            )
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(json.dumps(summary.to_dict(), indent=2), file=sys.stderr)
+    return 1 if summary.errors else 0
@@ -0,0 +1,296 @@
+"""
+Priority and fair-share scheduling of provider calls. A CallScheduler limits the
+number of calls an AsyncProvider runs at once; calls beyond that limit wait in
+the scheduler instead of in the executor's queue, and are started in priority
+order. Within a priority class, calls from different tenants are started with
+weighted fair queueing, so one tenant with thousands of queued calls can't
+starve the others:
+
+.. code-block:: python
+
+   scheduler = pylumi.scheduling.CallScheduler(8, weights={"previews": 4})
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, scheduler=scheduler)
+
+   # Per call
+   await aws.diff(urn, id, olds, news, priority="interactive", tenant="previews")
+
+   # Or for everything in a scope, including tasks started in it
+   with pylumi.scheduling.scope(priority="background", tenant="drift"):
+       await asyncio.gather(*(aws.read(urn, id, {}, {}) for urn, id in resources))
+
+   print(scheduler.stats()["interactive"]["p99"])
+
+A scheduler must only be used from a single event loop. To be effective, its
+concurrency should be at most the number of executor threads available to it.
+
+A TokenBucket limits the rate calls are started at, from threads or coroutines,
+e.g. for drift detection and the bulk runner.
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import enum
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from pylumi.stats import DurationStats
+
+
+class Priority(enum.IntEnum):
+    """
+    Priority classes, in the order calls are started
+    """
+
+    INTERACTIVE = 0
+    NORMAL = 1
+    BACKGROUND = 2
+
+
+PriorityLike = Union[Priority, str, int]
+
+DEFAULT_TENANT = "default"
+
+_PRIORITY: contextvars.ContextVar = contextvars.ContextVar(
+    "pylumi_priority", default=None
+)
+
+_TENANT: contextvars.ContextVar = contextvars.ContextVar("pylumi_tenant", default=None)
+
+
+def _priority(value: PriorityLike) -> Priority:
+    if isinstance(value, str):
+        return Priority[value.upper()]
+    return Priority(value)
+
+
+@contextlib.contextmanager
+def scope(
+    priority: Optional[PriorityLike] = None, tenant: Optional[str] = None
+) -> Iterator[None]:
+    """
+    Set the default priority and/or tenant of scheduled calls made in this scope,
+    including from tasks created in it. Arguments passed to individual calls take
+    precedence.
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((_PRIORITY, _PRIORITY.set(_priority(priority))))
+    if tenant is not None:
+        tokens.append((_TENANT, _TENANT.set(tenant)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, allowing `rate` operations per second on average
+    and bursts of up to `burst` operations.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token, returning how long to wait in seconds before using it
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """
+        Take a token, sleeping until it can be used
+        """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        """
+        Take a token, sleeping asynchronously until it can be used
+        """
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class CallScheduler:
+    """
+    Admission control for provider calls with priority classes and weighted fair
+    queueing across tenants.
+
+    **Parameters:**
+
+    * **concurrency** - The maximum number of calls running at once.
+    * **weights** - (optional) Dictionary of tenant names to weights. A tenant with
+    weight 2 gets twice the share of calls started as a tenant with weight 1 when
+    both have calls waiting in the same priority class. The default weight is 1.
+    * **default_priority** - (optional) The priority of calls that don't specify one,
+    default `Priority.NORMAL`.
+    * **history** - (optional) The number of recent wait times per priority class used
+    to compute percentiles, default 1024.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        weights: Optional[Dict[str, float]] = None,
+        default_priority: PriorityLike = Priority.NORMAL,
+        history: int = 1024,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}.")
+        self.concurrency = concurrency
+        self.weights = dict(weights or {})
+        self.default_priority = _priority(default_priority)
+        self.running = 0
+        # Per priority class: heap of (finish tag, sequence, future), the virtual
+        # time and the finish tag of the latest call of each tenant
+        self._queues: Dict[Priority, List[Tuple[float, int, asyncio.Future]]] = {
+            priority: [] for priority in Priority
+        }
+        self._virtual_time = {priority: 0.0 for priority in Priority}
+        self._finish_tags: Dict[Tuple[Priority, str], float] = {}
+        self._sequence = itertools.count()
+        self._waits = {priority: DurationStats(history) for priority in Priority}
+
+    def _resolve(
+        self, priority: Optional[PriorityLike], tenant: Optional[str]
+    ) -> Tuple[Priority, str]:
+        if priority is None:
+            priority = _PRIORITY.get()
+        if priority is None:
+            priority = self.default_priority
+        if tenant is None:
+            tenant = _TENANT.get()
+        if tenant is None:
+            tenant = DEFAULT_TENANT
+        return _priority(priority), tenant
+
+    def _dispatch(self) -> None:
+        while self.running < self.concurrency:
+            for priority, queue in self._queues.items():
+                if queue:
+                    break
+            else:
+                return
+            finish_tag, _, future = heapq.heappop(queue)
+            if future.cancelled():
+                continue
+            self._virtual_time[priority] = finish_tag
+            self.running += 1
+            future.set_result(None)
+
+    async def acquire(
+        self,
+        priority: Optional[PriorityLike] = None,
+        tenant: Optional[str] = None,
+        cost: float = 1.0,
+    ) -> None:
+        """
+        Wait until a call may start. Every successful `acquire()` must be followed
+        by a `release()` once the call finishes.
+
+        **Parameters:**
+
+        * **priority** - (optional) The priority class of the call, a Priority or its
+        name e.g. "interactive". Defaults to the scope's priority, see `scope()`.
+        * **tenant** - (optional) The tenant the call is made for. Defaults to the
+        scope's tenant.
+        * **cost** - (optional) The relative cost of the call for fair queueing, default 1.
+        """
+        priority, tenant = self._resolve(priority, tenant)
+        start = time.monotonic()
+
+        key = (priority, tenant)
+        finish_tag = max(
+            self._virtual_time[priority], self._finish_tags.get(key, 0.0)
+        ) + cost / self.weights.get(tenant, 1.0)
+        self._finish_tags[key] = finish_tag
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(
+            self._queues[priority], (finish_tag, next(self._sequence), future)
+        )
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The call was admitted just before being cancelled
+                self.release()
+            raise
+        self._waits[priority].record(time.monotonic() - start)
+
+    def release(self) -> None:
+        """
+        Indicate that an admitted call has finished, starting the next waiting call
+        """
+        self.running -= 1
+        self._dispatch()
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self,
+        priority: Optional[PriorityLike] = None,
+        tenant: Optional[str] = None,
+        cost: float = 1.0,
+    ):
+        """
+        Async context manager that acquires a slot on entry and releases it on exit.
+        See `acquire()` for the parameters.
+        """
+        await self.acquire(priority, tenant, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def queued(self) -> Dict[str, int]:
+        """
+        Get the number of calls waiting in each priority class
+        """
+        return {
+            priority.name.lower(): sum(
+                1 for _, _, future in queue if not future.cancelled()
+            )
+            for priority, queue in self._queues.items()
+        }
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get queue wait time statistics per priority class.
+
+        **Returns:**
+
+        A dictionary of priority class names to dictionaries with the keys `count`,
+        `mean`, `max`, `p50`, `p95` and `p99` (wait times in seconds; percentiles
+        are over recent calls) and `queued`, the number of calls currently waiting.
+        """
+        queued = self.queued()
+        out = {}
+        for priority, waits in self._waits.items():
+            name = priority.name.lower()
+            out[name] = dict(waits.summary(), count=waits.count, queued=queued[name])
+        return out
@@ -0,0 +1,63 @@
+"""
+On-disk cache of provider schemas, so that processes sharing a machine only fetch
+each schema from its plugin once. The cache is enabled by setting the
+`PYLUMI_SCHEMA_CACHE_DIR` environment variable, or by passing `cache_dir` directly.
+"""
+
+import json
+import os
+import re
+from typing import Any, Callable, Dict, Optional, Union
+
+from pylumi.serialization import write_atomic
+
+CACHE_DIR_ENV = "PYLUMI_SCHEMA_CACHE_DIR"
+
+
+def get_cache_dir() -> Optional[str]:
+    """
+    Get the schema cache directory configured in the environment, if any
+    """
+    return os.getenv(CACHE_DIR_ENV) or None
+
+
+def cache_path(
+    directory: str, provider: str, version: str, schema_version: int = 0
+) -> str:
+    """
+    Get the path of the cached schema for a version of a provider plugin
+    """
+    name = re.sub(r"[^0-9a-zA-Z_.\-]", "_", f"{provider}-{version}-{schema_version}")
+    return os.path.join(directory, f"{name}.json")
+
+
+def load_schema(
+    provider: str,
+    version: str,
+    fetch: Callable[[], Union[bytes, str]],
+    schema_version: int = 0,
+    cache_dir: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Load the schema for a version of a provider plugin from the cache directory,
+    calling `fetch` to get the encoded schema and writing it to the cache if it
+    isn't there yet. If there is no cache directory, `fetch` is always called.
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return json.loads(fetch())
+
+    path = cache_path(cache_dir, provider, version, schema_version)
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        pass
+
+    encoded = fetch()
+    if isinstance(encoded, str):
+        encoded = encoded.encode()
+    os.makedirs(cache_dir, exist_ok=True)
+    write_atomic(path, encoded)
+    return json.loads(encoded)
@@ -0,0 +1,65 @@
+"""
+JSON encoding of property values for files written by pylumi, e.g. recorded
+traffic and the bulk runner's results, and atomic writes of those files.
+"""
+
+import base64
+import json
+import os
+import tempfile
+from typing import Any, Dict, Union
+
+from pylumi import assets
+from pylumi.assets import Archive, Asset
+from pylumi.constants import UNKNOWN_KEY, UnknownValue
+
+BYTES_KEY = "$bytes"
+
+
+def json_default(value: Any) -> Any:
+    """
+    `default` function for `json.dumps()` encoding unknown values, assets, archives
+    and bytes so that `json_object_hook()` decodes them again. Tuples are encoded
+    as lists and other objects as strings.
+    """
+    if isinstance(value, UnknownValue):
+        return {UNKNOWN_KEY: value.value}
+    if isinstance(value, (Asset, Archive)):
+        return value.to_json()
+    if isinstance(value, bytes):
+        return {BYTES_KEY: base64.b64encode(value).decode()}
+    if isinstance(value, tuple):
+        return list(value)
+    return str(value)
+
+
+def json_object_hook(value: Dict[str, Any]) -> Any:
+    """
+    `object_hook` function for `json.loads()` decoding the values encoded by
+    `json_default()`
+    """
+    if len(value) == 1:
+        if UNKNOWN_KEY in value:
+            return UnknownValue(value[UNKNOWN_KEY])
+        if BYTES_KEY in value:
+            return base64.b64decode(value[BYTES_KEY])
+        asset = assets.from_json(value)
+        if asset is not None:
+            return asset
+    return value
+
+
+def write_atomic(path: str, data: Union[str, bytes]) -> None:
+    """
+    Write `data` to `path` through a temporary file in the same directory that
+    replaces `path` once it's complete, so readers never see a partial file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb" if isinstance(data, bytes) else "w") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,261 @@
+"""
+Execution of provider operations across a pool of worker processes. Each worker
+process has its own Go runtime and plugin processes, so operations on different
+shards run in parallel on separate cores:
+
+.. code-block:: python
+
+   ctx = pylumi.Context()
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"})
+
+   with pylumi.sharding.ShardedExecutor(ctx.descriptor(), shards=8) as executor:
+       for result in executor.map(aws.descriptor(), "read", calls):
+           ...
+
+Operations are described by a ProviderDescriptor, a method name and arguments. The
+first time a worker receives an operation for a provider it creates and configures
+that provider. Operations with a URN are routed to a shard by a hash of the URN,
+so all operations on a resource run in the same process, in submission order.
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import multiprocessing.util
+import os
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from pylumi import schemas
+from pylumi.descriptors import ContextDescriptor, ProviderDescriptor
+
+# Provider methods whose first argument is a URN
+URN_METHODS = frozenset(
+    {
+        "check_config",
+        "diff_config",
+        "check",
+        "diff",
+        "create",
+        "read",
+        "update",
+        "delete",
+    }
+)
+
+# Worker process state: contexts and providers created from descriptors
+_CONTEXTS: Dict[str, Any] = {}
+
+_PROVIDERS: Dict[Tuple[str, str], Any] = {}
+
+
+def _init_worker(schema_cache_dir: Optional[str]) -> None:
+    if schema_cache_dir is not None:
+        os.environ[schemas.CACHE_DIR_ENV] = schema_cache_dir
+
+
+def _worker_provider(ctx_desc: ContextDescriptor, provider_desc: ProviderDescriptor):
+    ctx_key = ctx_desc.key()
+    ctx = _CONTEXTS.get(ctx_key)
+    if ctx is None:
+        ctx = ctx_desc.create()
+        ctx.setup()
+        _CONTEXTS[ctx_key] = ctx
+        # Pool workers exit without running atexit handlers, but do run finalizers
+        multiprocessing.util.Finalize(None, ctx.teardown, exitpriority=10)
+
+    key = (ctx_key, provider_desc.key())
+    provider = _PROVIDERS.get(key)
+    if provider is None:
+        provider = provider_desc.create(ctx)
+        provider.configure()
+        _PROVIDERS[key] = provider
+    return provider
+
+
+def _worker_call(
+    ctx_desc: ContextDescriptor,
+    provider_desc: ProviderDescriptor,
+    method: str,
+    args: Sequence[Any],
+    kwargs: Dict[str, Any],
+) -> Any:
+    provider = _worker_provider(ctx_desc, provider_desc)
+    return getattr(provider, method)(*args, **kwargs)
+
+
+def _normalize_call(call: Any) -> Tuple[Sequence[Any], Dict[str, Any]]:
+    if isinstance(call, dict):
+        return (), call
+    if (
+        isinstance(call, tuple)
+        and len(call) == 2
+        and isinstance(call[0], (tuple, list))
+        and isinstance(call[1], dict)
+    ):
+        return call
+    return call, {}
+
+
+class ShardedExecutor:
+    """
+    Runs provider operations on a fixed set of worker processes ("shards"), each
+    with its own context created from `context`.
+
+    **Parameters:**
+
+    * **context** - (optional) A ContextDescriptor for the contexts created in each
+    worker, e.g. from `Context.descriptor()`. By default a `pylumi.Context` with
+    default arguments is used.
+    * **shards** - (optional) The number of worker processes, by default the number of CPUs.
+    * **mp_context** - (optional) The multiprocessing context used to start workers.
+    Defaults to the "spawn" start method, since a process with a running Go runtime
+    can't be safely forked.
+    * **schema_cache_dir** - (optional) A directory shared by all workers for caching
+    provider schemas, see `pylumi.schemas`. Plugins are always shared through the
+    Pulumi plugin directory.
+    * **max_in_flight** - (optional) The maximum number of operations submitted but not
+    yet completed at a time by `map()` and `imap_unordered()`. Defaults to 64 per shard.
+    """
+
+    def __init__(
+        self,
+        context: Optional[ContextDescriptor] = None,
+        shards: Optional[int] = None,
+        mp_context: Optional[Any] = None,
+        schema_cache_dir: Optional[str] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> None:
+        if context is None:
+            context = ContextDescriptor()
+        if shards is None:
+            shards = os.cpu_count() or 1
+        if mp_context is None:
+            mp_context = multiprocessing.get_context("spawn")
+        if schema_cache_dir is None:
+            schema_cache_dir = schemas.get_cache_dir()
+        if max_in_flight is None:
+            max_in_flight = 64 * shards
+
+        self.context = context
+        self.shards = shards
+        self.schema_cache_dir = schema_cache_dir
+        self.max_in_flight = max_in_flight
+        # One single-process pool per shard, so routing to a shard means routing
+        # to a process and operations on a shard run in submission order.
+        self._pools = [
+            concurrent.futures.ProcessPoolExecutor(
+                1,
+                mp_context=mp_context,
+                initializer=_init_worker,
+                initargs=(schema_cache_dir,),
+            )
+            for _ in range(shards)
+        ]
+        self._next_shard = itertools.count()
+        self._lock = threading.Lock()
+
+    def shard_for(self, key: Any) -> int:
+        """
+        Get the index of the shard that operations with the given routing key run on
+        """
+        return zlib.crc32(str(key).encode()) % self.shards
+
+    def _route(self, method: str, args: Sequence[Any], shard_key: Any) -> int:
+        if shard_key is None and method in URN_METHODS and args:
+            shard_key = args[0]
+        if shard_key is not None:
+            return self.shard_for(shard_key)
+        with self._lock:
+            return next(self._next_shard) % self.shards
+
+    def submit(
+        self,
+        provider: ProviderDescriptor,
+        method: str,
+        *args,
+        shard_key: Any = None,
+        **kwargs,
+    ) -> concurrent.futures.Future:
+        """
+        Submit a single provider operation, returning a Future with its result.
+
+        **Parameters:**
+
+        * **provider** - A ProviderDescriptor, e.g. from `Provider.descriptor()`.
+        * **method** - The name of the Provider method to call e.g. "create".
+        * **args** - Positional arguments for the method.
+        * **shard_key** - (optional) Route the operation by this key instead of by URN.
+        Operations without a URN or a shard key are distributed round-robin.
+        * **kwargs** - Keyword arguments for the method.
+
+        **Returns:**
+
+        A `concurrent.futures.Future` object.
+        """
+        shard = self._route(method, args, shard_key)
+        return self._pools[shard].submit(
+            _worker_call, self.context, provider, method, args, kwargs
+        )
+
+    def _submit_calls(
+        self, provider: ProviderDescriptor, method: str, calls: Iterable[Any]
+    ) -> Iterator[concurrent.futures.Future]:
+        for call in calls:
+            args, kwargs = _normalize_call(call)
+            yield self.submit(provider, method, *args, **kwargs)
+
+    def map(
+        self, provider: ProviderDescriptor, method: str, calls: Iterable[Any]
+    ) -> Iterator[Any]:
+        """
+        Run a provider method once for each item of `calls`, yielding results in the
+        same order as `calls` as soon as they are available. Each item is a tuple of
+        positional arguments, a dictionary of keyword arguments or an
+        `(args, kwargs)` tuple. If an operation fails its exception is raised when
+        its result would be yielded.
+        """
+        pending = collections.deque()
+        for future in self._submit_calls(provider, method, calls):
+            pending.append(future)
+            if len(pending) >= self.max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def imap_unordered(
+        self, provider: ProviderDescriptor, method: str, calls: Iterable[Any]
+    ) -> Iterator[Tuple[int, Any]]:
+        """
+        Like `map()`, but yields `(index, result)` tuples in the order operations
+        complete, where `index` is the position of the operation in `calls`.
+        """
+        pending = {}
+        futures = self._submit_calls(provider, method, calls)
+        for idx, future in enumerate(futures):
+            pending[future] = idx
+            if len(pending) < self.max_in_flight:
+                continue
+            done, _ = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                yield pending.pop(future), future.result()
+        for future in concurrent.futures.as_completed(list(pending)):
+            yield pending.pop(future), future.result()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down all worker processes. Worker contexts are torn down as the
+        workers exit.
+        """
+        for pool in self._pools:
+            pool.shutdown(wait=wait)
+
+    def __enter__(self) -> "ShardedExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.shutdown()
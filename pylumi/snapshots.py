@@ -0,0 +1,200 @@
+"""
+Fast change detection between collections of resource properties. Property maps
+are fingerprinted in the Go runtime with Merkle hashes, one per top-level
+property plus a root hash, so comparing two snapshots only compares short
+strings:
+
+.. code-block:: python
+
+   last_known = pylumi.snapshots.Snapshot.from_properties(state.items())
+   desired = pylumi.snapshots.Snapshot.from_properties(config.items())
+
+   changes = last_known.compare(desired)
+   for urn, paths in changes.changed.items():
+       aws.diff(urn, ids[urn], state[urn], config[urn])
+
+Fingerprints don't depend on key order, and unknown values are fingerprinted by
+kind. Snapshots can be saved with `to_dict()` and loaded with `from_dict()`, so
+last-known state only needs to be fingerprinted once.
+"""
+
+import dataclasses as dc
+from typing import Any, Dict, Iterable, Iterator, Mapping, Sequence, Tuple
+
+from pylumi.ext import _pylumi
+
+# Number of property maps sent to the Go runtime at a time
+BATCH_SIZE = 1000
+
+
+@dc.dataclass(frozen=True)
+class Fingerprint:
+    """
+    Fingerprint of a property map.
+
+    **Attributes:**
+
+    * **root** - Hash of the whole property map.
+    * **paths** - Dictionary of top-level property names to the hashes of their values.
+    """
+
+    root: str
+    paths: Dict[str, str]
+
+    def changed_paths(self, other: "Fingerprint") -> Sequence[str]:
+        """
+        Get the sorted top-level property names that were added, removed or changed
+        between this fingerprint and `other`.
+        """
+        if self.root == other.root:
+            return []
+        paths = self.paths
+        other_paths = other.paths
+        return sorted(
+            key
+            for key in paths.keys() | other_paths.keys()
+            if paths.get(key) != other_paths.get(key)
+        )
+
+
+def fingerprint_many(values: Iterable[Dict[str, Any]]) -> Iterator[Fingerprint]:
+    """
+    Fingerprint many property maps, in batches of `BATCH_SIZE`. Each batch is
+    hashed concurrently in the Go runtime.
+    """
+    batch = []
+    for value in values:
+        batch.append(value)
+        if len(batch) >= BATCH_SIZE:
+            yield from _fingerprint_batch(batch)
+            batch = []
+    if batch:
+        yield from _fingerprint_batch(batch)
+
+
+def _fingerprint_batch(batch: Sequence[Dict[str, Any]]) -> Iterator[Fingerprint]:
+    for result in _pylumi.fingerprint_properties(batch):
+        yield Fingerprint(result["Root"], result["Paths"])
+
+
+def fingerprint(value: Dict[str, Any]) -> Fingerprint:
+    """
+    Fingerprint a single property map
+    """
+    return next(fingerprint_many([value]))
+
+
+@dc.dataclass(frozen=True)
+class SnapshotDiff:
+    """
+    Differences between two snapshots.
+
+    **Attributes:**
+
+    * **added** - URNs only in the new snapshot.
+    * **removed** - URNs only in the old snapshot.
+    * **changed** - Dictionary of URNs in both snapshots whose properties differ to
+    the sorted top-level property names that differ.
+    """
+
+    added: Sequence[str]
+    removed: Sequence[str]
+    changed: Dict[str, Sequence[str]]
+
+    def has_changes(self) -> bool:
+        """
+        Indicate whether any resources were added, removed or changed
+        """
+        return bool(self.added or self.removed or self.changed)
+
+
+class Snapshot(Mapping[str, Fingerprint]):
+    """
+    A mapping of URNs to the fingerprints of their properties.
+    """
+
+    def __init__(self, fingerprints: Dict[str, Fingerprint]) -> None:
+        self._fingerprints = fingerprints
+
+    @classmethod
+    def from_properties(cls, items: Iterable[Tuple[Any, Dict[str, Any]]]) -> "Snapshot":
+        """
+        Create a snapshot from `(urn, properties)` pairs, e.g. `state.items()`.
+        """
+        urns = []
+
+        def values():
+            for urn, props in items:
+                urns.append(str(urn))
+                yield props
+
+        fingerprints = list(fingerprint_many(values()))
+        return cls(dict(zip(urns, fingerprints)))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Snapshot":
+        """
+        Load a snapshot saved with `to_dict()`
+        """
+        return cls(
+            {
+                urn: Fingerprint(value["Root"], value["Paths"])
+                for urn, value in data.items()
+            }
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert this snapshot to a JSON-serializable dictionary
+        """
+        return {
+            urn: {"Root": value.root, "Paths": value.paths}
+            for urn, value in self._fingerprints.items()
+        }
+
+    def compare(self, new: "Snapshot") -> SnapshotDiff:
+        """
+        Compare this snapshot with a newer one.
+
+        **Parameters:**
+
+        * **new** - The new snapshot, e.g. of desired state if this is last-known state.
+
+        **Returns:**
+
+        A SnapshotDiff object.
+        """
+        old_fps = self._fingerprints
+        new_fps = new._fingerprints
+        changed = {}
+        for urn, old_fp in old_fps.items():
+            new_fp = new_fps.get(urn)
+            if new_fp is not None and new_fp.root != old_fp.root:
+                changed[urn] = old_fp.changed_paths(new_fp)
+        return SnapshotDiff(
+            added=[urn for urn in new_fps if urn not in old_fps],
+            removed=[urn for urn in old_fps if urn not in new_fps],
+            changed=changed,
+        )
+
+    def __getitem__(self, urn: Any) -> Fingerprint:
+        return self._fingerprints[str(urn)]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fingerprints)
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} resources)"
+
+
+def compare(
+    old: Iterable[Tuple[Any, Dict[str, Any]]], new: Iterable[Tuple[Any, Dict[str, Any]]]
+) -> SnapshotDiff:
+    """
+    Compare two collections of `(urn, properties)` pairs, returning the URNs that
+    were added, removed or changed and the changed top-level property names.
+    """
+    return Snapshot.from_properties(old).compare(Snapshot.from_properties(new))
@@ -0,0 +1,54 @@
+"""
+Summary statistics of durations, e.g. how long provider calls waited to be
+scheduled.
+"""
+
+import collections
+from typing import Deque, Dict
+
+
+class DurationStats:
+    """
+    Count, total and maximum of recorded durations, plus percentiles over the most
+    recent ones.
+
+    **Parameters:**
+
+    * **history** - The number of recent durations percentiles are computed over.
+    """
+
+    def __init__(self, history: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: Deque[float] = collections.deque(maxlen=history)
+
+    def record(self, duration: float) -> None:
+        """
+        Record a duration in seconds
+        """
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.recent.append(duration)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Get a percentile of the recent durations, e.g. 0.95 for the 95th
+        """
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(fraction * len(values)))]
+
+    def summary(self) -> Dict[str, float]:
+        """
+        Get a dictionary with the keys `mean`, `max`, `p50`, `p95` and `p99`
+        """
+        return {
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
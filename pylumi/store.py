@@ -0,0 +1,341 @@
+"""
+An embedded, persistent store of resource state backed by SQLite. Resources are
+keyed by URN, with indexes on type, provider and ID, and each write only touches
+the resources that changed, so the store stays fast at hundreds of thousands of
+resources:
+
+.. code-block:: python
+
+   store = pylumi.store.StateStore("state.db")
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, state_store=store)
+
+   # create(), read(), update() and delete() write through to the store
+   aws.create(urn, inputs)
+
+   for state in store.by_type("aws:s3/bucket:Bucket"):
+       print(state.urn, state.id, state.outputs["arn"])
+
+   with open("state.ndjson", "w") as f:
+       store.export(f)
+
+Properties are stored as compact JSON, compressed with zlib above
+`compress_threshold` bytes. Writes made inside `transaction()` are committed
+together.
+"""
+
+import contextlib
+import dataclasses as dc
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from pylumi.assets import Archive, Asset
+from pylumi.constants import UNKNOWN_KEY, UnknownValue
+from pylumi.results import _object_hook
+from pylumi.urn import URN
+
+# Number of rows fetched at a time when iterating
+FETCH_SIZE = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    urn TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    id TEXT,
+    inputs BLOB,
+    outputs BLOB,
+    updated REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS resources_type ON resources (type);
+CREATE INDEX IF NOT EXISTS resources_provider ON resources (provider);
+CREATE INDEX IF NOT EXISTS resources_id ON resources (id);
+"""
+
+_COLUMNS = "urn, type, provider, id, inputs, outputs, updated"
+
+# Prefixes of stored property blobs
+_PLAIN = b"j"
+_COMPRESSED = b"z"
+
+Properties = Union[Dict[str, Any], str, bytes, None]
+
+
+@dc.dataclass(frozen=True)
+class ResourceState:
+    """
+    The stored state of a resource.
+
+    **Attributes:**
+
+    * **urn** - The URN of the resource.
+    * **type** - The type token of the resource.
+    * **provider** - The name of the provider that manages the resource.
+    * **id** - The ID of the resource.
+    * **inputs** - The input properties of the resource.
+    * **outputs** - The output properties of the resource.
+    * **updated** - When the resource was last written, as a UNIX timestamp.
+    """
+
+    urn: str
+    type: str
+    provider: str
+    id: Optional[str]
+    inputs: Optional[Dict[str, Any]]
+    outputs: Optional[Dict[str, Any]]
+    updated: float
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, UnknownValue):
+        return {UNKNOWN_KEY: value.value}
+    if isinstance(value, (Asset, Archive)):
+        return value.to_json()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class StateStore:
+    """
+    SQLite-backed store of resource state. A store can be shared by several
+    providers and threads.
+
+    **Parameters:**
+
+    * **path** - The path of the database file, or ":memory:".
+    * **compress_threshold** - (optional) The size in bytes of encoded properties
+    above which they're compressed, default 1024. None disables compression.
+    """
+
+    def __init__(self, path: str, compress_threshold: Optional[int] = 1024) -> None:
+        self.path = path
+        self.compress_threshold = compress_threshold
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _encode(self, value: Properties) -> Optional[bytes]:
+        if value is None:
+            return None
+        if isinstance(value, str):
+            data = value.encode()
+        elif isinstance(value, bytes):
+            data = value
+        else:
+            data = json.dumps(value, default=_default, separators=(",", ":")).encode()
+        if self.compress_threshold is not None and len(data) > self.compress_threshold:
+            return _COMPRESSED + zlib.compress(data)
+        return _PLAIN + data
+
+    @staticmethod
+    def _raw(blob: Optional[bytes]) -> Optional[bytes]:
+        if blob is None:
+            return None
+        if blob[:1] == _COMPRESSED:
+            return zlib.decompress(blob[1:])
+        return blob[1:]
+
+    def _decode(self, blob: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        data = self._raw(blob)
+        if data is None:
+            return None
+        return json.loads(data, object_hook=_object_hook)
+
+    def _state(self, row: tuple) -> ResourceState:
+        urn, type_, provider, id_, inputs, outputs, updated = row
+        return ResourceState(
+            urn,
+            type_,
+            provider,
+            id_,
+            self._decode(inputs),
+            self._decode(outputs),
+            updated,
+        )
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator["StateStore"]:
+        """
+        Context manager that commits all writes made in it together, or none of them
+        if it exits with an error. Transactions can be nested; only the outermost
+        one commits. Other threads' writes wait until it exits.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def put(
+        self,
+        urn: Any,
+        provider: str,
+        id: Optional[str],
+        inputs: Properties = None,
+        outputs: Properties = None,
+    ) -> None:
+        """
+        Insert or replace the state of a resource. `inputs` and `outputs` may also
+        be JSON already encoded by the Go runtime, which is stored without decoding.
+        """
+        self.put_many([(urn, provider, id, inputs, outputs)])
+
+    def put_many(self, states: Iterable[tuple]) -> None:
+        """
+        Insert or replace the state of many resources in one transaction, from
+        `(urn, provider, id, inputs, outputs)` tuples.
+        """
+        now = time.time()
+        rows = (
+            (
+                str(urn),
+                (urn if isinstance(urn, URN) else URN(str(urn))).type,
+                provider,
+                id,
+                self._encode(inputs),
+                self._encode(outputs),
+                now,
+            )
+            for urn, provider, id, inputs, outputs in states
+        )
+        with self.transaction():
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO resources ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, urn: Any) -> None:
+        """
+        Remove a resource from the store, if it's there
+        """
+        with self.transaction():
+            self._conn.execute("DELETE FROM resources WHERE urn = ?", (str(urn),))
+
+    def get(self, urn: Any) -> Optional[ResourceState]:
+        """
+        Get the state of a resource by URN, or None if it isn't stored
+        """
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM resources WHERE urn = ?", (str(urn),)
+            ).fetchone()
+        return None if row is None else self._state(row)
+
+    def _select(self, where: str = "", params: tuple = ()) -> Iterator[ResourceState]:
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM resources {where} ORDER BY urn", params
+            )
+            rows = cursor.fetchmany(FETCH_SIZE)
+        while rows:
+            for row in rows:
+                yield self._state(row)
+            with self._lock:
+                rows = cursor.fetchmany(FETCH_SIZE)
+
+    def by_type(self, type: str) -> List[ResourceState]:
+        """
+        Get the states of all resources of a type
+        """
+        return list(self._select("WHERE type = ?", (type,)))
+
+    def by_provider(self, provider: str) -> List[ResourceState]:
+        """
+        Get the states of all resources managed by a provider
+        """
+        return list(self._select("WHERE provider = ?", (provider,)))
+
+    def by_id(self, id: str, provider: Optional[str] = None) -> List[ResourceState]:
+        """
+        Get the states of the resources with an ID, optionally only those managed by
+        `provider`
+        """
+        if provider is None:
+            return list(self._select("WHERE id = ?", (id,)))
+        return list(self._select("WHERE id = ? AND provider = ?", (id, provider)))
+
+    def __iter__(self) -> Iterator[ResourceState]:
+        return self._select()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM resources").fetchone()[0]
+
+    def __contains__(self, urn: Any) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM resources WHERE urn = ?", (str(urn),)
+            ).fetchone()
+        return row is not None
+
+    def export(self, f: TextIO) -> int:
+        """
+        Write every stored resource to a text file as one JSON object per line, with
+        the keys `urn`, `type`, `provider`, `id`, `inputs`, `outputs` and `updated`.
+        Stored properties are copied as-is, without decoding them.
+
+        **Returns:**
+
+        The number of resources written.
+        """
+        count = 0
+        with self._lock:
+            cursor = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM resources ORDER BY urn"
+            )
+            rows = cursor.fetchmany(FETCH_SIZE)
+            while rows:
+                lines = []
+                for urn, type_, provider, id_, inputs, outputs, updated in rows:
+                    head = json.dumps(
+                        {
+                            "urn": urn,
+                            "type": type_,
+                            "provider": provider,
+                            "id": id_,
+                            "updated": updated,
+                        }
+                    )
+                    inputs = self._raw(inputs)
+                    outputs = self._raw(outputs)
+                    lines.append(
+                        '%s,"inputs":%s,"outputs":%s}\n'
+                        % (
+                            head[:-1],
+                            "null" if inputs is None else inputs.decode(),
+                            "null" if outputs is None else outputs.decode(),
+                        )
+                    )
+                f.writelines(lines)
+                count += len(lines)
+                rows = cursor.fetchmany(FETCH_SIZE)
+        return count
+
+    def close(self) -> None:
+        """
+        Close the database
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
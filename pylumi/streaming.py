@@ -0,0 +1,181 @@
+"""
+Incremental decoding of large invoke results. `Provider.invoke_iter()` returns the
+elements of one array in the result as an InvokeStream, which decodes a single
+element at a time instead of decoding the whole result at once:
+
+.. code-block:: python
+
+   with aws.invoke_iter(
+       "aws:ec2/getInstances:getInstances", {}, "ids", spill_threshold=2 ** 20
+   ) as ids:
+       for instance_id in ids:
+           ...
+
+The Go runtime encodes each element as one line of JSON. Encoded elements beyond
+`spill_threshold` bytes are written to a temporary file instead of being passed to
+Python, so the memory used by a stream doesn't grow with the size of the result.
+The file is deleted once the stream is exhausted or closed.
+
+`AsyncProvider.invoke_iter()` returns an AsyncInvokeStream, which reads and
+decodes elements in batches in the executor, so the event loop isn't blocked:
+
+.. code-block:: python
+
+   async with await aws.invoke_iter(
+       "aws:ec2/getInstances:getInstances", {}, "ids"
+   ) as ids:
+       async for instance_id in ids:
+           ...
+"""
+
+import collections
+import io
+import itertools
+import json
+import os
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
+
+from pylumi.interning import InternPool
+from pylumi.results import _object_hook
+
+# Default number of bytes of encoded elements kept in memory before spilling
+DEFAULT_SPILL_THRESHOLD = 16 * 2**20
+
+# Default number of elements an AsyncInvokeStream decodes per executor call
+DEFAULT_BATCH_SIZE = 256
+
+
+class InvokeStream(Iterator[Any]):
+    """
+    Iterator over the elements of an array in the result of a function invocation.
+
+    **Attributes:**
+
+    * **rest** - The rest of the result, without the array.
+    * **spill_path** - The file the encoded elements were spilled to, or None if they
+    are held in memory.
+    """
+
+    def __init__(
+        self,
+        rest: Dict[str, Any],
+        elements: Optional[bytes] = None,
+        spill_path: Optional[str] = None,
+        pool: Optional[InternPool] = None,
+    ) -> None:
+        self.rest = rest
+        self.spill_path = spill_path
+        self.pool = pool
+        self._file: Optional[BinaryIO] = None
+        if spill_path is not None:
+            self._file = open(spill_path, "rb")
+        else:
+            self._file = io.BytesIO(elements or b"")
+
+    def _decode(self, line: bytes) -> Any:
+        if self.pool is not None:
+            return self.pool.loads(line)
+        return json.loads(line, object_hook=_object_hook)
+
+    def __next__(self) -> Any:
+        if self._file is None:
+            raise StopIteration
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise StopIteration
+        return self._decode(line)
+
+    def close(self) -> None:
+        """
+        Stop iterating, releasing the encoded elements and deleting the spill file
+        if there is one.
+        """
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if self.spill_path is not None:
+            try:
+                os.unlink(self.spill_path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self) -> "InvokeStream":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
+
+    def __del__(self) -> None:
+        self.close()
+
+
+class AsyncInvokeStream(AsyncIterator[Any]):
+    """
+    Async iterator over the elements of an array in the result of a function
+    invocation, returned by `AsyncProvider.invoke_iter()`. Elements are read from
+    an InvokeStream and decoded `batch_size` at a time by `run`, which runs a
+    function off the event loop.
+
+    **Attributes:**
+
+    * **rest** - The rest of the result, without the array.
+    * **spill_path** - The file the encoded elements were spilled to, or None if they
+    are held in memory.
+    """
+
+    def __init__(
+        self,
+        stream: InvokeStream,
+        run: Callable[[Callable[[], Any]], Awaitable[Any]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.stream = stream
+        self.rest = stream.rest
+        self.spill_path = stream.spill_path
+        self.batch_size = batch_size
+        self._run = run
+        self._batch: Deque[Any] = collections.deque()
+        self._exhausted = False
+
+    def _read_batch(self) -> List[Any]:
+        return list(itertools.islice(self.stream, self.batch_size))
+
+    async def __anext__(self) -> Any:
+        if not self._batch:
+            if self._exhausted:
+                raise StopAsyncIteration
+            batch = await self._run(self._read_batch)
+            if len(batch) < self.batch_size:
+                self._exhausted = True
+            if not batch:
+                raise StopAsyncIteration
+            self._batch.extend(batch)
+        return self._batch.popleft()
+
+    def close(self) -> None:
+        """
+        Stop iterating, releasing the encoded elements and deleting the spill file
+        if there is one.
+        """
+        self._batch.clear()
+        self._exhausted = True
+        self.stream.close()
+
+    async def __aenter__(self) -> "AsyncInvokeStream":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, tb) -> None:
+        self.close()
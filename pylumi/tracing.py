@@ -0,0 +1,363 @@
+import contextlib
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from pylumi.ext import _pylumi
+from pylumi.hooks import CallHook
+
+# The gRPC method of the ResourceProvider service each provider method calls
+GRPC_METHODS = {
+    "get_schema": "GetSchema",
+    "check_config": "CheckConfig",
+    "diff_config": "DiffConfig",
+    "configure": "Configure",
+    "check": "Check",
+    "diff": "Diff",
+    "create": "Create",
+    "read": "Read",
+    "update": "Update",
+    "delete": "Delete",
+    "invoke": "Invoke",
+    "invoke_stream": "Invoke",
+    "get_plugin_info": "GetPluginInfo",
+    "signal_cancellation": "Cancel",
+}
+
+# The tag the Go host puts on gRPC spans with the ID of the call that made them
+CALL_ID_TAG = "pylumi.call_id"
+
+
+def _new_id(bits: int) -> str:
+    return format(random.getrandbits(bits), f"0{bits // 4}x")
+
+
+class Span(CallHook):
+    """
+    A timed operation. Every Provider method called on a traced context produces
+    a root span named `provider.<method>` with child spans for the phases of the
+    call:
+
+    - **encode** - encoding the Python arguments to JSON for the cgo bridge.
+    - **call** - the cgo call, including decoding the arguments into Go and the
+      gRPC request to the plugin.
+    - **grpc** - the gRPC request to the plugin, only present if native tracing is
+      enabled on the Tracer.
+    - **decode** - decoding the JSON response into Python objects.
+
+    Times are in seconds since the epoch.
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start",
+        "end",
+        "attributes",
+        "children",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        start: Optional[float] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.end = None
+        self.attributes = {} if attributes is None else attributes
+        self.children = []
+
+    @property
+    def duration(self) -> Optional[float]:
+        """
+        Duration of the span in seconds, or None if it has not ended
+        """
+        if self.end is None:
+            return None
+        return self.end - self.start
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """
+        Set an attribute on this span
+        """
+        self.attributes[key] = value
+
+    def child(
+        self,
+        name: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> "Span":
+        """
+        Create a child span of this span. If `end` is given the child is ended
+        immediately.
+        """
+        span = Span(self.tracer, name, self.trace_id, self.span_id, start, attributes)
+        span.end = end
+        self.children.append(span)
+        return span
+
+    def record(self, phase: str, start: float, end: float, nbytes: int = 0) -> None:
+        """
+        Record a completed phase of a provider call as a child span. This is called
+        by the native extension; `nbytes` is the size of the encoded request for
+        the "encode" phase and of the encoded response for the "decode" phase.
+        """
+        attributes = {}
+        if phase == "encode":
+            attributes["request_bytes"] = nbytes
+            self.attributes["request_bytes"] = (
+                self.attributes.get("request_bytes", 0) + nbytes
+            )
+        elif phase == "decode":
+            attributes["response_bytes"] = nbytes
+            self.attributes["response_bytes"] = (
+                self.attributes.get("response_bytes", 0) + nbytes
+            )
+        span = self.child(phase, start, end, attributes)
+        if phase == "call" and self.tracer.native:
+            self.tracer._attach_native_spans(
+                span, self.span_id, self.attributes.get("method")
+            )
+
+    def finish(self) -> None:
+        """
+        End this span. Ending a root span exports it along with all of its descendants.
+        """
+        self.end = time.time()
+        if self.parent_id is None:
+            self.tracer._export(self)
+
+    def iter_spans(self):
+        """
+        Iterate over this span and all of its descendants, depth-first.
+        """
+        yield self
+        for child in self.children:
+            yield from child.iter_spans()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Return a JSON-serializable representation of this span, not including children.
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "end": self.end,
+            "attributes": self.attributes,
+        }
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        if exc_value is not None:
+            self.set_attribute("error", repr(exc_value))
+        self.finish()
+
+    def __repr__(self) -> str:
+        return f"Span({self.name}, duration={self.duration})"
+
+
+class SpanExporter:
+    """
+    Base class for span exporters. Subclasses must implement `export()`.
+    """
+
+    def export(self, spans: Sequence[Span]) -> None:
+        """
+        Export a batch of finished spans. Called with a root span followed by all
+        of its descendants.
+        """
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """
+        Release any resources held by this exporter.
+        """
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Exporter that keeps finished spans in a list, useful for tests and ad-hoc analysis.
+    """
+
+    def __init__(self) -> None:
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def get_finished_spans(self) -> List[Span]:
+        """
+        Return a list of all spans exported so far
+        """
+        with self._lock:
+            return list(self.spans)
+
+    def clear(self) -> None:
+        """
+        Discard all spans exported so far
+        """
+        with self._lock:
+            self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """
+    Exporter that appends spans to a file as newline-delimited JSON objects.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a")
+
+    def export(self, spans: Sequence[Span]) -> None:
+        lines = "".join(
+            json.dumps(span.to_dict(), default=str) + "\n" for span in spans
+        )
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    """
+    Produces spans for Provider calls made through a context and hands them to
+    an exporter. Pass a tracer to a Context to enable tracing e.g.
+
+    .. code-block:: python
+
+       exporter = pylumi.tracing.InMemorySpanExporter()
+       with pylumi.Context(tracer=pylumi.tracing.Tracer(exporter)) as ctx:
+           ...
+
+    **Parameters:**
+
+    * **exporter** - The SpanExporter that finished spans are sent to.
+    * **native** - (optional) Also record the gRPC requests made by the Go host to
+    plugins, default False. This installs a process-wide OpenTracing tracer in Go,
+    which propagates the trace context into plugins that support it. Must be enabled
+    before any providers are started.
+    * **native_buffer_size** - (optional) The maximum number of unclaimed gRPC spans
+    buffered in Go, default 10000.
+    """
+
+    def __init__(
+        self,
+        exporter: SpanExporter,
+        native: bool = False,
+        native_buffer_size: int = 10000,
+    ) -> None:
+        self.exporter = exporter
+        self.native = native
+        self.native_buffer_size = native_buffer_size
+        self._native_lock = threading.Lock()
+        self._native_spans = []
+
+    def setup(self) -> None:
+        """
+        Enable native tracing if requested. Called by `Context.setup()`.
+        """
+        if self.native:
+            _pylumi.tracing_enable(self.native_buffer_size)
+
+    def start_span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Span:
+        """
+        Start a new root span
+        """
+        return Span(self, name, _new_id(128), attributes=attributes)
+
+    @contextlib.contextmanager
+    def native_call(self, span: Span):
+        """
+        Tag the gRPC spans recorded in Go while the body runs with the ID of `span`,
+        so they're attached to it. Calls are made on the current thread.
+        """
+        if not self.native:
+            yield
+            return
+        _pylumi.tracing_begin_call(span.span_id)
+        try:
+            yield
+        finally:
+            _pylumi.tracing_end_call()
+
+    def _attach_native_spans(
+        self, span: Span, call_id: str, method: Optional[str]
+    ) -> None:
+        """
+        Attach the gRPC spans recorded in Go during a cgo call to that call's span.
+        Spans are matched by the call ID they were tagged with (see native_call())
+        and their gRPC method; spans that no call claims are exported on their own
+        once they are older than a minute.
+        """
+        suffix = "/" + GRPC_METHODS.get(method, "")
+        with self._native_lock:
+            self._native_spans.extend(_pylumi.tracing_drain_spans())
+            remaining = []
+            orphans = []
+            for native in self._native_spans:
+                native_end = native["Start"] + native["Duration"]
+                operation = native["Operation"]
+                if native["Tags"].get(CALL_ID_TAG) == call_id and operation.endswith(
+                    suffix
+                ):
+                    span.child(
+                        "grpc",
+                        native["Start"],
+                        native_end,
+                        dict(native["Tags"], operation=operation),
+                    )
+                elif native_end < span.start - 60:
+                    orphans.append(native)
+                else:
+                    remaining.append(native)
+            self._native_spans = remaining
+
+        for native in orphans:
+            orphan = Span(
+                self,
+                "grpc",
+                native["TraceID"],
+                start=native["Start"],
+                attributes=dict(native["Tags"], operation=native["Operation"]),
+            )
+            orphan.end = native["Start"] + native["Duration"]
+            self._export(orphan)
+
+    def _export(self, span: Span) -> None:
+        self.exporter.export(list(span.iter_spans()))
+
+    def shutdown(self) -> None:
+        """
+        Shut down the exporter
+        """
+        self.exporter.shutdown()
@@ -0,0 +1,179 @@
+"""
+Measurements of the transport between Python and provider plugins, by payload
+size. Pass a TransportMonitor to a provider to see how call latency scales with
+the size of the encoded request and response:
+
+.. code-block:: python
+
+   monitor = pylumi.transport.TransportMonitor()
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, transport=monitor)
+
+   ...
+   for bucket, stats in monitor.stats().items():
+       print(bucket, stats["count"], stats["call"]["p95"])
+
+The monitor only measures calls; it doesn't change any transport settings. The
+gRPC connections to plugins are dialed by the Pulumi SDK with its own message
+size limit, flow control windows, keepalive and compression settings, which
+can't be configured from here.
+
+Requests larger than the SDK's message size limit fail in the plugin's gRPC
+transport. If a call with a request larger than `report_limit` fails, a
+PayloadTooLargeError naming the size and the limit is raised instead of the
+transport's error.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from pylumi.exc import PayloadTooLargeError, ProviderError
+from pylumi.hooks import CallHook
+from pylumi.stats import DurationStats
+
+# The maximum gRPC message size the Pulumi SDK allows between the host and plugins
+DEFAULT_MAX_MESSAGE_SIZE = 400 * 2**20
+
+# Upper bounds of the payload size buckets, in bytes
+BUCKETS: Sequence[Tuple[str, float]] = (
+    ("<1KiB", 2**10),
+    ("1KiB-16KiB", 2**14),
+    ("16KiB-256KiB", 2**18),
+    ("256KiB-4MiB", 2**22),
+    (">=4MiB", float("inf")),
+)
+
+PHASES = ("encode", "call", "decode", "total")
+
+
+class _Bucket:
+    def __init__(self, history: int) -> None:
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.phases = {phase: DurationStats(history) for phase in PHASES}
+
+
+class CallMeasurement(CallHook):
+    """
+    Measurement of a single provider call, see `pylumi.hooks`
+    """
+
+    __slots__ = ("request_bytes", "response_bytes", "durations", "start")
+
+    def __init__(self) -> None:
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.durations: Dict[str, float] = {}
+        self.start = time.time()
+
+    def record(self, phase: str, start: float, end: float, nbytes: int = 0) -> None:
+        """
+        Record a completed phase of the call
+        """
+        if phase == "encode":
+            self.request_bytes += nbytes
+        elif phase == "decode":
+            self.response_bytes += nbytes
+        self.durations[phase] = self.durations.get(phase, 0.0) + end - start
+
+
+class TransportMonitor:
+    """
+    Call latency statistics by payload size, for one or more providers.
+
+    **Parameters:**
+
+    * **report_limit** - (optional) The request size in bytes beyond which failed
+    calls raise PayloadTooLargeError, default 400 MiB, the message size limit used by
+    the Pulumi SDK. This only changes how errors are reported, not the SDK's limit.
+    * **history** - (optional) The number of recent calls per size bucket used to
+    compute percentiles, default 1024.
+    """
+
+    def __init__(
+        self, report_limit: int = DEFAULT_MAX_MESSAGE_SIZE, history: int = 1024
+    ) -> None:
+        self.report_limit = report_limit
+        self.history = history
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._buckets = {name: _Bucket(history) for name, _ in BUCKETS}
+
+    def measure(self) -> CallMeasurement:
+        """
+        Start measuring a call
+        """
+        return CallMeasurement()
+
+    def complete(
+        self,
+        method: str,
+        measurement: CallMeasurement,
+        error: Optional[ProviderError] = None,
+    ) -> Optional[ProviderError]:
+        """
+        Add a finished call to the statistics.
+
+        **Returns:**
+
+        The error to raise for a failed call: a PayloadTooLargeError if the request
+        was larger than `report_limit`, otherwise `error`.
+        """
+        # Waiting for a byte budget isn't part of the transport's latency
+        total = (
+            time.time() - measurement.start - measurement.durations.get("admit", 0.0)
+        )
+        size = measurement.request_bytes + measurement.response_bytes
+        name = next(name for name, limit in BUCKETS if size < limit)
+        with self._lock:
+            if error is not None:
+                self.errors += 1
+            bucket = self._buckets[name]
+            bucket.request_bytes += measurement.request_bytes
+            bucket.response_bytes += measurement.response_bytes
+            for phase, duration in measurement.durations.items():
+                if phase in bucket.phases:
+                    bucket.phases[phase].record(duration)
+            bucket.phases["total"].record(total)
+        if (
+            error is not None
+            and not isinstance(error, PayloadTooLargeError)
+            and measurement.request_bytes > self.report_limit
+        ):
+            return PayloadTooLargeError(
+                method, measurement.request_bytes, self.report_limit, error.message
+            )
+        return error
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get latency statistics by payload size.
+
+        **Returns:**
+
+        A dictionary of payload size buckets (by request plus response bytes) to
+        dictionaries with the keys `count`, `request_bytes` and `response_bytes`
+        (mean encoded sizes) and `encode`, `call`, `decode` and `total`, each a
+        dictionary of `mean`, `max`, `p50`, `p95` and `p99` durations in seconds.
+        Percentiles are over recent calls.
+        """
+        out = {}
+        with self._lock:
+            for name, bucket in self._buckets.items():
+                count = bucket.phases["total"].count
+                out[name] = {
+                    "count": count,
+                    "request_bytes": bucket.request_bytes / count if count else 0.0,
+                    "response_bytes": bucket.response_bytes / count if count else 0.0,
+                }
+                for phase, durations in bucket.phases.items():
+                    out[name][phase] = durations.summary()
+        return out
+
+    def reset(self) -> None:
+        """
+        Clear all statistics
+        """
+        with self._lock:
+            self.errors = 0
+            self._buckets = {name: _Bucket(self.history) for name, _ in BUCKETS}
@@ -0,0 +1,112 @@
+"""
+Runtime support for the classes generated by `pylumi.codegen`.
+"""
+
+import enum
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar
+
+from pylumi.constants import UnknownValue
+
+BagType = TypeVar("BagType", bound="PropertyBag")
+
+
+class PropertyBag:
+    """
+    Base class for generated resource input/output and function argument/result
+    classes. Subclasses define `__slots__`, `_FIELDS` and specialized
+    `to_properties()` and `from_properties()` methods.
+    """
+
+    __slots__ = ()
+
+    # Tuple of (attribute name, property name) pairs
+    _FIELDS: Tuple[Tuple[str, str], ...] = ()
+
+    def to_properties(self) -> Dict[str, Any]:
+        """
+        Convert this object to a property dictionary that can be passed to Provider
+        methods. Attributes set to None are omitted.
+        """
+        raise NotImplementedError
+
+    @classmethod
+    def from_properties(cls: Type[BagType], props: Dict[str, Any]) -> BagType:
+        """
+        Construct an object from a property dictionary returned from a Provider method.
+        Unknown properties are ignored.
+        """
+        raise NotImplementedError
+
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(
+            getattr(self, attr) == getattr(other, attr) for attr, _ in self._FIELDS
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{attr}={getattr(self, attr)!r}"
+            for attr, _ in self._FIELDS
+            if getattr(self, attr) is not None
+        )
+        return f"{type(self).__name__}({fields})"
+
+
+def to_value(value: Any) -> Any:
+    """
+    Convert a value that may contain PropertyBag objects or enum members to its
+    property encoding. Unknown values are left as-is.
+    """
+    if isinstance(value, PropertyBag):
+        return value.to_properties()
+    if isinstance(value, list):
+        return [to_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_value(item) for key, item in value.items()}
+    if isinstance(value, enum.Enum) and not isinstance(value, UnknownValue):
+        return value.value
+    return value
+
+
+def from_object(cls: Type[BagType], value: Any) -> Any:
+    """
+    Convert a property dictionary to an instance of `cls`. None and unknown values
+    are returned as-is.
+    """
+    if value is None or isinstance(value, UnknownValue):
+        return value
+    return cls.from_properties(value)
+
+
+def from_list(convert: Callable[[Any], Any], value: Any) -> Any:
+    """
+    Convert each item of a list with `convert`. None and unknown values are
+    returned as-is.
+    """
+    if value is None or isinstance(value, UnknownValue):
+        return value
+    return [convert(item) for item in value]
+
+
+def from_map(convert: Callable[[Any], Any], value: Any) -> Any:
+    """
+    Convert each value of a dictionary with `convert`. None and unknown values are
+    returned as-is.
+    """
+    if value is None or isinstance(value, UnknownValue):
+        return value
+    return {key: convert(item) for key, item in value.items()}
+
+
+def from_enum(cls: Type[enum.Enum], value: Any) -> Optional[Any]:
+    """
+    Convert a value to a member of the enum `cls`. None, unknown values and values
+    that are not members of the enum are returned as-is.
+    """
+    if value is None or isinstance(value, UnknownValue):
+        return value
+    try:
+        return cls(value)
+    except ValueError:
+        return value
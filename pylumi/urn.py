@@ -1,9 +1,11 @@
 import dataclasses as dc
+import functools
 import re
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Set
 
 from pylumi import exc
 
-
 URN_TEMPLATE = "urn:pulumi:{stack}::{project}::{type}::{name}"
 
 
@@ -15,13 +17,43 @@ URN_PATTERNS = (
 )
 
 
+COMPILED_URN_PATTERNS = tuple(map(re.compile, URN_PATTERNS))
+
+
 BLANK = "_"
 
 
-@dc.dataclass(frozen=True, repr=False)
+# Maximum number of distinct URN strings whose parsed components are cached
+PARSE_CACHE_SIZE = 65536
+
+
+FIELDS = ("type", "name", "stack", "project")
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse(urn: str):
+    """
+    Parse a URN string into interned (type, name, stack, project) components.
+    """
+    for pattern in COMPILED_URN_PATTERNS:
+        match = pattern.match(urn)
+        if match is not None:
+            groups = match.groupdict()
+            return tuple(sys.intern(groups.get(key) or BLANK) for key in FIELDS)
+    raise exc.InvalidURN(urn)
+
+
+@dc.dataclass(frozen=True, repr=False, eq=False)
 class URN:
     """
-    A URN builder class
+    A URN builder class. URN objects are immutable and hashable, and have the
+    attributes `type`, `name`, `stack` and `project`. A full URN string can be
+    passed as the first argument e.g. URN('urn:pulumi:...'), in which case any
+    other non-blank components passed explicitly take precedence over the parsed
+    ones.
+
+    Components are interned and the rendered string is cached, so URNs are cheap
+    to hold in large numbers and to pass repeatedly to Provider methods.
     """
 
     type: str
@@ -29,32 +61,65 @@ class URN:
     stack: str = BLANK
     project: str = BLANK
 
+    def __post_init__(self) -> None:
+        type_, name, stack, project = self.type, self.name, self.stack, self.project
+        if type_.startswith("urn:pulumi"):
+            parsed = _parse(type_)
+            type_ = parsed[0]
+            name = parsed[1] if name == BLANK else name
+            stack = parsed[2] if stack == BLANK else stack
+            project = parsed[3] if project == BLANK else project
+
+        setattr_ = object.__setattr__
+        setattr_(self, "type", sys.intern(type_))
+        setattr_(self, "name", sys.intern(name))
+        setattr_(self, "stack", sys.intern(stack))
+        setattr_(self, "project", sys.intern(project))
+        # Caches, not dataclass fields
+        setattr_(self, "_rendered", None)
+        setattr_(self, "_hash", None)
+
     @classmethod
     def parse(cls, urn: str) -> "URN":
         """
         Construct a URN object from a string. Does not need to be called directly,
         a string can be passed as a positional argument to URN e.g. URN('urn:pulumi...')
         """
-        for pattern in URN_PATTERNS:
-            srch = re.search(pattern, urn)
-            if srch is not None:
-                groups = srch.groupdict()
-                return cls(**groups)
-
-        raise exc.InvalidURN(urn)
+        return cls(*_parse(urn))
 
-    def __post_init__(self) -> None:
-        if self.type.startswith("urn:pulumi"):
-            obj = type(self).parse(self.type)
-            for key, val in dc.asdict(obj).items():
-                if self.__dict__[key] == BLANK or key == "type":
-                    self.__dict__[key] = val
+    @classmethod
+    def parse_many(cls, urns: Iterable[str]) -> List["URN"]:
+        """
+        Construct URN objects from many strings at once. Repeated strings share
+        a single URN object.
+        """
+        out = []
+        seen = {}
+        for urn in urns:
+            obj = seen.get(urn)
+            if obj is None:
+                obj = seen[urn] = cls.parse(urn)
+            out.append(obj)
+        return out
+
+    @staticmethod
+    def render_many(urns: Iterable["URN"]) -> List[str]:
+        """
+        Render many URN objects to strings at once.
+        """
+        return [urn.render() for urn in urns]
 
     def render(self) -> str:
         """
         Render this URN object to a string
         """
-        return URN_TEMPLATE.format_map(dc.asdict(self))
+        rendered = self._rendered
+        if rendered is None:
+            rendered = (
+                f"urn:pulumi:{self.stack}::{self.project}::{self.type}::{self.name}"
+            )
+            object.__setattr__(self, "_rendered", rendered)
+        return rendered
 
     def replace(self, **kwargs) -> "URN":
         """
@@ -62,6 +127,24 @@ class URN:
         """
         return dc.replace(self, **kwargs)
 
+    def _key(self):
+        return (self.type, self.name, self.stack, self.project)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self is other or self._key() == other._key()
+
+    def __hash__(self) -> int:
+        hash_ = self._hash
+        if hash_ is None:
+            hash_ = hash(self._key())
+            object.__setattr__(self, "_hash", hash_)
+        return hash_
+
+    def __reduce__(self):
+        return (type(self), self._key())
+
     def __repr__(self) -> str:
         """
         Render an object representation for this URN.
@@ -73,3 +156,81 @@ class URN:
         Render a string representation of this URN.
         """
         return self.render()
+
+
+class URNIndex:
+    """
+    An index from resource type tokens to URNs, for fast lookups of all of the
+    resources of a given type in a large state.
+    """
+
+    def __init__(self, urns: Iterable[URN] = ()) -> None:
+        self._by_type: Dict[str, Set[URN]] = {}
+        self.add_many(urns)
+
+    def add(self, urn: URN) -> None:
+        """
+        Add a URN to the index
+        """
+        urns = self._by_type.get(urn.type)
+        if urns is None:
+            urns = self._by_type[urn.type] = set()
+        urns.add(urn)
+
+    def add_many(self, urns: Iterable[URN]) -> None:
+        """
+        Add many URNs to the index
+        """
+        for urn in urns:
+            self.add(urn)
+
+    def remove(self, urn: URN) -> None:
+        """
+        Remove a URN from the index. Raises KeyError if it is not present.
+        """
+        urns = self._by_type[urn.type]
+        urns.remove(urn)
+        if not urns:
+            del self._by_type[urn.type]
+
+    def discard(self, urn: URN) -> None:
+        """
+        Remove a URN from the index if it is present.
+        """
+        try:
+            self.remove(urn)
+        except KeyError:
+            pass
+
+    def by_type(self, type: str) -> Set[URN]:
+        """
+        Get all of the URNs in the index with the given type token
+        """
+        return set(self._by_type.get(type, ()))
+
+    def types(self) -> List[str]:
+        """
+        Get all of the type tokens in the index
+        """
+        return list(self._by_type)
+
+    def get(self, type: str, name: str) -> Optional[URN]:
+        """
+        Get a URN in the index by type and name, or None if there is no such URN.
+        If several stacks or projects have a resource of that type and name, any
+        of them may be returned.
+        """
+        for urn in self._by_type.get(type, ()):
+            if urn.name == name:
+                return urn
+        return None
+
+    def __contains__(self, urn: URN) -> bool:
+        return urn in self._by_type.get(urn.type, ())
+
+    def __iter__(self) -> Iterator[URN]:
+        for urns in self._by_type.values():
+            yield from urns
+
+    def __len__(self) -> int:
+        return sum(map(len, self._by_type.values()))
@@ -0,0 +1,337 @@
+"""
+In-process validation of inputs against provider schemas. Validators are compiled
+from the schema's property types, required lists and enums the first time each
+resource, function or type is validated, and cached per provider and plugin
+version. Enable them on a provider with `Context.provider(..., validate_inputs=True)`
+to catch invalid inputs before calling the provider.
+
+Failures have the same shape as the failures returned by `Provider.check()`: a
+list of dictionaries with a **Property** key, the path of the invalid property
+e.g. `website.routingRules[0].prefix`, and a **Reason** key.
+"""
+
+import threading
+import urllib.parse
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pylumi.constants import UnknownValue
+
+Failure = Dict[str, str]
+
+# A compiled validator takes (value, path, failures) and appends any failures
+Validator = Callable[[Any, str, List[Failure]], None]
+
+_PRIMITIVE_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+}
+
+_TYPE_NAMES = {
+    bool: "boolean",
+    int: "integer",
+    float: "number",
+    str: "string",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+}
+
+
+def _type_name(value: Any) -> str:
+    return _TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _failure(path: str, reason: str) -> Failure:
+    return {"Property": path, "Reason": reason}
+
+
+def _accept(value: Any, path: str, failures: List[Failure]) -> None:
+    pass
+
+
+def _primitive(type_: str) -> Validator:
+    types = _PRIMITIVE_TYPES[type_]
+
+    def validate(value, path, failures):
+        if isinstance(value, bool):
+            valid = type_ == "boolean"
+        elif type_ == "integer" and isinstance(value, float):
+            valid = value.is_integer()
+        else:
+            valid = isinstance(value, types)
+        if not valid:
+            failures.append(
+                _failure(path, f"expected {type_}, got {_type_name(value)}")
+            )
+
+    return validate
+
+
+def _array(items: Validator) -> Validator:
+    def validate(value, path, failures):
+        if not isinstance(value, (list, tuple)):
+            failures.append(_failure(path, f"expected array, got {_type_name(value)}"))
+            return
+        if items is _accept:
+            return
+        for idx, item in enumerate(value):
+            if item is not None and not isinstance(item, UnknownValue):
+                items(item, f"{path}[{idx}]", failures)
+
+    return validate
+
+
+def _map(values: Validator) -> Validator:
+    def validate(value, path, failures):
+        if not isinstance(value, dict):
+            failures.append(_failure(path, f"expected object, got {_type_name(value)}"))
+            return
+        if values is _accept:
+            return
+        for key, item in value.items():
+            if item is not None and not isinstance(item, UnknownValue):
+                values(item, _join(path, key), failures)
+
+    return validate
+
+
+def _enum(allowed: Tuple[Any, ...]) -> Validator:
+    allowed_set = frozenset(allowed)
+    description = ", ".join(map(repr, allowed))
+
+    def validate(value, path, failures):
+        try:
+            valid = value in allowed_set
+        except TypeError:
+            valid = False
+        if not valid:
+            failures.append(
+                _failure(
+                    path, f"{value!r} is not one of the allowed values: {description}"
+                )
+            )
+
+    return validate
+
+
+def _one_of(options: Tuple[Validator, ...]) -> Validator:
+    def validate(value, path, failures):
+        reasons = []
+        for option in options:
+            option_failures = []
+            option(value, path, option_failures)
+            if not option_failures:
+                return
+            reasons.extend(failure["Reason"] for failure in option_failures)
+        failures.append(
+            _failure(path, f"does not match any allowed type: {'; '.join(reasons)}")
+        )
+
+    return validate
+
+
+def _object(properties: Dict[str, Validator], required: Tuple[str, ...]) -> Validator:
+    def validate(value, path, failures):
+        if not isinstance(value, dict):
+            failures.append(_failure(path, f"expected object, got {_type_name(value)}"))
+            return
+        for name in required:
+            if value.get(name) is None:
+                failures.append(
+                    _failure(_join(path, name), "missing required property")
+                )
+        for key, item in value.items():
+            if item is None or isinstance(item, UnknownValue):
+                continue
+            validator = properties.get(key)
+            if validator is not None:
+                validator(item, _join(path, key), failures)
+
+    return validate
+
+
+class SchemaValidator:
+    """
+    Validators for the resources, functions and provider configuration described
+    by a provider schema. Validators are compiled on first use.
+    """
+
+    def __init__(self, schema: Dict[str, Any]) -> None:
+        self.schema = schema
+        self._lock = threading.RLock()
+        self._types: Dict[str, Validator] = {}
+        self._resources: Dict[str, Validator] = {}
+        self._functions: Dict[str, Validator] = {}
+        self._config: Optional[Validator] = None
+
+    def _compile_property(self, spec: Dict[str, Any]) -> Validator:
+        ref = spec.get("$ref")
+        if ref is not None:
+            if not ref.startswith("#/types/"):
+                # Any, Archive, Asset, Json and references to other schemas
+                return _accept
+            return self._type_validator(urllib.parse.unquote(ref[len("#/types/") :]))
+        if "oneOf" in spec:
+            return _one_of(tuple(map(self._compile_property, spec["oneOf"])))
+        type_ = spec.get("type")
+        if type_ in _PRIMITIVE_TYPES:
+            return _primitive(type_)
+        if type_ == "array":
+            return _array(self._compile_property(spec.get("items", {})))
+        if type_ == "object":
+            additional = spec.get("additionalProperties")
+            return _map(
+                _accept if additional is None else self._compile_property(additional)
+            )
+        return _accept
+
+    def _compile_object(
+        self, properties: Dict[str, Any], required: Optional[List[str]]
+    ) -> Validator:
+        # Required properties with a default, or a default read from the
+        # environment, are filled in by the provider
+        return _object(
+            {name: self._compile_property(spec) for name, spec in properties.items()},
+            tuple(
+                name
+                for name in required or ()
+                if not (
+                    "default" in properties.get(name, {})
+                    or "defaultInfo" in properties.get(name, {})
+                )
+            ),
+        )
+
+    def _type_validator(self, token: str) -> Validator:
+        validator = self._types.get(token)
+        if validator is not None:
+            return validator
+
+        spec = self.schema.get("types", {}).get(token)
+        if spec is None:
+            return _accept
+
+        # Types can be recursive, so register an indirection before compiling
+        compiled = []
+        self._types[token] = lambda value, path, failures: compiled[0](
+            value, path, failures
+        )
+        if "enum" in spec:
+            validator = _enum(tuple(value["value"] for value in spec["enum"]))
+        else:
+            validator = self._compile_object(
+                spec.get("properties", {}), spec.get("required")
+            )
+        compiled.append(validator)
+        self._types[token] = validator
+        return validator
+
+    def resource_validator(self, token: str) -> Validator:
+        """
+        Get the validator for the inputs of a resource type. Resource types that are
+        not in the schema are not validated.
+        """
+        with self._lock:
+            validator = self._resources.get(token)
+            if validator is None:
+                spec = self.schema.get("resources", {}).get(token)
+                if spec is None:
+                    validator = _accept
+                else:
+                    validator = self._compile_object(
+                        spec.get("inputProperties", {}), spec.get("requiredInputs")
+                    )
+                self._resources[token] = validator
+            return validator
+
+    def function_validator(self, token: str) -> Validator:
+        """
+        Get the validator for the arguments of a function. Functions that are not in
+        the schema are not validated.
+        """
+        with self._lock:
+            validator = self._functions.get(token)
+            if validator is None:
+                spec = self.schema.get("functions", {}).get(token)
+                inputs = (spec or {}).get("inputs")
+                if inputs is None:
+                    validator = _accept
+                else:
+                    validator = self._compile_object(
+                        inputs.get("properties", {}), inputs.get("required")
+                    )
+                self._functions[token] = validator
+            return validator
+
+    def config_validator(self) -> Validator:
+        """
+        Get the validator for the provider configuration
+        """
+        with self._lock:
+            if self._config is None:
+                spec = self.schema.get("provider") or {}
+                self._config = self._compile_object(
+                    spec.get("inputProperties", {}), spec.get("requiredInputs")
+                )
+            return self._config
+
+    def validate_resource(self, token: str, inputs: Dict[str, Any]) -> List[Failure]:
+        """
+        Validate the inputs of a resource, returning a list of failures
+        """
+        failures = []
+        self.resource_validator(token)(inputs, "", failures)
+        return failures
+
+    def validate_function(self, token: str, args: Dict[str, Any]) -> List[Failure]:
+        """
+        Validate the arguments of a function, returning a list of failures
+        """
+        failures = []
+        self.function_validator(token)(args, "", failures)
+        return failures
+
+    def validate_config(self, config: Dict[str, Any]) -> List[Failure]:
+        """
+        Validate provider configuration, returning a list of failures
+        """
+        failures = []
+        self.config_validator()(config, "", failures)
+        return failures
+
+
+_CACHE_LOCK = threading.Lock()
+
+_CACHE: Dict[Tuple[str, str], SchemaValidator] = {}
+
+
+def get_validator(
+    provider: str, version: str, load_schema: Callable[[], Dict[str, Any]]
+) -> SchemaValidator:
+    """
+    Get the cached SchemaValidator for a version of a provider plugin, calling
+    `load_schema` to get the schema if there isn't one yet.
+    """
+    key = (provider, version)
+    with _CACHE_LOCK:
+        validator = _CACHE.get(key)
+    if validator is not None:
+        return validator
+
+    validator = SchemaValidator(load_schema())
+    with _CACHE_LOCK:
+        return _CACHE.setdefault(key, validator)
+
+
+def clear_cache() -> None:
+    """
+    Discard all cached validators
+    """
+    with _CACHE_LOCK:
+        _CACHE.clear()
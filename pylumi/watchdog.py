@@ -0,0 +1,284 @@
+"""
+A watchdog for provider calls that take too long, e.g. a plugin stuck on a
+network call or deadlocked. Pass a Watchdog to providers to track their calls in
+flight; each call still running after `threshold` seconds is reported once, with
+its method, URN, request size, plugin process ID and elapsed time:
+
+.. code-block:: python
+
+   watchdog = pylumi.watchdog.Watchdog(threshold=60, dump_goroutines=True)
+   aws = ctx.provider("aws", {"aws:region": "us-east-1"}, watchdog=watchdog)
+
+   with watchdog:
+       aws.create(urn, inputs)
+
+   # From another thread, e.g. a debugging endpoint
+   for call in watchdog.in_flight():
+       print(call.method, call.urn, call.elapsed())
+
+Reports are logged as warnings to the `pylumi.watchdog` logger and passed to
+`callback` if given. With `dump_goroutines`, the stack traces of all goroutines
+in the Go runtime are added to the first report of each check, which shows where
+the Go side of stuck calls is waiting.
+"""
+
+import dataclasses as dc
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pylumi.exc import PylumiGoError
+from pylumi.ext import _pylumi
+from pylumi.hooks import CallHook
+
+logger = logging.getLogger("pylumi.watchdog")
+
+
+@dc.dataclass(frozen=True)
+class InFlightCall:
+    """
+    A snapshot of a provider call in flight.
+
+    **Attributes:**
+
+    * **id** - A number identifying the call, unique within its watchdog.
+    * **provider** - The name of the provider.
+    * **method** - The provider method, e.g. `create`.
+    * **urn** - The URN of the resource, or None if the method has none.
+    * **request_bytes** - The size of the encoded request, or None if it hasn't been
+    encoded yet.
+    * **plugin_pid** - The process ID of the plugin, or None if unknown.
+    * **started** - When the call started, as a UNIX timestamp. Calls waiting for a
+    byte budget start when they're admitted.
+    * **thread** - The name of the thread making the call.
+    """
+
+    id: int
+    provider: str
+    method: str
+    urn: Optional[str]
+    request_bytes: Optional[int]
+    plugin_pid: Optional[int]
+    started: float
+    thread: str
+
+    def elapsed(self) -> float:
+        """
+        Get the number of seconds since the call started
+        """
+        return time.time() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Get the call as a JSON-serializable dictionary, including `elapsed`
+        """
+        return dict(dc.asdict(self), elapsed=self.elapsed())
+
+
+class _Call(CallHook):
+    """
+    A call being tracked, in flight from begin() until end()
+    """
+
+    __slots__ = (
+        "watchdog",
+        "id",
+        "provider",
+        "method",
+        "urn",
+        "request_bytes",
+        "started",
+        "thread",
+        "reported",
+    )
+
+    def __init__(
+        self, watchdog: "Watchdog", id: int, provider: Any, method: str, urn: Any
+    ):
+        self.watchdog = watchdog
+        self.id = id
+        self.provider = provider
+        self.method = method
+        self.urn = None if urn is None else str(urn)
+        self.request_bytes = None
+        self.started = time.time()
+        self.thread = threading.current_thread().name
+        self.reported = False
+
+    def begin(self) -> None:
+        self.started = time.time()
+        with self.watchdog._lock:
+            self.watchdog._calls[self.id] = self
+
+    def record(self, phase: str, start: float, end: float, nbytes: int = 0) -> None:
+        if phase == "encode":
+            self.request_bytes = (self.request_bytes or 0) + nbytes
+
+    def end(self) -> None:
+        with self.watchdog._lock:
+            self.watchdog._calls.pop(self.id, None)
+
+    def snapshot(self, plugin_pid: Optional[int] = None) -> InFlightCall:
+        return InFlightCall(
+            self.id,
+            self.provider.name,
+            self.method,
+            self.urn,
+            self.request_bytes,
+            plugin_pid if plugin_pid is not None else self.provider._plugin_pid,
+            self.started,
+            self.thread,
+        )
+
+
+class Watchdog:
+    """
+    Tracks provider calls in flight and reports those that take too long. Reports
+    are made by a background thread that runs between start() and stop(), or while
+    the watchdog is used as a context manager. A watchdog can be shared by several
+    providers and threads.
+
+    **Parameters:**
+
+    * **threshold** - (optional) The number of seconds after which a call is reported,
+    default 30.
+    * **interval** - (optional) The number of seconds between checks for slow calls,
+    default 1.
+    * **dump_goroutines** - (optional) Include the stack traces of all goroutines in
+    reports, default False.
+    * **callback** - (optional) A function called with a dictionary for each slow call,
+    with the keys of `InFlightCall.to_dict()` plus `goroutines`, the goroutine stack
+    traces or None.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 30.0,
+        interval: float = 1.0,
+        dump_goroutines: bool = False,
+        callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self.dump_goroutines = dump_goroutines
+        self.callback = callback
+        self.reported = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._calls: Dict[int, _Call] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def track(self, provider: Any, method: str, urn: Any = None) -> CallHook:
+        """
+        Get the hook that tracks a call of `provider` while it's in flight, see
+        `pylumi.hooks`
+        """
+        return _Call(self, next(self._ids), provider, method, urn)
+
+    def in_flight(self) -> List[InFlightCall]:
+        """
+        Get the calls in flight, oldest first
+        """
+        with self._lock:
+            calls = list(self._calls.values())
+        return sorted((call.snapshot() for call in calls), key=lambda c: c.started)
+
+    def check(self) -> List[Dict[str, Any]]:
+        """
+        Report calls that have been running for longer than `threshold` and haven't
+        been reported yet. This is called periodically by the background thread.
+
+        **Returns:**
+
+        The reports that were made.
+        """
+        cutoff = time.time() - self.threshold
+        with self._lock:
+            slow = [
+                call
+                for call in self._calls.values()
+                if not call.reported and call.started <= cutoff
+            ]
+            for call in slow:
+                call.reported = True
+        if not slow:
+            return []
+
+        goroutines = None
+        if self.dump_goroutines:
+            try:
+                goroutines = _pylumi.diagnostics_goroutine_stacks()
+            except PylumiGoError:
+                logger.exception("Unable to get goroutine stack traces.")
+
+        reports = []
+        for call in sorted(slow, key=lambda c: c.started):
+            report = call.snapshot(self._plugin_pid(call.provider)).to_dict()
+            report["goroutines"] = goroutines
+            logger.warning(
+                "Provider call %s.%s has been running for %.1fs "
+                "(urn=%s, request_bytes=%s, plugin_pid=%s, thread=%s)%s",
+                report["provider"],
+                report["method"],
+                report["elapsed"],
+                report["urn"],
+                report["request_bytes"],
+                report["plugin_pid"],
+                report["thread"],
+                "" if goroutines is None else "\n\nGoroutines:\n\n" + goroutines,
+            )
+            # Goroutines are only logged once per check
+            goroutines = None
+            if self.callback is not None:
+                self.callback(report)
+            reports.append(report)
+        self.reported += len(reports)
+        return reports
+
+    @staticmethod
+    def _plugin_pid(provider: Any) -> Optional[int]:
+        if provider._plugin_pid is not None:
+            return provider._plugin_pid
+        try:
+            return provider.plugin_pid()
+        except PylumiGoError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception:
+                logger.exception("Error checking for slow provider calls.")
+
+    def start(self) -> None:
+        """
+        Start checking for slow calls in a background thread
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pylumi-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background thread
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> "Watchdog":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb) -> None:
+        self.stop()
@@ -6,13 +6,54 @@ import botocore
 import pytest
 import pylumi
 
-
 TEST_BUCKET = os.getenv("PYLUMI_TEST_BUCKET", "clf-misc")
 
 TEST_REGION = os.getenv("PYLUMI_TEST_REGION", "us-east-2")
 
 TEST_KEY = os.getenv("PYLUMI_TEST_KEY", f"pylumi-test-{uuid.uuid4().hex}.txt")
 
+# Modules whose reference to the native extension is replaced by fake_extension
+FAKE_EXTENSION_MODULES = (
+    "pylumi.context",
+    "pylumi.provider",
+    "pylumi.tracing",
+    "pylumi.watchdog",
+)
+
+
+class FakeExtension:
+    """
+    Stand-in for the native extension in tests that don't start plugins. Functions
+    are given with `define()`; functions that aren't defined return None. The name
+    of every function called is appended to `calls`.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.functions = {}
+
+    def define(self, name, func=None):
+        """
+        Define a function, either as `define(name, func)` or as a decorator of a
+        function with the same name
+        """
+        if func is None and callable(name):
+            name, func = name.__name__, name
+        self.functions[name] = func
+        return func
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        func = self.functions.get(name)
+
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            if func is not None:
+                return func(*args, **kwargs)
+
+        return call
+
 
 async def resolve_value(async_, value):
     if async_:
@@ -48,3 +89,11 @@ def s3_key(s3_client):
         s3_client.delete_object(Bucket=TEST_BUCKET, Key=TEST_KEY)
     except botocore.exceptions.ClientError:
         pass
+
+
+@pytest.fixture
+def fake_extension(monkeypatch):
+    extension = FakeExtension()
+    for module in FAKE_EXTENSION_MODULES:
+        monkeypatch.setattr(f"{module}._pylumi", extension)
+    return extension
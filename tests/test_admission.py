@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+import pylumi
+from pylumi.admission import ByteBudget
+from pylumi.watchdog import Watchdog
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::_"
+
+
+class Concurrency:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, exc_type, exc_value, tb):
+        with self.lock:
+            self.running -= 1
+
+
+@pytest.fixture
+def concurrency(fake_extension):
+    concurrency = Concurrency()
+
+    @fake_extension.define
+    def provider_create(ctx, provider, urn, news, timeout, preview, **kwargs):
+        trace = kwargs["trace"]
+        trace.record("encode", 0.0, 0.0, len(news["data"]))
+        with concurrency:
+            time.sleep(0.01)
+        trace.record("call", 0.0, 0.0, 0)
+        trace.record("decode", 0.0, 0.0, 10)
+        return {"ID": "bucket", "Properties": news}
+
+    return concurrency
+
+
+def test_byte_budget(concurrency):
+    budget = ByteBudget(250)
+    provider = pylumi.Context(byte_budget=budget).provider("aws")
+
+    threads = [
+        threading.Thread(target=provider.create, args=(URN, {"data": "x" * 100}))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Two 100 byte requests fit, a third doesn't
+    assert concurrency.max_running == 2
+    stats = budget.stats()
+    assert stats["in_use"] == 0
+    assert stats["peak"] <= 250
+    assert stats["waiting"] == 0
+    assert stats["admitted"] == 8
+    assert stats["wait"]["max"] > 0
+
+
+def test_byte_budget_oversized(concurrency):
+    budget = ByteBudget(50)
+    provider = pylumi.Context(byte_budget=budget).provider("aws")
+    # Requests larger than the budget are admitted alone
+    provider.create(URN, {"data": "x" * 100})
+    assert budget.stats()["peak"] == 110
+    assert budget.in_use == 0
+
+
+def test_byte_budget_order():
+    budget = ByteBudget(100)
+    budget.acquire(100)
+    admitted = []
+
+    def acquire(name, nbytes):
+        budget.acquire(nbytes)
+        admitted.append(name)
+
+    large = threading.Thread(target=acquire, args=("large", 80))
+    large.start()
+    while budget.waiting() < 1:
+        time.sleep(0.001)
+    small = threading.Thread(target=acquire, args=("small", 10))
+    small.start()
+    while budget.waiting() < 2:
+        time.sleep(0.001)
+
+    budget.release(30)
+    time.sleep(0.01)
+    # The small request fits, but waits behind the large one
+    assert admitted == []
+    budget.release(70)
+    large.join()
+    small.join()
+    assert admitted == ["large", "small"]
+    assert budget.in_use == 90
+
+
+def test_byte_budget_watchdog(fake_extension):
+    @fake_extension.define
+    def provider_create(ctx, provider, urn, news, timeout, preview, **kwargs):
+        kwargs["trace"].record("encode", 0.0, 0.0, len(news["data"]))
+        time.sleep(0.2)
+
+    budget = ByteBudget(150)
+    watchdog = Watchdog(threshold=0.3)
+    provider = pylumi.Context(byte_budget=budget).provider("aws", watchdog=watchdog)
+    threads = [
+        threading.Thread(target=provider.create, args=(URN, {"data": "x" * 100}))
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    while budget.waiting() < 2:
+        time.sleep(0.001)
+
+    in_flight = []
+    while any(thread.is_alive() for thread in threads):
+        in_flight.append(len(watchdog.in_flight()))
+        watchdog.check()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    # Calls waiting to be admitted aren't in flight, so none of them is slow
+    assert max(in_flight) == 1
+    assert watchdog.reported == 0
@@ -0,0 +1,52 @@
+import gc
+import io
+import json
+import os
+
+import pytest
+
+from pylumi.assets import Archive, Asset, from_json
+from pylumi.interning import InternPool
+from pylumi.replay import canonical_dumps
+from pylumi.results import decode_properties
+
+
+def test_asset_references(tmp_path):
+    path = tmp_path / "index.js"
+    path.write_text("exports.handler = () => {};")
+    archive = Archive.from_assets(
+        {"index.js": Asset.from_path(str(path)), "lib": Archive.from_uri("s3://b/k")}
+    )
+    encoded = archive.to_json()
+    assert encoded == {
+        "$archive": {
+            "assets": {
+                "index.js": {"$asset": {"path": str(path)}},
+                "lib": {"$archive": {"uri": "s3://b/k"}},
+            }
+        }
+    }
+
+    data = json.dumps({"code": encoded, "hash": "abc"})
+    assert decode_properties(data)["code"] == archive
+    assert InternPool().loads(data)["code"] == archive
+    assert from_json({"$asset": {"text": "hi", "hash": "123"}}).hash == "123"
+    assert from_json({"other": 1}) is None
+    assert json.loads(canonical_dumps(archive)) == encoded
+
+    with pytest.raises(ValueError):
+        Asset(path="a", text="b")
+    with pytest.raises(ValueError):
+        Archive()
+
+
+def test_asset_from_buffer(tmp_path):
+    asset = Asset.from_buffer(io.BytesIO(b"x" * 100000), dir=str(tmp_path))
+    assert os.path.getsize(asset.path) == 100000
+    assert Asset.from_buffer(b"abc", dir=str(tmp_path)).path != asset.path
+
+    gc.collect()
+    assert os.listdir(tmp_path) == [os.path.basename(asset.path)]
+    del asset
+    gc.collect()
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,159 @@
+import sys
+
+import pytest
+
+import pylumi
+from pylumi import codegen
+
+SCHEMA = {
+    "name": "test",
+    "version": "1.0.0",
+    "meta": {"moduleFormat": "(.*)(?:/[^/]*)"},
+    "provider": {
+        "inputProperties": {"region": {"type": "string"}},
+    },
+    "types": {
+        "test:storage/BucketWebsite:BucketWebsite": {
+            "type": "object",
+            "properties": {
+                "indexDocument": {"type": "string"},
+                "routingRules": {
+                    "type": "array",
+                    "items": {"$ref": "#/types/test:storage/RoutingRule:RoutingRule"},
+                },
+            },
+        },
+        "test:storage/RoutingRule:RoutingRule": {
+            "type": "object",
+            "properties": {"prefix": {"type": "string"}},
+            "required": ["prefix"],
+        },
+        "test:storage/CannedAcl:CannedAcl": {
+            "type": "string",
+            "enum": [
+                {"value": "private", "name": "Private"},
+                {"value": "public-read", "name": "PublicRead"},
+            ],
+        },
+    },
+    "resources": {
+        "test:storage/bucket:Bucket": {
+            "inputProperties": {
+                "bucket": {"type": "string"},
+                "acl": {"$ref": "#/types/test:storage%2FCannedAcl:CannedAcl"},
+                "website": {"$ref": "#/types/test:storage/BucketWebsite:BucketWebsite"},
+                "tags": {"type": "object", "additionalProperties": {"type": "string"}},
+            },
+            "requiredInputs": ["bucket"],
+            "properties": {
+                "bucket": {"type": "string"},
+                "arn": {"type": "string"},
+            },
+            "required": ["bucket", "arn"],
+        },
+        "test:compute/instance:Instance": {
+            "inputProperties": {
+                "class": {"type": "string"},
+                "website": {"$ref": "#/types/test:storage/BucketWebsite:BucketWebsite"},
+            },
+        },
+    },
+    "functions": {
+        "test:storage/getBucket:getBucket": {
+            "inputs": {
+                "properties": {"bucket": {"type": "string"}},
+                "required": ["bucket"],
+            },
+            "outputs": {"properties": {"arn": {"type": "string"}}},
+        },
+    },
+}
+
+
+@pytest.fixture
+def generated(tmp_path):
+    codegen.generate(SCHEMA, str(tmp_path), "pylumi_codegen_test")
+    sys.path.insert(0, str(tmp_path))
+    try:
+        import pylumi_codegen_test
+
+        yield pylumi_codegen_test
+    finally:
+        sys.path.remove(str(tmp_path))
+        for name in list(sys.modules):
+            if name.startswith("pylumi_codegen_test"):
+                del sys.modules[name]
+
+
+def test_names():
+    assert codegen.snake_case("bucketPrefix") == "bucket_prefix"
+    assert codegen.snake_case("serverSideEncryptionConfiguration") == (
+        "server_side_encryption_configuration"
+    )
+    assert codegen.snake_case("bucketARN") == "bucket_arn"
+    assert codegen.snake_case("class") == "class_"
+    assert codegen.module_name("aws:s3/bucket:Bucket", "(.*)(?:/[^/]*)") == "s3"
+    assert codegen.module_name("aws:index/getRegion:getRegion") == "index_get_region"
+    assert codegen.module_name("aws:index/x:X", "(.*)(?:/[^/]*)") == "index"
+
+
+def test_lazy_modules(generated):
+    assert sorted(generated.__all__) == ["compute", "index", "storage"]
+    assert "pylumi_codegen_test.compute" not in sys.modules
+    assert generated.compute.InstanceArgs.TOKEN == "test:compute/instance:Instance"
+    assert "pylumi_codegen_test.compute" in sys.modules
+    assert "pylumi_codegen_test.storage" not in sys.modules
+    assert generated.index.ProviderArgs(region="us-east-1").to_properties() == {
+        "region": "us-east-1"
+    }
+
+
+def test_round_trip(generated):
+    storage = generated.storage
+    args = storage.BucketArgs(
+        bucket="my-bucket",
+        acl=storage.CannedAcl.PUBLIC_READ,
+        website=storage.BucketWebsite(
+            index_document="index.html",
+            routing_rules=[storage.RoutingRule(prefix="docs/")],
+        ),
+        tags={"env": "test"},
+    )
+    props = args.to_properties()
+    assert props == {
+        "bucket": "my-bucket",
+        "acl": "public-read",
+        "website": {
+            "indexDocument": "index.html",
+            "routingRules": [{"prefix": "docs/"}],
+        },
+        "tags": {"env": "test"},
+    }
+    assert storage.BucketArgs.from_properties(props) == args
+    assert not hasattr(args, "__dict__")
+
+    with pytest.raises(TypeError):
+        storage.BucketArgs(acl="private")
+
+
+def test_unknowns(generated):
+    storage = generated.storage
+    compute = generated.compute
+    unknown = pylumi.UnknownValue.OBJECT
+    args = compute.InstanceArgs(class_="t3.micro", website=unknown)
+    props = args.to_properties()
+    assert props == {"class": "t3.micro", "website": unknown}
+    assert compute.InstanceArgs.from_properties(props).website is unknown
+
+    # Cross-module references are resolved lazily
+    args = compute.InstanceArgs.from_properties(
+        {"website": {"routingRules": pylumi.UnknownValue.ARRAY}}
+    )
+    assert isinstance(args.website, storage.BucketWebsite)
+    assert args.website.routing_rules is pylumi.UnknownValue.ARRAY
+
+    outputs = storage.BucketOutputs.from_properties(
+        {"bucket": "my-bucket", "arn": pylumi.UnknownValue.STRING}
+    )
+    assert outputs.arn is pylumi.UnknownValue.STRING
+    assert storage.GetBucketResult.from_properties({}).arn is None
@@ -90,3 +90,61 @@ def test_install_plugin(kind, name, version, config):
                 assert schema["version"] == "v" + plugin_version
     finally:
         rmifexists()
+
+
+def test_install_plugins_cache(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    plugins = [("resource", "aws", "4.33.0")]
+
+    with pylumi.Context() as ctx:
+        results = ctx.install_plugins(plugins, cache_dir=cache_dir, reinstall=True)
+        assert [result["Source"] for result in results] == ["download"]
+        assert os.listdir(os.path.join(cache_dir, "index"))
+
+        results = ctx.install_plugins(plugins, cache_dir=cache_dir, reinstall=True)
+        assert [result["Source"] for result in results] == ["cache"]
+
+        results = ctx.install_plugins(plugins, cache_dir=cache_dir)
+        assert [result["Skipped"] for result in results] == [True]
+
+
+def test_install_plugins_missing_from_mirror(tmp_path):
+    with pylumi.Context() as ctx:
+        with pytest.raises(pylumi.exc.PluginInstallError) as exc_info:
+            ctx.install_plugins(
+                [("resource", "aws", "1.0.0")], mirror=f"file://{tmp_path}"
+            )
+
+        assert len(exc_info.value.failures) == 1
+
+
+def test_list_installed_plugins():
+    with pylumi.Context() as ctx:
+        ctx.install_plugin("resource", "aws", "4.33.0")
+        plugins = ctx.list_installed_plugins()
+
+        assert any(
+            plugin["Name"] == "aws"
+            and plugin["Kind"] == "resource"
+            and plugin["Version"] == "4.33.0"
+            for plugin in plugins
+        )
+        # Answered from the index the second time around
+        assert ctx.list_installed_plugins() == plugins
+
+
+def test_teardown_report():
+    ctx = pylumi.Context()
+    ctx.setup()
+    provider = ctx.provider("aws", {"region": "us-east-2"})
+    provider.configure()
+    pid = provider.plugin_pid()
+
+    reports = ctx.teardown(grace_period=10)
+    assert len(reports) == 1
+    report = reports[0]
+    assert report["Name"] == "aws"
+    assert report["Pid"] == pid
+    assert report["Outcome"] == "closed"
+    assert report["Duration"] < 10
+    assert not run_pgrep("pulumi")
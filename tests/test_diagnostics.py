@@ -0,0 +1,92 @@
+import asyncio
+
+import pylumi
+import pytest
+from pylumi.diagnostics import DiagnosticSubscription
+from pylumi.exc import PylumiGoError
+
+
+def test_drain_diagnostics():
+    with pylumi.Context(diagnostics_buffer_size=16) as ctx:
+        ctx.install_plugin("resource", "aws", "4.33.0")
+
+        events = ctx.drain_diagnostics()
+        assert events
+        assert all(isinstance(event, pylumi.Diagnostic) for event in events)
+        assert any("installing" in event.message for event in events)
+        assert ctx.drain_diagnostics() == []
+
+
+def test_drain_diagnostics_drop_newest():
+    with pylumi.Context(
+        diagnostics_buffer_size=1, diagnostics_drop_policy="newest"
+    ) as ctx:
+        ctx.install_plugin("resource", "aws", "4.33.0")
+
+        events = ctx.drain_diagnostics()
+        assert len(events) == 1
+        assert "installing" in events[0].message
+        assert ctx.diagnostics_dropped >= 1
+
+
+def test_drain_diagnostics_unbuffered():
+    with pylumi.Context() as ctx:
+        with pytest.raises(pylumi.exc.ContextError):
+            ctx.drain_diagnostics()
+
+
+def test_subscribe_diagnostics():
+    received = []
+    with pylumi.Context(diagnostics_buffer_size=16) as ctx:
+        with ctx.subscribe_diagnostics(received.append, interval=0.01):
+            ctx.install_plugin("resource", "aws", "4.33.0")
+
+    assert any("installing" in event.message for event in received)
+
+
+def test_async_diagnostics():
+    async def main():
+        async with pylumi.AsyncContext(diagnostics_buffer_size=16) as ctx:
+            await ctx.install_plugin("resource", "aws", "4.33.0")
+            async for event in ctx.diagnostics(interval=0.01):
+                return event
+
+    event = asyncio.run(main())
+    assert "installing" in event.message
+
+
+def test_subscription_callback_error(caplog):
+    class FakeContext:
+        def __init__(self):
+            self.batches = [
+                [pylumi.Diagnostic("info", "", str(i), 0.0) for i in range(3)]
+            ]
+
+        def drain_diagnostics(self, max_events=None):
+            return self.batches.pop() if self.batches else []
+
+    received = []
+
+    def callback(event):
+        if event.message == "0":
+            raise RuntimeError("boom")
+        received.append(event.message)
+
+    with DiagnosticSubscription(FakeContext(), callback, interval=0.01):
+        pass
+
+    assert received == ["1", "2"]
+    assert "boom" in caplog.text
+
+
+def test_subscription_drain_error(caplog):
+    class TornDownContext:
+        def drain_diagnostics(self, max_events=None):
+            raise PylumiGoError("error getting context: not found")
+
+    subscription = DiagnosticSubscription(TornDownContext(), print, interval=0.01)
+    subscription._thread.join(5)
+    assert not subscription._thread.is_alive()
+    assert isinstance(subscription.error, PylumiGoError)
+    assert "stopping the subscription" in caplog.text
+    subscription.close()
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+from pylumi.drift import DriftScheduler
+from pylumi.replay import ReplayContext, TrafficRecorder
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::"
+
+OUTPUTS = {"bucket": "a", "acl": "private"}
+
+
+def _replay_provider(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    reads = [
+        ("1", {"ID": "1", "Inputs": {}, "Outputs": OUTPUTS, "Status": 0}),
+        ("2", {"ID": "2", "Inputs": {}, "Outputs": dict(OUTPUTS, acl="public-read")}),
+        ("3", {"ID": "", "Inputs": None, "Outputs": None, "Status": 0}),
+    ]
+    with TrafficRecorder(path) as recorder:
+        for key, result in reads:
+            recorder.record(
+                "aws", "read", [URN + key, key, {}, OUTPUTS], 1.0, 0.01, result=result
+            )
+    return ReplayContext(path).provider("aws")
+
+
+def test_drift_scheduler(tmp_path):
+    state_path = str(tmp_path / "drift.json")
+    drift = DriftScheduler(_replay_provider(tmp_path), rate=1000, state_path=state_path)
+    for key in "123":
+        drift.register(URN + key, key, {}, OUTPUTS)
+
+    events = [drift.refresh_next() for _ in range(3)]
+    assert events[0] is None
+    assert events[1].urn == URN + "2"
+    assert events[1].changed_paths == ["acl"]
+    assert not events[1].deleted
+    assert events[2].deleted
+    assert drift.get(URN + "2").outputs["acl"] == "public-read"
+    assert drift.get(URN + "2").change_rate > drift.get(URN + "1").change_rate
+    assert (drift.reads, drift.drifted, drift.errors) == (3, 2, 0)
+    # Deleted resources are reported once
+    assert URN + "3" not in drift
+    assert len(drift) == 2
+
+    # Drifted resources are due sooner
+    assert drift._due(drift.get(URN + "2")) < drift._due(drift.get(URN + "1"))
+
+    drift.save()
+    restored = DriftScheduler(
+        _replay_provider(tmp_path), rate=1000, state_path=state_path
+    )
+    resource = restored.register(URN + "2", "2", {}, OUTPUTS)
+    assert resource.last_checked == drift.get(URN + "2").last_checked
+    assert resource.change_rate == drift.get(URN + "2").change_rate
+
+
+def test_drift_events(tmp_path):
+    drift = DriftScheduler(_replay_provider(tmp_path), rate=1000)
+    for key in "12":
+        drift.register(URN + key, key, {}, OUTPUTS)
+
+    async def main():
+        async for event in drift.events():
+            return event
+
+    event = asyncio.run(main())
+    assert event.urn == URN + "2"
+
+
+def test_drift_read_error(tmp_path):
+    drift = DriftScheduler(_replay_provider(tmp_path), rate=1000)
+    drift.register(URN + "4", "4", {}, OUTPUTS)
+
+    def read(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    drift.provider.read = read
+    assert drift.refresh_next() is None
+    resource = drift.get(URN + "4")
+    assert resource.last_error == "boom"
+    assert drift.errors == 1
+    # Still scheduled
+    assert drift.refresh_next() is None
+    assert drift.errors == 2
+
+
+def test_drift_run_waits_until_due(tmp_path):
+    drift = DriftScheduler(_replay_provider(tmp_path), rate=1000, max_interval=3600)
+    for key in "12":
+        drift.register(URN + key, key, {}, OUTPUTS)
+
+    stop = threading.Event()
+    events = []
+    thread = threading.Thread(target=drift.run, args=(events.append, stop))
+    thread.start()
+    time.sleep(0.3)
+    stop.set()
+    thread.join()
+
+    # Each resource is read once; the budget alone doesn't trigger more reads
+    assert drift.reads == 2
+    assert [event.urn for event in events] == [URN + "2"]
+    assert drift._wait_time() > 1000
@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+
+import pylumi
+from pylumi import ext
+from pylumi.forking import PENDING_GENERATION
+from pylumi.replay import ReplayContext, TrafficRecorder
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::_"
+
+SCHEMA = {
+    "name": "aws",
+    "resources": {
+        "aws:s3/bucket:Bucket": {
+            "inputProperties": {"bucket": {"type": "string"}},
+            "requiredInputs": ["bucket"],
+        }
+    },
+}
+
+
+@pytest.fixture
+def fake_ext(monkeypatch, fake_extension):
+    fake_extension.define("provider_check", lambda *args, **kwargs: (args[4], None))
+    fake_extension.define(
+        "provider_check_config", lambda *args, **kwargs: (args[5], None)
+    )
+    monkeypatch.setattr(ext, "_GENERATION", ext._GENERATION)
+    monkeypatch.setattr(ext, "_LOAD_LOCK", ext._LOAD_LOCK)
+    # Simulated forks must not affect a loaded extension used by other tests
+    monkeypatch.setattr(ext, "_MODULE", None)
+    return fake_extension
+
+
+def test_reinitialize_after_fork(fake_ext):
+    ctx = pylumi.Context()
+    provider = ctx.provider("aws", {"aws:region": "us-east-1"})
+    ctx.setup()
+    provider.configure()
+    provider.check(URN, {}, {"bucket": "a"})
+    assert fake_ext.calls == ["context_setup", "provider_configure", "provider_check"]
+
+    ext._after_fork_in_child()
+    fake_ext.calls.clear()
+    provider.check(URN, {}, {"bucket": "a"})
+    provider.check(URN, {}, {"bucket": "b"})
+    assert fake_ext.calls == [
+        "context_setup",
+        "provider_configure",
+        "provider_check",
+        "provider_check",
+    ]
+
+    # Nothing to tear down for contexts set up in the parent
+    ext._after_fork_in_child()
+    fake_ext.calls.clear()
+    provider.teardown()
+    ctx.teardown()
+    assert fake_ext.calls == []
+
+
+def test_configure_unchanged(fake_ext):
+    ctx = pylumi.Context()
+    ctx.setup()
+    config = {"aws:region": "us-east-1"}
+    with ctx.provider("aws", config) as provider:
+        ctx.provider("aws", dict(config)).configure()
+        provider.configure(check=True)
+        provider.configure({"aws:region": "us-west-2"}, check=True)
+        ctx.provider("aws", config, version="4.0.0").configure()
+    assert fake_ext.calls == [
+        "context_setup",
+        "provider_configure",
+        "provider_check_config",
+        "provider_configure",
+        "provider_configure",
+        "provider_teardown",
+    ]
+
+    # The plugin isn't configured in a forked child
+    provider.configure()
+    ext._after_fork_in_child()
+    fake_ext.calls.clear()
+    provider.configure()
+    assert fake_ext.calls == ["context_setup", "provider_configure"]
+
+
+def test_fork_after_load(monkeypatch):
+    monkeypatch.setattr(ext, "_MODULE", object())
+    monkeypatch.setattr(ext, "_LOADED_PID", os.getpid())
+    generation = ext.fork_generation()
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ext.load()
+        except pylumi.exc.ForkSafetyError:
+            ok = not ext.is_loaded() and ext.fork_generation() == generation + 1
+            os._exit(0 if ok else 1)
+        os._exit(2)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert ext.is_loaded()
+
+    with pytest.raises(pylumi.exc.ForkSafetyError):
+        pylumi.prefork()
+
+
+def test_prefork(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws", "get_plugin_info", [], 1.0, 0.01, result={"Version": "4.0.0"}
+        )
+        recorder.record("aws", "get_schema", [0], 1.0, 0.01, result=json.dumps(SCHEMA))
+
+    ctx = ReplayContext(path)
+    provider = ctx.provider("aws", {"aws:region": "us-east-1"}, validate_inputs=True)
+    pylumi.prefork(providers=[provider], schema_cache_dir=str(tmp_path / "schemas"))
+
+    assert os.listdir(tmp_path / "schemas") == ["aws-4.0.0-0.json"]
+    assert provider._generation == PENDING_GENERATION
+    assert provider._configured_inputs == {"aws:region": "us-east-1"}
+    assert provider.validator().validate_resource("aws:s3/bucket:Bucket", {}) == [
+        {"Property": "bucket", "Reason": "missing required property"}
+    ]
@@ -0,0 +1,65 @@
+import subprocess
+import sys
+
+# Upper bound on the cumulative time to import pylumi, in microseconds. Importing
+# it takes around 60ms, most of it in typing and dataclasses; importing asyncio
+# or loading the native extension takes far longer than the headroom left here.
+IMPORT_TIME_BUDGET_US = 150_000
+
+# Modules that are only needed by optional features, and are imported on first use
+LAZY_MODULES = [
+    "_pylumi",
+    "asyncio",
+    "concurrent.futures",
+    "multiprocessing",
+    "sqlite3",
+    "ssl",
+    "urllib.parse",
+]
+
+
+def run_python(code):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=True,
+        universal_newlines=True,
+    )
+    return proc.stdout, proc.stderr
+
+
+def test_import_does_not_load_extension():
+    stdout, _ = run_python(
+        "import sys, pylumi; "
+        "pylumi.URN('aws:s3/bucket:Bucket'); "
+        "pylumi.UnknownValue.STRING; "
+        "print('_pylumi' in sys.modules, pylumi.ext.is_loaded())"
+    )
+    assert stdout.split() == ["False", "False"]
+
+
+def test_import_time():
+    _, stderr = run_python("import pylumi")
+    cumulative = None
+    for line in stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "pylumi":
+            cumulative = int(parts[1])
+    assert cumulative is not None
+    assert cumulative < IMPORT_TIME_BUDGET_US
+
+
+def test_import_is_lazy():
+    stdout, _ = run_python(
+        "import sys, pylumi; "
+        f"print(*[name for name in {LAZY_MODULES!r} if name in sys.modules])"
+    )
+    assert stdout.split() == []
+
+    stdout, _ = run_python(
+        "import sys, pylumi; "
+        "pylumi.AsyncContext, pylumi.prefork; "
+        "print('asyncio' in sys.modules, 'multiprocessing' in sys.modules)"
+    )
+    assert stdout.split() == ["True", "True"]
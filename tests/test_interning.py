@@ -0,0 +1,90 @@
+import copy
+import math
+import pickle
+
+import pytest
+
+from pylumi.constants import UnknownValue
+from pylumi.interning import FrozenDict, InternPool
+
+RESULT = """{
+    "ID": "bucket-%d",
+    "Outputs": {
+        "arn": "arn:aws:s3:::bucket-%d",
+        "region": "us-east-1",
+        "tags": {"team": "infra", "env": "prod"},
+        "grants": [{"type": "CanonicalUser", "permissions": ["FULL_CONTROL"]}],
+        "website": {"$unknown": "%s"}
+    }
+}"""
+
+
+def test_intern_pool():
+    pool = InternPool()
+    results = [
+        pool.loads(RESULT % (idx, idx, UnknownValue.OBJECT.value)) for idx in range(10)
+    ]
+
+    first, second = results[0]["Outputs"], results[1]["Outputs"]
+    assert first["tags"] == {"team": "infra", "env": "prod"}
+    assert isinstance(first["tags"], FrozenDict)
+    assert first["tags"] is second["tags"]
+    assert first["region"] is second["region"]
+    assert first["grants"][0]["permissions"][0] is second["grants"][0]["permissions"][0]
+    assert first["website"] is UnknownValue.OBJECT
+    assert first["arn"] == "arn:aws:s3:::bucket-0"
+
+    # Top-level objects containing lists or objects stay mutable
+    results[0]["Outputs"]["region"] = "us-west-2"
+    with pytest.raises(TypeError):
+        first["tags"]["team"] = "other"
+
+    stats = pool.stats()
+    assert stats["hits"] > 0
+    assert stats["saved_bytes"] > 0
+    assert stats["retained_bytes"] <= stats["budget"]
+
+
+def test_intern_pool_types():
+    pool = InternPool()
+    assert pool.loads('{"a": 1}')["a"] is not True
+    assert pool.loads('{"a": true}')["a"] is True
+    assert pool.loads('{"a": {"b": 1}}')["a"]["b"] == 1
+    assert pool.loads('{"a": {"b": true}}')["a"]["b"] is True
+
+
+def test_intern_pool_budget():
+    pool = InternPool(budget=0)
+    a = pool.loads('{"tags": {"x": "1"}}')
+    b = pool.loads('{"tags": {"x": "1"}}')
+    assert a == b
+    assert a["tags"] is not b["tags"]
+    assert pool.stats()["retained_bytes"] == 0
+    assert pool.stats()["rejected"] > 0
+
+
+def test_frozen_dict():
+    value = FrozenDict({"a": "1"})
+    assert hash(value) == hash(FrozenDict({"a": "1"}))
+    assert pickle.loads(pickle.dumps(value)) == value
+    assert copy.deepcopy(value) == value
+    assert dict(value) == {"a": "1"}
+    for method, args in [("update", ({},)), ("pop", ("a",)), ("clear", ())]:
+        with pytest.raises(TypeError):
+            getattr(value, method)(*args)
+
+
+def test_intern_pool_signed_zero():
+    pool = InternPool()
+    negative = pool.loads('{"a": {"b": -0.0}}')["a"]["b"]
+    positive = pool.loads('{"a": {"b": 0.0}}')["a"]["b"]
+    assert math.copysign(1.0, negative) == -1.0
+    assert math.copysign(1.0, positive) == 1.0
+
+
+def test_intern_pool_top_level():
+    pool = InternPool()
+    props = pool.loads('{"bucket": "a", "acl": "private"}')
+    assert type(props) is dict
+    props["acl"] = "public-read"
+    assert pool.loads('{"bucket": "a", "acl": "private"}')["acl"] == "private"
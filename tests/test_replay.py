@@ -0,0 +1,123 @@
+import time
+
+import pylumi
+import pytest
+from pylumi.replay import ReplayContext, TrafficRecorder, read_traffic
+
+from tests.conftest import TEST_BUCKET, TEST_REGION
+
+URN = "urn:pulumi:_::_::aws:s3/bucketObject:BucketObject::_"
+
+
+@pytest.fixture(params=["traffic.jsonl", "traffic.jsonl.gz"])
+def traffic_path(request, tmp_path):
+    path = str(tmp_path / request.param)
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "check",
+            [URN, {}, {"key": "a"}, False],
+            1.0,
+            0.01,
+            result=({"key": "a"}, None),
+        )
+        recorder.record(
+            "aws",
+            "create",
+            [URN, {"key": "a"}, 60, False],
+            2.0,
+            0.2,
+            result={"ID": "a-1", "Properties": {"key": "a"}, "Status": 0},
+        )
+        recorder.record(
+            "aws",
+            "create",
+            [URN, {"key": "a"}, 60, False],
+            3.0,
+            0.2,
+            result={"ID": "a-2", "Properties": {"key": "a"}, "Status": 0},
+        )
+        recorder.record(
+            "aws",
+            "delete",
+            [URN, "a-1", {}, 60],
+            4.0,
+            0.05,
+            error=pylumi.exc.ProviderError(-1, "not found"),
+        )
+    return path
+
+
+def test_read_traffic(traffic_path):
+    entries = list(read_traffic(traffic_path))
+    assert [entry["m"] for entry in entries] == ["check", "create", "create", "delete"]
+    assert entries[1]["d"] == 0.2
+
+
+def test_replay(traffic_path):
+    with ReplayContext(traffic_path) as ctx, ctx.provider("aws") as aws:
+        props, errs = aws.check(URN, {}, {"key": "a"})
+        assert props == {"key": "a"}
+        assert errs is None
+
+        assert aws.create(URN, {"key": "a"})["ID"] == "a-1"
+        assert aws.create(URN, {"key": "a"})["ID"] == "a-2"
+        # Once responses run out the last one is repeated
+        assert aws.create(URN, {"key": "a"})["ID"] == "a-2"
+
+        with pytest.raises(pylumi.exc.ProviderError):
+            aws.delete(URN, "a-1", {})
+
+        with pytest.raises(pylumi.exc.ReplayMissError):
+            aws.create(URN, {"key": "b"})
+
+
+def test_replay_latency(traffic_path):
+    with ReplayContext(traffic_path, latency_scale=1.0) as ctx:
+        aws = ctx.provider("aws")
+        start = time.time()
+        aws.create(URN, {"key": "a"})
+        assert time.time() - start >= 0.2
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    news = {"bucket": TEST_BUCKET, "key": "a", "content": "b"}
+
+    with TrafficRecorder(path) as recorder:
+        with pylumi.Context(recorder=recorder) as ctx, ctx.provider(
+            "aws", {"region": TEST_REGION}
+        ) as aws:
+            expected = aws.check(
+                pylumi.URN("aws:s3/bucketObject:BucketObject"), {}, news
+            )
+
+    with ReplayContext(path) as ctx, ctx.provider(
+        "aws", {"region": TEST_REGION}
+    ) as aws:
+        assert (
+            aws.check(pylumi.URN("aws:s3/bucketObject:BucketObject"), {}, news)
+            == expected
+        )
+
+
+def test_replay_result_shape(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "create",
+            [URN, {"key": "a"}, 60, False],
+            1.0,
+            0.1,
+            result={"ID": "a-1", "Properties": '{"key":"a"}', "Status": 0},
+            kwargs={"raw_properties": True, "pool": None},
+        )
+
+    with ReplayContext(path) as ctx:
+        typed = ctx.provider("aws", typed_results=True)
+        assert typed.create(URN, {"key": "a"}).properties == {"key": "a"}
+
+        # Properties were recorded as raw JSON, which untyped results don't expect
+        with pytest.raises(pylumi.exc.ReplayMissError):
+            ctx.provider("aws").create(URN, {"key": "a"})
@@ -0,0 +1,85 @@
+import json
+
+import pylumi
+from pylumi.replay import ReplayContext, TrafficRecorder
+
+URN = "urn:pulumi:_::_::aws:s3/bucketObject:BucketObject::_"
+
+DIFF_RESPONSE = {
+    "Changes": 2,
+    "ReplaceKeys": ["key"],
+    "StableKeys": None,
+    "ChangedKeys": ["key", "tags"],
+    "DetailedDiff": {
+        "key": {"Kind": 5, "InputDiff": True},
+        "tags.a": {"Kind": 0, "InputDiff": False},
+    },
+    "DeleteBeforeReplace": False,
+}
+
+
+def test_diff_result():
+    result = pylumi.DiffResult.from_dict(DIFF_RESPONSE)
+    assert result.has_changes
+    assert result.requires_replace
+    assert result.changed_keys == ("key", "tags")
+    assert result.stable_keys == ()
+
+    diff = result.detailed_diff
+    assert dict(diff) == {
+        "key": pylumi.DiffKind.UPDATE_REPLACE,
+        "tags.a": pylumi.DiffKind.ADD,
+    }
+    assert diff.replaces == ("key",)
+    assert diff.paths(pylumi.DiffKind.ADD) == ("tags.a",)
+    assert diff.is_input_diff("key")
+    assert not diff.is_input_diff("tags.a")
+    assert result.to_dict() == DIFF_RESPONSE
+
+
+def test_lazy_properties():
+    outputs = {"key": "a", "etag": pylumi.UnknownValue.STRING.value}
+    encoded = json.dumps(
+        {"key": "a", "etag": {pylumi.UNKNOWN_KEY: pylumi.UnknownValue.STRING.value}}
+    )
+    result = pylumi.ReadResult.from_dict(
+        {"ID": "a-1", "Inputs": "{}", "Outputs": encoded, "Status": 0}
+    )
+    assert isinstance(result._outputs, str)
+    assert result.outputs == {"key": "a", "etag": pylumi.UnknownValue.STRING}
+    assert result.outputs is result.outputs
+    assert result.inputs == {}
+    assert not hasattr(result, "__dict__")
+    assert outputs["key"] == result.to_dict()["Outputs"]["key"]
+
+
+def test_typed_results_replay(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "diff",
+            [URN, "a-1", {"key": "a"}, {"key": "b"}, False, []],
+            1.0,
+            0.01,
+            result=DIFF_RESPONSE,
+        )
+        recorder.record(
+            "aws",
+            "create",
+            [URN, {"key": "a"}, 60, False],
+            2.0,
+            0.2,
+            result={"ID": "a-1", "Properties": '{"key":"a"}', "Status": 0},
+            kwargs={"raw_properties": True},
+        )
+
+    with ReplayContext(path) as ctx:
+        aws = ctx.provider("aws", typed_results=True)
+        diff = aws.diff(URN, "a-1", {"key": "a"}, {"key": "b"}, ignore_changes=[])
+        assert diff.detailed_diff["key"] is pylumi.DiffKind.UPDATE_REPLACE
+
+        created = aws.create(URN, {"key": "a"})
+        assert isinstance(created, pylumi.CreateResult)
+        assert created.id == "a-1"
+        assert created.properties == {"key": "a"}
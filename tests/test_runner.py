@@ -0,0 +1,116 @@
+import io
+import json
+
+from pylumi.replay import ReplayContext, TrafficRecorder
+from pylumi.runner import Checkpoint, run
+
+URN = "urn:pulumi:dev::app::aws:s3/bucket:Bucket::"
+
+
+def _operations(count):
+    lines = [
+        json.dumps(
+            {
+                "method": "create",
+                "provider": "aws",
+                "urn": URN + str(idx),
+                "inputs": {"bucket": str(idx)},
+            }
+        )
+        for idx in range(count)
+    ]
+    lines.insert(3, "")
+    lines.append(json.dumps({"method": "read", "provider": "aws", "urn": URN}))
+    lines.append(json.dumps({"method": "destroy", "provider": "aws"}))
+    return [line + "\n" for line in lines]
+
+
+def _replay_context(tmp_path, count):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        for idx in range(count):
+            recorder.record(
+                "aws",
+                "create",
+                [URN + str(idx), {"bucket": str(idx)}, 60, False],
+                1.0,
+                0.01,
+                result={"ID": str(idx), "Properties": {}, "Status": 0},
+            )
+    return ReplayContext(path)
+
+
+def test_runner(tmp_path):
+    ctx = _replay_context(tmp_path, 20)
+    lines = _operations(20)
+    checkpoint_path = str(tmp_path / "checkpoint.json")
+
+    # Stop after the first 10 lines, then resume
+    output = io.StringIO()
+    summary = run(
+        ctx,
+        list(enumerate(lines))[:10],
+        output,
+        concurrency=4,
+        checkpoint=Checkpoint(checkpoint_path),
+    )
+    assert (summary.ok, summary.errors) == (9, 0)
+    assert Checkpoint(checkpoint_path).watermark == 10
+
+    summary = run(
+        ctx,
+        enumerate(lines),
+        output,
+        concurrency=4,
+        rate=1000,
+        checkpoint=Checkpoint(checkpoint_path),
+    )
+    assert (summary.ok, summary.errors, summary.skipped) == (11, 2, 10)
+    assert summary.to_dict()["throughput"] > 0
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert sorted(result["line"] for result in results) == [
+        idx for idx in range(len(lines)) if idx != 3
+    ]
+    by_line = {result["line"]: result for result in results}
+    assert by_line[0]["result"]["ID"] == "0"
+    assert by_line[21]["error"] == "Invalid operation: KeyError: 'id'"
+    assert (
+        by_line[22]["error"]
+        == "Invalid operation: ValueError: Invalid method: 'destroy'."
+    )
+
+
+class _FailingProvider:
+    def configure(self):
+        pass
+
+    def create(self, urn, inputs, *args, **kwargs):
+        if inputs["bucket"] == "1":
+            raise RuntimeError("plugin crashed")
+        return {"ID": inputs["bucket"], "Properties": {}, "Status": 0}
+
+
+class _FailingContext:
+    def provider(self, name, config=None, version=None):
+        return _FailingProvider()
+
+
+def test_runner_unexpected_error():
+    output = io.StringIO()
+    summary = run(_FailingContext(), enumerate(_operations(3)[:4]), output)
+    assert (summary.ok, summary.errors) == (2, 1)
+
+    by_line = {
+        result["line"]: result
+        for result in map(json.loads, output.getvalue().splitlines())
+    }
+    assert by_line[1] == {
+        "line": 1,
+        "method": "create",
+        "urn": URN + "1",
+        "ok": False,
+        "error": "RuntimeError: plugin crashed",
+        "duration": by_line[1]["duration"],
+    }
+    assert by_line[2]["result"]["ID"] == "2"
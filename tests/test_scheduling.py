@@ -0,0 +1,91 @@
+import asyncio
+
+import pylumi
+from pylumi.replay import ReplayContext, TrafficRecorder
+from pylumi.scheduling import CallScheduler, Priority, TokenBucket, scope
+
+
+async def _run_order(scheduler, calls):
+    """
+    Hold the only slot while queueing `calls`, a list of (name, priority, tenant),
+    then return the order they start in.
+    """
+    order = []
+
+    async def call(name, priority, tenant):
+        async with scheduler.slot(priority, tenant):
+            order.append(name)
+
+    await scheduler.acquire()
+    tasks = [asyncio.ensure_future(call(*args)) for args in calls]
+    await asyncio.sleep(0)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+def test_priority_order():
+    scheduler = CallScheduler(1)
+    calls = [(f"read-{idx}", "background", None) for idx in range(3)]
+    calls.append(("diff", Priority.INTERACTIVE, None))
+    calls.append(("check", None, None))
+    order = asyncio.run(_run_order(scheduler, calls))
+    assert order == ["diff", "check", "read-0", "read-1", "read-2"]
+
+    stats = scheduler.stats()
+    assert stats["background"]["count"] == 3
+    assert stats["interactive"]["count"] == 1
+    assert stats["normal"]["count"] == 2
+    assert stats["background"]["max"] >= stats["interactive"]["max"]
+    assert all(value["queued"] == 0 for value in stats.values())
+
+
+def test_weighted_fair_queueing():
+    scheduler = CallScheduler(1, weights={"b": 2})
+    calls = [(f"a-{idx}", None, "a") for idx in range(6)]
+    calls.extend((f"b-{idx}", None, "b") for idx in range(6))
+    order = asyncio.run(_run_order(scheduler, calls))
+    first = [name[0] for name in order[:6]]
+    assert first.count("b") == 4
+    assert first.count("a") == 2
+
+
+def test_scope():
+    scheduler = CallScheduler(1)
+
+    async def main():
+        with scope(priority="interactive", tenant="previews"):
+            return await _run_order(
+                scheduler, [("scoped", None, None), ("explicit", "background", None)]
+            )
+
+    assert asyncio.run(main()) == ["scoped", "explicit"]
+    # Including the call holding the slot
+    assert scheduler.stats()["interactive"]["count"] == 2
+
+
+def test_async_provider_scheduler(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record("aws", "get_plugin_info", [], 1.0, 0.01, result={})
+
+    scheduler = CallScheduler(2)
+
+    async def main():
+        ctx = pylumi.AsyncContext.wrap(ReplayContext(path))
+        provider = ctx.provider("aws", scheduler=scheduler)
+        await asyncio.gather(
+            *(provider.get_plugin_info(priority="background") for _ in range(4))
+        )
+
+    asyncio.run(main())
+    assert scheduler.running == 0
+    assert scheduler.stats()["background"]["count"] == 4
+
+
+def test_token_bucket():
+    bucket = TokenBucket(100, burst=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.01
+    assert bucket.reserve() > 0.01
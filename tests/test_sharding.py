@@ -0,0 +1,98 @@
+import pickle
+
+import pytest
+
+import pylumi
+import pylumi.schemas
+from pylumi.replay import ReplayContext, TrafficRecorder
+from pylumi.sharding import ShardedExecutor
+
+URN = "urn:pulumi:_::_::aws:s3/bucketObject:BucketObject::_"
+
+
+@pytest.fixture
+def replay_ctx(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        for idx in (1, 2):
+            recorder.record(
+                "aws",
+                "create",
+                [URN, {"key": "a"}, 60, False],
+                float(idx),
+                0.01,
+                result={"ID": f"a-{idx}", "Properties": {"key": "a"}, "Status": 0},
+            )
+        for key in "bcd":
+            recorder.record(
+                "aws",
+                "create",
+                [f"{URN}{key}", {"key": key}, 60, False],
+                3.0,
+                0.01,
+                result={"ID": key, "Properties": {"key": key}, "Status": 0},
+            )
+        recorder.record(
+            "aws",
+            "delete",
+            [URN, "a-1", {}, 60],
+            4.0,
+            0.01,
+            error=pylumi.exc.ProviderError(-1, "not found"),
+        )
+    return ReplayContext(path)
+
+
+def test_descriptors_picklable(replay_ctx):
+    ctx = pylumi.Context(cwd="/tmp", diagnostics_buffer_size=10)
+    desc = pickle.loads(pickle.dumps(ctx.descriptor()))
+    assert desc.kwargs["diagnostics_buffer_size"] == 10
+    assert desc.create().cwd == "/tmp"
+
+    provider = ctx.provider("aws", {"aws:region": "us-east-1"}, typed_results=True)
+    provider_desc = pickle.loads(pickle.dumps(provider.descriptor()))
+    assert provider_desc.key() == provider.descriptor().key()
+    assert provider_desc.create(ctx).typed_results
+
+    replay_desc = pickle.loads(pickle.dumps(replay_ctx.descriptor()))
+    assert isinstance(replay_desc.create(), ReplayContext)
+
+
+def test_sharded_executor(replay_ctx):
+    aws = replay_ctx.provider("aws").descriptor()
+    with ShardedExecutor(replay_ctx.descriptor(), shards=2) as executor:
+        # Operations on the same URN run on the same shard, in order
+        results = executor.map(aws, "create", [(URN, {"key": "a"})] * 3)
+        assert [result["ID"] for result in results] == ["a-1", "a-2", "a-2"]
+
+        calls = [(f"{URN}{key}", {"key": key}) for key in "bcd"]
+        results = dict(executor.imap_unordered(aws, "create", calls))
+        assert {idx: result["ID"] for idx, result in results.items()} == {
+            0: "b",
+            1: "c",
+            2: "d",
+        }
+
+        future = executor.submit(aws, "delete", URN, "a-1", {})
+        with pytest.raises(pylumi.exc.ProviderError) as exc_info:
+            future.result()
+        assert exc_info.value.message == "not found"
+
+    assert executor.shard_for(URN) == executor.shard_for(pylumi.URN(URN))
+
+
+def test_schema_cache(tmp_path):
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return b'{"name": "aws"}'
+
+    for _ in range(2):
+        schema = pylumi.schemas.load_schema(
+            "aws", "4.0.0", fetch, cache_dir=str(tmp_path)
+        )
+        assert schema == {"name": "aws"}
+    assert len(fetches) == 1
+    assert pylumi.schemas.load_schema("aws", "4.0.1", fetch, cache_dir=None) == schema
+    assert len(fetches) == 2
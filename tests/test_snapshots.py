@@ -0,0 +1,59 @@
+import pylumi
+from pylumi.snapshots import Fingerprint, Snapshot, compare, fingerprint
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::"
+
+
+def test_fingerprint():
+    a = fingerprint({"bucket": "a", "tags": {"x": "1", "y": "2"}, "size": 1})
+    b = fingerprint({"size": 1.0, "tags": {"y": "2", "x": "1"}, "bucket": "a"})
+    assert a == b
+    assert set(a.paths) == {"bucket", "tags", "size"}
+
+    c = fingerprint({"bucket": "a", "tags": {"x": "1", "y": "3"}, "size": 1})
+    assert c.root != a.root
+    assert a.changed_paths(c) == ["tags"]
+
+    unknown = fingerprint({"bucket": pylumi.UnknownValue.STRING})
+    assert unknown == fingerprint({"bucket": pylumi.UnknownValue.STRING})
+    assert unknown != fingerprint({"bucket": pylumi.UnknownValue.NUMBER})
+    assert unknown != fingerprint({"bucket": "a"})
+    assert fingerprint({"a": "1"}) != fingerprint({"a": 1})
+
+
+def test_compare():
+    old = {f"{URN}{idx}": {"bucket": str(idx), "acl": "private"} for idx in range(5)}
+    new = dict(old)
+    new[f"{URN}1"] = {"bucket": "1", "acl": "public-read"}
+    new[f"{URN}2"] = {"bucket": "2"}
+    del new[f"{URN}3"]
+    new[f"{URN}5"] = {"bucket": "5"}
+
+    diff = compare(old.items(), new.items())
+    assert diff.added == [f"{URN}5"]
+    assert diff.removed == [f"{URN}3"]
+    assert diff.changed == {f"{URN}1": ["acl"], f"{URN}2": ["acl"]}
+
+
+def test_snapshot_compare():
+    old = Snapshot.from_dict(
+        {
+            "a": {"Root": "1", "Paths": {"x": "2", "y": "3"}},
+            "b": {"Root": "4", "Paths": {"x": "5"}},
+            "c": {"Root": "6", "Paths": {}},
+        }
+    )
+    new = Snapshot(
+        {
+            "a": Fingerprint("7", {"x": "2", "y": "8", "z": "9"}),
+            "b": Fingerprint("4", {"x": "5"}),
+            "d": Fingerprint("6", {}),
+        }
+    )
+    diff = old.compare(new)
+    assert diff.has_changes()
+    assert diff.added == ["d"]
+    assert diff.removed == ["c"]
+    assert diff.changed == {"a": ["y", "z"]}
+    assert not old.compare(old).has_changes()
+    assert Snapshot.from_dict(new.to_dict()).compare(new) == old.compare(old)
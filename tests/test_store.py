@@ -0,0 +1,85 @@
+import io
+import json
+
+from pylumi.constants import UnknownValue
+from pylumi.replay import ReplayContext, TrafficRecorder
+from pylumi.store import StateStore
+
+BUCKET = "urn:pulumi:dev::app::aws:s3/bucket:Bucket::"
+QUEUE = "urn:pulumi:dev::app::aws:sqs/queue:Queue::jobs"
+
+
+def test_state_store(tmp_path):
+    path = str(tmp_path / "state.db")
+    with StateStore(path, compress_threshold=100) as store:
+        store.put(BUCKET + "a", "aws", "a", {"bucket": "a"}, {"arn": "arn:a"})
+        with store.transaction():
+            store.put_many(
+                (BUCKET + name, "aws", name, {}, {"policy": "x" * 1000})
+                for name in "bc"
+            )
+            store.put(
+                QUEUE,
+                "aws",
+                "q",
+                {},
+                '{"url": {"$unknown": "%s"}}' % (UnknownValue.STRING.value),
+            )
+        assert len(store) == 4
+
+    store = StateStore(path)
+    assert [state.id for state in store.by_type("aws:s3/bucket:Bucket")] == list("abc")
+    assert len(store.by_provider("aws")) == 4
+    assert store.by_id("q")[0].urn == QUEUE
+    assert store.by_id("q", provider="gcp") == []
+    assert store.get(BUCKET + "b").outputs["policy"] == "x" * 1000
+    assert store.get(QUEUE).outputs == {"url": UnknownValue.STRING}
+    assert store.get(BUCKET + "z") is None
+
+    try:
+        with store.transaction():
+            store.delete(BUCKET + "a")
+            raise RuntimeError
+    except RuntimeError:
+        pass
+    assert BUCKET + "a" in store
+
+    out = io.StringIO()
+    assert store.export(out) == 4
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines[0]["urn"] == BUCKET + "a"
+    assert lines[0]["outputs"] == {"arn": "arn:a"}
+    assert lines[1]["outputs"]["policy"] == "x" * 1000
+
+
+def test_state_store_write_through(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    urn = BUCKET + "a"
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "create",
+            [urn, {"bucket": "a"}, 60, False],
+            1.0,
+            0.01,
+            result={"ID": "a", "Properties": {"arn": "arn:a"}, "Status": 0},
+        )
+        recorder.record(
+            "aws",
+            "update",
+            [urn, "a", {"bucket": "a"}, {"bucket": "a", "acl": "private"}, 60],
+            1.0,
+            0.01,
+            result={"Properties": {"arn": "arn:a", "acl": "private"}, "Status": 0},
+        )
+        recorder.record("aws", "delete", [urn, "a", {}, 60], 1.0, 0.01, result=0)
+
+    store = StateStore(":memory:")
+    aws = ReplayContext(path).provider("aws", state_store=store)
+    aws.create(urn, {"bucket": "a"})
+    assert store.get(urn).outputs == {"arn": "arn:a"}
+    aws.update(urn, "a", {"bucket": "a"}, {"bucket": "a", "acl": "private"})
+    assert store.get(urn).inputs["acl"] == "private"
+    assert store.get(urn).type == "aws:s3/bucket:Bucket"
+    aws.delete(urn, "a", {})
+    assert len(store) == 0
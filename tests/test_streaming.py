@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+import pylumi
+from pylumi.constants import UnknownValue
+from pylumi.exc import InvocationValidationError
+from pylumi.interning import FrozenDict, InternPool
+from pylumi.replay import ReplayContext, TrafficRecorder
+from pylumi.scheduling import CallScheduler
+from pylumi.streaming import AsyncInvokeStream, InvokeStream
+
+ELEMENTS = [
+    {"id": "i-1", "tags": {"env": "prod"}},
+    {"id": "i-2", "tags": {"env": "prod"}},
+    {"id": {"$unknown": UnknownValue.STRING.value}},
+]
+
+
+def _encode(elements):
+    return b"".join(json.dumps(element).encode() + b"\n" for element in elements)
+
+
+def test_invoke_stream_inline():
+    stream = InvokeStream({"count": 3}, _encode(ELEMENTS))
+    assert stream.rest == {"count": 3}
+    assert next(stream) == ELEMENTS[0]
+    assert list(stream)[-1] == {"id": UnknownValue.STRING}
+    assert list(stream) == []
+
+    pool = InternPool()
+    first, second, _ = InvokeStream({}, _encode(ELEMENTS), pool=pool)
+    assert isinstance(first["tags"], FrozenDict)
+    assert first["tags"] is second["tags"]
+
+    assert list(InvokeStream({}, b"")) == []
+
+
+def test_invoke_stream_spill(tmp_path):
+    path = tmp_path / "elements.ndjson"
+    path.write_bytes(_encode(ELEMENTS))
+    assert len(list(InvokeStream({}, spill_path=str(path)))) == 3
+    assert not path.exists()
+
+    path.write_bytes(_encode(ELEMENTS))
+    with InvokeStream({}, spill_path=str(path)) as stream:
+        assert next(stream)["id"] == "i-1"
+    assert not path.exists()
+    assert list(stream) == []
+
+
+def test_invoke_iter_replay(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    failures = [{"Property": "filter", "Reason": "invalid"}]
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "invoke_stream",
+            ["aws:ec2/getInstances:getInstances", {}, "instances"],
+            1.0,
+            0.01,
+            result=(_encode(ELEMENTS), None, {"region": "us-east-1"}, []),
+        )
+        recorder.record(
+            "aws",
+            "invoke_stream",
+            ["aws:ec2/getInstances:getInstances", {"filter": 1}, "instances"],
+            1.0,
+            0.01,
+            result=(None, None, {}, failures),
+        )
+
+    aws = ReplayContext(path).provider("aws")
+    stream = aws.invoke_iter("aws:ec2/getInstances:getInstances", {}, "instances")
+    assert stream.rest == {"region": "us-east-1"}
+    assert [element["id"] for element in stream][:2] == ["i-1", "i-2"]
+
+    with pytest.raises(InvocationValidationError):
+        aws.invoke_iter("aws:ec2/getInstances:getInstances", {"filter": 1}, "instances")
+
+
+def test_async_invoke_stream(tmp_path):
+    path = tmp_path / "elements.ndjson"
+    path.write_bytes(_encode(ELEMENTS))
+    threads = []
+
+    async def run(func):
+        def wrapped():
+            threads.append(threading.get_ident())
+            return func()
+
+        return await asyncio.get_running_loop().run_in_executor(None, wrapped)
+
+    async def main():
+        stream = AsyncInvokeStream(
+            InvokeStream({}, spill_path=str(path)), run, batch_size=2
+        )
+        async with stream:
+            return [element["id"] async for element in stream]
+
+    ids = asyncio.run(main())
+    assert ids[:2] == ["i-1", "i-2"]
+    assert len(ids) == 3
+    # Two batches, both read off the event loop thread
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    assert not path.exists()
+
+
+def test_async_invoke_iter_replay(tmp_path):
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record(
+            "aws",
+            "invoke_stream",
+            ["aws:ec2/getInstances:getInstances", {}, "instances"],
+            1.0,
+            0.01,
+            result=(_encode(ELEMENTS), None, {"region": "us-east-1"}, []),
+        )
+
+    async def main():
+        ctx = pylumi.AsyncContext.wrap(ReplayContext(path))
+        aws = ctx.provider("aws", scheduler=CallScheduler(1))
+        stream = await aws.invoke_iter(
+            "aws:ec2/getInstances:getInstances", {}, "instances", batch_size=1
+        )
+        assert stream.rest == {"region": "us-east-1"}
+        async with stream:
+            return [element["id"] async for element in stream]
+
+    assert asyncio.run(main())[:2] == ["i-1", "i-2"]
@@ -0,0 +1,131 @@
+import json
+
+import pylumi
+import pytest
+from pylumi import tracing
+
+from tests.conftest import TEST_BUCKET, TEST_REGION
+
+
+def test_span_record_phases():
+    exporter = tracing.InMemorySpanExporter()
+    tracer = tracing.Tracer(exporter)
+
+    with tracer.start_span("provider.create", {"method": "create"}) as span:
+        span.record("encode", 1.0, 2.0, 10)
+        span.record("call", 2.0, 3.0, 0)
+        span.record("decode", 3.0, 4.0, 20)
+
+    spans = exporter.get_finished_spans()
+    assert [span.name for span in spans] == [
+        "provider.create",
+        "encode",
+        "call",
+        "decode",
+    ]
+    root = spans[0]
+    assert root.attributes["request_bytes"] == 10
+    assert root.attributes["response_bytes"] == 20
+    assert all(child.parent_id == root.span_id for child in spans[1:])
+    assert len({span.trace_id for span in spans}) == 1
+    assert spans[2].duration == 1.0
+
+
+def test_span_error_attribute():
+    exporter = tracing.InMemorySpanExporter()
+    tracer = tracing.Tracer(exporter)
+
+    with pytest.raises(ValueError):
+        with tracer.start_span("provider.diff"):
+            raise ValueError("boom")
+
+    (span,) = exporter.get_finished_spans()
+    assert "boom" in span.attributes["error"]
+
+
+def test_file_exporter(tmp_path):
+    path = str(tmp_path / "spans.jsonl")
+    exporter = tracing.FileSpanExporter(path)
+    tracer = tracing.Tracer(exporter)
+
+    with tracer.start_span("provider.read") as span:
+        span.record("call", 1.0, 2.0)
+    tracer.shutdown()
+
+    with open(path) as f:
+        lines = list(map(json.loads, f))
+
+    assert [line["name"] for line in lines] == ["provider.read", "call"]
+
+
+def test_provider_tracing():
+    exporter = tracing.InMemorySpanExporter()
+    tracer = tracing.Tracer(exporter, native=True)
+
+    with pylumi.Context(tracer=tracer) as ctx, ctx.provider(
+        "aws", {"region": TEST_REGION}
+    ) as aws:
+        exporter.clear()
+        aws.check(
+            pylumi.URN("aws:s3/bucketObject:BucketObject"),
+            {},
+            {"bucket": TEST_BUCKET, "key": "a", "content": "b"},
+        )
+
+    root = exporter.get_finished_spans()[0]
+    assert root.name == "provider.check"
+    assert root.attributes["type"] == "aws:s3/bucketObject:BucketObject"
+    assert root.attributes["plugin_pid"] > 0
+    assert root.attributes["request_bytes"] > 0
+    assert [child.name for child in root.children] == ["encode", "call", "decode"]
+    assert [child.name for child in root.children[1].children] == ["grpc"]
+
+
+def _native_span(operation, call_id, start=2.1):
+    return {
+        "TraceID": "1",
+        "Operation": "/pulumirpc.ResourceProvider/" + operation,
+        "Start": start,
+        "Duration": 0.5,
+        "Tags": {tracing.CALL_ID_TAG: call_id},
+    }
+
+
+@pytest.mark.parametrize(
+    "method,operation",
+    [("signal_cancellation", "Cancel"), ("invoke_stream", "Invoke")],
+)
+def test_native_spans_by_call_id(fake_extension, method, operation):
+    exporter = tracing.InMemorySpanExporter()
+    tracer = tracing.Tracer(exporter, native=True)
+    first = tracer.start_span(f"provider.{method}", {"method": method})
+    second = tracer.start_span(f"provider.{method}", {"method": method})
+    # Both spans overlap both calls in time, only the call ID tells them apart
+    drained = [
+        [
+            _native_span(operation, second.span_id),
+            _native_span(operation, first.span_id),
+        ],
+        [],
+    ]
+    fake_extension.define("tracing_drain_spans", lambda: drained.pop(0))
+
+    with first:
+        first.record("call", 2.0, 3.0)
+    with second:
+        second.record("call", 2.0, 3.0)
+
+    for span in (first, second):
+        (grpc,) = span.children[0].children
+        assert grpc.attributes[tracing.CALL_ID_TAG] == span.span_id
+        assert grpc.attributes["operation"].endswith("/" + operation)
+
+
+def test_plugin_pid_unknown(fake_extension):
+    pids = [-1, 4242]
+    fake_extension.define("provider_get_plugin_pid", lambda ctx, provider: pids.pop(0))
+    provider = pylumi.Context().provider("aws")
+
+    assert provider.plugin_pid() is None
+    assert provider.plugin_pid() == 4242
+    assert provider.plugin_pid() == 4242
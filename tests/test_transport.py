@@ -0,0 +1,50 @@
+import pickle
+
+import pytest
+
+import pylumi
+from pylumi.exc import PayloadTooLargeError, ProviderError
+from pylumi.transport import TransportMonitor
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::_"
+
+
+def provider_check(ctx, provider, urn, olds, news, unknowns, pool, trace):
+    size = len(news["policy"])
+    trace.record("encode", 0.0, 0.001, size)
+    trace.record("call", 0.001, 0.005, 0)
+    if size > 1000:
+        raise ProviderError(8, "grpc: received message larger than max")
+    trace.record("decode", 0.005, 0.006, size)
+    return news, None
+
+
+@pytest.fixture
+def provider(fake_extension):
+    fake_extension.define(provider_check)
+    monitor = TransportMonitor(report_limit=1000)
+    return pylumi.Context().provider("aws", transport=monitor)
+
+
+def test_transport_monitor(provider):
+    monitor = provider.transport
+    for size in (10, 10, 2500):
+        try:
+            provider.check(URN, {}, {"policy": "x" * size})
+        except PayloadTooLargeError as err:
+            assert err.size == 2500
+            assert err.limit == 1000
+            assert "larger than max" in err.message
+            assert pickle.loads(pickle.dumps(err)).size == 2500
+
+    stats = monitor.stats()
+    assert stats["<1KiB"]["count"] == 2
+    assert stats["<1KiB"]["request_bytes"] == 10
+    assert stats["<1KiB"]["call"]["p50"] == pytest.approx(0.004)
+    assert stats["1KiB-16KiB"]["count"] == 1
+    assert stats["1KiB-16KiB"]["decode"]["max"] == 0.0
+    assert stats[">=4MiB"]["count"] == 0
+    assert monitor.errors == 1
+
+    monitor.reset()
+    assert monitor.stats()["<1KiB"]["count"] == 0
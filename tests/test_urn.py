@@ -1,3 +1,6 @@
+import dataclasses as dc
+import pickle
+
 import pytest
 
 import pylumi
@@ -45,3 +48,88 @@ import pylumi
 )
 def test_render_urn(args, kwargs, out):
     assert str(pylumi.URN(*args, **kwargs)) == out
+
+
+def test_urn_full_urn_with_overrides():
+    urn = pylumi.URN(
+        "urn:pulumi:stack1::project1::aws:s3/bucketObject:BucketObject::name1",
+        "name2",
+    )
+    assert urn.name == "name2"
+    assert urn.stack == "stack1"
+    assert urn.project == "project1"
+
+
+def test_urn_short_form():
+    urn = pylumi.URN.parse("urn:pulumi:aws:s3/bucket:Bucket::name1")
+    assert urn == pylumi.URN("aws:s3/bucket:Bucket", "name1")
+
+
+def test_urn_invalid():
+    with pytest.raises(pylumi.exc.InvalidURN):
+        pylumi.URN.parse("urn:pulumi:not a urn")
+
+
+def test_urn_immutable_and_hashable():
+    urn = pylumi.URN("aws:s3/bucket:Bucket", "name1", "stack1", "project1")
+    with pytest.raises(AttributeError):
+        urn.name = "name2"
+    assert urn.replace(name="name2").name == "name2"
+    assert urn.name == "name1"
+    assert hash(urn) == hash(pylumi.URN(str(urn)))
+    assert {urn, pylumi.URN(str(urn))} == {urn}
+    assert pickle.loads(pickle.dumps(urn)) == urn
+
+
+def test_urn_parse_render_many():
+    strings = [
+        f"urn:pulumi:stack1::project1::aws:s3/bucket:Bucket::name{i % 10}"
+        for i in range(100)
+    ]
+    urns = pylumi.URN.parse_many(strings)
+    assert len(urns) == 100
+    assert len({id(urn) for urn in urns}) == 10
+    assert pylumi.URN.render_many(urns) == strings
+    # Components are interned, so URNs share their type strings
+    assert urns[0].type is urns[1].type
+
+
+def test_urn_index():
+    bucket1 = pylumi.URN("aws:s3/bucket:Bucket", "bucket1")
+    bucket2 = pylumi.URN("aws:s3/bucket:Bucket", "bucket2")
+    queue = pylumi.URN("aws:sqs/queue:Queue", "queue1")
+
+    index = pylumi.URNIndex([bucket1, bucket2, queue])
+    assert len(index) == 3
+    assert index.by_type("aws:s3/bucket:Bucket") == {bucket1, bucket2}
+    assert index.get("aws:sqs/queue:Queue", "queue1") == queue
+    assert index.get("aws:sqs/queue:Queue", "queue2") is None
+
+    index.remove(queue)
+    assert queue not in index
+    assert index.types() == ["aws:s3/bucket:Bucket"]
+    index.discard(queue)
+    assert set(index) == {bucket1, bucket2}
+
+
+def test_urn_dataclass_api():
+    urn = pylumi.URN("urn:pulumi:stack1::project1::aws:s3/bucket:Bucket::name1")
+    hash(urn)
+    str(urn)
+    assert [field.name for field in dc.fields(urn)] == [
+        "type",
+        "name",
+        "stack",
+        "project",
+    ]
+    assert dc.asdict(urn) == {
+        "type": "aws:s3/bucket:Bucket",
+        "name": "name1",
+        "stack": "stack1",
+        "project": "project1",
+    }
+    renamed = dc.replace(urn, name="name2")
+    assert str(renamed).endswith("::name2")
+    assert renamed == urn.replace(name="name2")
+    with pytest.raises(dc.FrozenInstanceError):
+        urn.name = "name3"
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+import pylumi
+from pylumi import validation
+from pylumi.replay import ReplayContext, TrafficRecorder
+from tests.test_codegen import SCHEMA
+
+BUCKET = "test:storage/bucket:Bucket"
+
+URN = f"urn:pulumi:_::_::{BUCKET}::_"
+
+
+@pytest.fixture
+def validator():
+    return validation.SchemaValidator(SCHEMA)
+
+
+def test_valid_inputs(validator):
+    inputs = {
+        "bucket": "my-bucket",
+        "acl": "private",
+        "website": {"routingRules": [{"prefix": "docs/"}]},
+        "tags": {"env": "test"},
+    }
+    assert validator.validate_resource(BUCKET, inputs) == []
+
+
+def test_invalid_inputs(validator):
+    inputs = {
+        "acl": "public",
+        "website": {"indexDocument": 1, "routingRules": [{}]},
+        "tags": {"env": True},
+    }
+    failures = validator.validate_resource(BUCKET, inputs)
+    assert sorted(failures, key=lambda failure: failure["Property"]) == [
+        {
+            "Property": "acl",
+            "Reason": "'public' is not one of the allowed values: 'private', 'public-read'",
+        },
+        {"Property": "bucket", "Reason": "missing required property"},
+        {"Property": "tags.env", "Reason": "expected string, got boolean"},
+        {"Property": "website.indexDocument", "Reason": "expected string, got integer"},
+        {
+            "Property": "website.routingRules[0].prefix",
+            "Reason": "missing required property",
+        },
+    ]
+
+
+def test_unknowns(validator):
+    inputs = {
+        "bucket": pylumi.UnknownValue.STRING,
+        "website": {"routingRules": pylumi.UnknownValue.ARRAY},
+    }
+    assert validator.validate_resource(BUCKET, inputs) == []
+
+
+def test_functions_and_config(validator):
+    assert validator.validate_function("test:storage/getBucket:getBucket", {}) == [
+        {"Property": "bucket", "Reason": "missing required property"}
+    ]
+    assert validator.validate_config({"region": 1}) == [
+        {"Property": "region", "Reason": "expected string, got integer"}
+    ]
+    # Tokens that are not in the schema are not validated
+    assert validator.validate_resource("test:other:Other", {"a": 1}) == []
+
+
+def test_validator_cache():
+    validation.clear_cache()
+    loads = []
+
+    def load_schema():
+        loads.append(1)
+        return SCHEMA
+
+    first = validation.get_validator("test", "1.0.0", load_schema)
+    assert validation.get_validator("test", "1.0.0", load_schema) is first
+    assert validation.get_validator("test", "2.0.0", load_schema) is not first
+    assert len(loads) == 2
+
+
+def test_provider_validate_inputs(tmp_path):
+    validation.clear_cache()
+    path = str(tmp_path / "traffic.jsonl")
+    with TrafficRecorder(path) as recorder:
+        recorder.record("test", "get_schema", [0], 1.0, 0.1, result=json.dumps(SCHEMA))
+
+    with ReplayContext(path) as ctx:
+        provider = ctx.provider("test", version="1.0.0", validate_inputs=True)
+        props, failures = provider.check(URN, {}, {"acl": "private"})
+        assert props is None
+        assert failures == [
+            {"Property": "bucket", "Reason": "missing required property"}
+        ]
+
+        with pytest.raises(pylumi.exc.InputValidationError) as exc_info:
+            provider.create(URN, {"bucket": 1})
+        assert exc_info.value.failures == [
+            {"Property": "bucket", "Reason": "expected string, got integer"}
+        ]
+
+
+def test_required_defaults():
+    schema = {
+        "provider": {
+            "inputProperties": {
+                "region": {
+                    "type": "string",
+                    "defaultInfo": {"environment": ["AWS_REGION"]},
+                },
+                "profile": {"type": "string", "default": "default"},
+                "token": {"type": "string"},
+            },
+            "requiredInputs": ["region", "profile", "token"],
+        },
+        "resources": {
+            BUCKET: {
+                "inputProperties": {
+                    "bucket": {"type": "string"},
+                    "acl": {"type": "string", "default": "private"},
+                },
+                "requiredInputs": ["bucket", "acl"],
+            }
+        },
+    }
+    validator = validation.SchemaValidator(schema)
+    # Required properties with defaults are filled in by the provider
+    assert validator.validate_config({}) == [
+        {"Property": "token", "Reason": "missing required property"}
+    ]
+    assert validator.validate_resource(BUCKET, {}) == [
+        {"Property": "bucket", "Reason": "missing required property"}
+    ]
@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+import pylumi
+from pylumi.watchdog import Watchdog
+
+URN = "urn:pulumi:_::_::aws:s3/bucket:Bucket::_"
+
+
+@pytest.fixture
+def release(fake_extension):
+    release = threading.Event()
+
+    @fake_extension.define
+    def provider_create(ctx, provider, urn, news, timeout, preview, **kwargs):
+        kwargs["trace"].record("encode", 0.0, 0.001, 123)
+        release.wait(5)
+        return {"ID": "bucket", "Properties": news}
+
+    fake_extension.define("provider_get_plugin_pid", lambda ctx, provider: 4242)
+    fake_extension.define(
+        "diagnostics_goroutine_stacks", lambda: "goroutine 1 [running]:\nmain.main()"
+    )
+    return release
+
+
+def test_watchdog(release, caplog):
+    reports = []
+    watchdog = Watchdog(threshold=0.0, dump_goroutines=True, callback=reports.append)
+    provider = pylumi.Context().provider("aws", watchdog=watchdog)
+
+    thread = threading.Thread(target=provider.create, args=(URN, {"a": 1}))
+    thread.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not any(call.request_bytes for call in watchdog.in_flight()):
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+        (call,) = watchdog.in_flight()
+        assert call.provider == "aws"
+        assert call.method == "create"
+        assert call.urn == URN
+        assert call.request_bytes == 123
+
+        assert len(watchdog.check()) == 1
+        # Calls are only reported once
+        assert watchdog.check() == []
+    finally:
+        release.set()
+        thread.join()
+
+    assert watchdog.in_flight() == []
+    (report,) = reports
+    assert report["plugin_pid"] == 4242
+    assert report["elapsed"] >= 0.0
+    assert "goroutine 1" in report["goroutines"]
+    assert "aws.create" in caplog.text
+
+
+def test_watchdog_thread(release):
+    reports = []
+    watchdog = Watchdog(threshold=0.05, interval=0.01, callback=reports.append)
+    provider = pylumi.Context().provider("aws", watchdog=watchdog)
+
+    with watchdog:
+        threading.Timer(0.5, release.set).start()
+        provider.create(URN, {})
+    assert [report["method"] for report in reports] == ["create"]
+    assert reports[0]["goroutines"] is None